@@ -16,13 +16,86 @@ class Settings:
     # AI Services
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL")  # or "gemini-1.0-pro"
+    GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-1.5-flash-8b")  # extraction, short text and fallback tier
     
     JINA_API_KEY = os.getenv("JINA_API_KEY")
     JINA_MODEL = os.getenv("JINA_MODEL")  # or "jina-embeddings-v2-base-code"
+
+    # LLM Gateway
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    # Follow-up calls allowed to finish an output cut off by the token limit
+    LLM_MAX_CONTINUATIONS = int(os.getenv("LLM_MAX_CONTINUATIONS", "2"))
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache/responses.sqlite3")
+    LLM_USER_TOKENS_PER_MINUTE = int(os.getenv("LLM_USER_TOKENS_PER_MINUTE", "60000"))
+    LLM_COMPANY_TOKENS_PER_MINUTE = int(os.getenv("LLM_COMPANY_TOKENS_PER_MINUTE", "200000"))
+    LLM_QUEUE_MAX_WAIT_SECONDS = float(os.getenv("LLM_QUEUE_MAX_WAIT_SECONDS", "120"))
+
+    # Provider resilience (circuit breakers, retries, hedged requests)
+    PROVIDER_MAX_RETRIES = int(os.getenv("PROVIDER_MAX_RETRIES", "2"))
+    LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() == "true"  # doubles token spend on slow calls
+    EMBEDDING_HEDGING = os.getenv("EMBEDDING_HEDGING", "true").lower() == "true"
+    JINA_TIMEOUT_SECONDS = float(os.getenv("JINA_TIMEOUT_SECONDS", "15"))
+    # Pooled Jina HTTP client (keep-alive connections shared by the whole process)
+    JINA_CONNECT_TIMEOUT_SECONDS = float(os.getenv("JINA_CONNECT_TIMEOUT_SECONDS", "5"))
+    JINA_MAX_CONNECTIONS = int(os.getenv("JINA_MAX_CONNECTIONS", "10"))
+    JINA_MAX_CONCURRENCY = int(os.getenv("JINA_MAX_CONCURRENCY", "8"))
+    # Embedding backend: "jina", "local" (hashed n-grams on CPU, no API key or
+    # model download) or "auto" (Jina when JINA_API_KEY is set, else local)
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "auto").lower()
+    LOCAL_EMBEDDING_DIMENSIONS = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", "512"))
+    # Embedding micro-batching: concurrent texts wait up to WAIT_MS (or until
+    # BATCH_SIZE are queued) and go to Jina as one request
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+    # Embedding cache keyed by (model, text hash); switching JINA_MODEL drops old vectors
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "5000"))
+    EMBEDDING_CACHE_MAX_DISK_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_DISK_ENTRIES", "200000"))
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.sqlite3")
+
+    # LLM provider: "gemini" (live), "record" (live, appending prompt/response pairs
+    # to LLM_RECORDINGS_PATH) or "replay" (offline from recordings, synthetic otherwise)
+    LLM_PROVIDER_MODE = os.getenv("LLM_PROVIDER_MODE", "gemini").lower()
+    LLM_RECORDINGS_PATH = os.getenv("LLM_RECORDINGS_PATH", "./llm_recordings/recordings.jsonl")
+    LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "0"))
+    LLM_STUB_JITTER_MS = float(os.getenv("LLM_STUB_JITTER_MS", "0"))
+    LLM_STUB_ERROR_RATE = float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+
+    # Scope generation: "single" (one call) or "sectioned" (parallel section calls)
+    SCOPE_GENERATION_MODE = os.getenv("SCOPE_GENERATION_MODE", "single")
+
+    # Background scope jobs (Postgres-backed, workers run inside each API process)
+    SCOPE_JOB_WORKERS = int(os.getenv("SCOPE_JOB_WORKERS", "2"))
+    SCOPE_JOB_HEARTBEAT_SECONDS = float(os.getenv("SCOPE_JOB_HEARTBEAT_SECONDS", "10"))
+    SCOPE_JOB_STALE_SECONDS = float(os.getenv("SCOPE_JOB_STALE_SECONDS", "60"))
+    SCOPE_JOB_MAX_ATTEMPTS = int(os.getenv("SCOPE_JOB_MAX_ATTEMPTS", "3"))
+
+    # Speculative scope generation after document upload (opt-in; costs LLM tokens when unused)
+    SPECULATIVE_SCOPE_ENABLED = os.getenv("SPECULATIVE_SCOPE_ENABLED", "false").lower() == "true"
+    SPECULATIVE_SCOPE_TTL_SECONDS = float(os.getenv("SPECULATIVE_SCOPE_TTL_SECONDS", "1800"))
+
+    # Semantic scope cache: reuse scopes of near-duplicate projects within a tenant.
+    # Similarity >= DIRECT returns the cached scope, >= ADAPT adapts it with a short prompt
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_DIRECT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_DIRECT_THRESHOLD", "0.97"))
+    SEMANTIC_CACHE_ADAPT_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_ADAPT_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_MAX_ENTRIES_PER_TENANT = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES_PER_TENANT", "200"))
+    SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
     # Frontend
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:5173")
     
     # ChromaDB
     CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    # Copy the pre-versioning "project_knowledge" collection into the active
+    # embedding space's collection on startup
+    CHROMA_MIGRATE_LEGACY = os.getenv("CHROMA_MIGRATE_LEGACY", "true").lower() == "true"
+    # Knowledge-base ingestion: documents are stored as passages of at most
+    # CHUNK_MAX_TOKENS, consecutive passages sharing CHUNK_OVERLAP_TOKENS
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "350"))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
 
 settings = Settings()
\ No newline at end of file
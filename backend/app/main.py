@@ -1,5 +1,6 @@
 # backend/app/main.py - FIXED VERSION
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -11,7 +12,13 @@ from app.routers.blob import router as blob_router
 from app.routers.ratecards import router as ratecards_router
 from app.routers.project_prompts import router as project_prompts_router
 from app.routers.refinement import router as refinement_router  # ADDED
+from app.routers.monitoring import router as monitoring_router
+from app.routers.scope_jobs import router as scope_jobs_router
 from app.auth.router import router as auth_router
+from app.utils.chroma_db import migrate_legacy_collection
+from app.utils.http_client import jina_http
+from app.utils.metrics import metrics
+from app.utils.job_queue import scope_job_queue
 
 
 @asynccontextmanager
@@ -21,8 +28,16 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
     
     print("✅ Database tables created")
+    
+    # Knowledge stored before per-space collections existed
+    await migrate_legacy_collection()
+    
+    # Background scope job workers (queued jobs survive restarts in Postgres)
+    scope_job_queue.start()
     yield
-    # Shutdown
+    # Shutdown - running jobs go back to the queue
+    await scope_job_queue.stop()
+    await jina_http.aclose()
     await engine.dispose()
 
 
@@ -50,6 +65,8 @@ app.include_router(blob_router, prefix="/api")
 app.include_router(ratecards_router, prefix="/api")
 app.include_router(project_prompts_router, prefix="/api")
 app.include_router(refinement_router, prefix="/api")  # ADDED
+app.include_router(monitoring_router, prefix="/api")
+app.include_router(scope_jobs_router, prefix="/api")
 
 
 @app.get("/")
@@ -57,6 +74,12 @@ async def root():
     return {"message": "AI Scoping Bot API", "version": "3.0.0"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": "3.0.0"}
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/app/models/project_models.py
 # backend/app/models/project_models.py
-from sqlalchemy import Column, String, DateTime, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Text, Integer, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 import uuid
 from app.config.database import Base
 
@@ -42,4 +42,31 @@ class ProjectPromptHistory(Base):
     user_id = Column(UUID(as_uuid=True))
     role = Column(String(20), nullable=False)
     message = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ScopeJob(Base):
+    __tablename__ = "scope_jobs"
+    __table_args__ = (
+        # Same key from the same user for the same project returns the existing job
+        UniqueConstraint("owner_id", "project_id", "idempotency_key", name="uq_scope_jobs_owner_project_idempotency_key"),
+        Index("ix_scope_jobs_status_created_at", "status", "created_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), index=True)
+    owner_id = Column(UUID(as_uuid=True))
+    company_id = Column(UUID(as_uuid=True))
+    idempotency_key = Column(String(200))
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    payload = Column(JSONB, nullable=False)  # project data snapshot taken at enqueue time
+    progress = Column(JSONB)  # {"stage": ..., "percent": ...}
+    result = Column(JSONB)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    locked_by = Column(String(100))
+    heartbeat_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -1,9 +1,12 @@
 #backend/app/routers/enhanced_projects_v2.py
 # backend/app/routers/enhanced_projects_v2.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import List, Optional
+import asyncio
+import json
 import uuid
 import os
 from datetime import datetime
@@ -16,7 +19,10 @@ from app.utils.architecture_generator import architecture_generator
 from app.utils.refinement_engine import refinement_engine
 from app.utils.enhanced_ai_engine import enhanced_ai_engine
 from app.utils.rag_engine import rag_engine
-from app.utils.chroma_db import store_document
+from app.utils.chroma_db import store_chunked_documents
+from app.utils.scope_pipeline import run_comprehensive_scope, build_project_data, finalize_comprehensive_scope
+from app.utils.speculation import scope_speculator
+from app.utils.llm_scheduler import set_llm_caller, PRIORITY_INTERACTIVE, PRIORITY_STANDARD, PRIORITY_BATCH
 from app.auth.router import current_active_user
 from pydantic import BaseModel
 
@@ -87,6 +93,7 @@ async def get_user_projects(
 async def upload_and_parse_document(
     project_id: uuid.UUID,
     file: UploadFile = File(...),
+    speculate: Optional[bool] = Query(None, description="Pre-generate the scope in the background (defaults to SPECULATIVE_SCOPE_ENABLED)"),
     db: AsyncSession = Depends(get_async_session),
     user = Depends(current_active_user)
 ):
@@ -105,6 +112,9 @@ async def upload_and_parse_document(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
+        # Document ingestion yields to interactive work
+        set_llm_caller(user.id, project.company_id, PRIORITY_BATCH)
+        
         # Save file
         upload_dir = "uploads"
         os.makedirs(upload_dir, exist_ok=True)
@@ -131,37 +141,144 @@ async def upload_and_parse_document(
         
         # Update project with extracted entities
         entities = parsed_data['entities']
-        project.domain = entities.get('domain', project.domain)
-        project.complexity = entities.get('complexity', project.complexity)
-        project.tech_stack = ', '.join(entities.get('tech_stack', []))
-        project.use_cases = ', '.join(entities.get('key_features', []))
-        project.compliance = ', '.join(entities.get('compliance_requirements', []))
-        project.duration = entities.get('estimated_duration', project.duration)
+        _apply_entities(project, entities)
         
         await db.commit()
         
+        # The user usually generates the scope next - start it now
+        speculated = scope_speculator.start(
+            project_id, build_project_data(project), user.id, project.company_id, enabled=speculate
+        )
+        
         # Store in vector DB for RAG
-        await store_document(
-            document=parsed_data['parsed_text']['raw_text'],
-            metadata={
+        await store_chunked_documents(
+            documents=[parsed_data['parsed_text']['pages']],
+            metadatas=[{
                 "project_id": str(project_id),
                 "type": "uploaded_document",
                 "filename": file.filename,
                 "extraction_confidence": parsed_data['extraction_confidence']
-            }
+            }]
         )
         
         return {
             "message": "Document uploaded and processed successfully",
             "extracted_entities": entities,
             "confidence": parsed_data['extraction_confidence'],
-            "project_updated": True
+            "project_updated": True,
+            "scope_pregeneration_started": speculated
         }
         
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{project_id}/upload-documents")
+async def upload_and_parse_documents(
+    project_id: uuid.UUID,
+    files: List[UploadFile] = File(...),
+    speculate: Optional[bool] = Query(None, description="Pre-generate the scope in the background (defaults to SPECULATIVE_SCOPE_ENABLED)"),
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """
+    Upload a multi-file RFP package; entities are extracted in batched
+    requests and merged into one project-level view
+    """
+    try:
+        result = await db.execute(
+            select(ProjectModel).where(
+                ProjectModel.id == project_id,
+                ProjectModel.owner_id == user.id
+            )
+        )
+        project = result.scalar_one_or_none()
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        set_llm_caller(user.id, project.company_id, PRIORITY_BATCH)
+        
+        upload_dir = "uploads"
+        os.makedirs(upload_dir, exist_ok=True)
+        
+        saved = []
+        for file in files:
+            file_extension = os.path.splitext(file.filename)[1].lower()
+            file_path = os.path.join(upload_dir, f"{uuid.uuid4()}{file_extension}")
+            contents = await file.read()
+            with open(file_path, "wb") as f:
+                f.write(contents)
+            saved.append((file.filename, file_path, file_extension.replace('.', '')))
+        
+        extraction = await document_parser.parse_and_extract_many(
+            [(file_path, file_type) for _, file_path, file_type in saved]
+        )
+        
+        for filename, file_path, _ in saved:
+            db.add(ProjectFile(
+                project_id=project_id,
+                file_name=filename,
+                file_path=file_path
+            ))
+        
+        entities = extraction['entities']
+        _apply_entities(project, entities)
+        
+        await db.commit()
+        
+        speculated = scope_speculator.start(
+            project_id, build_project_data(project), user.id, project.company_id, enabled=speculate
+        )
+        
+        # Store the documents in vector DB for RAG as passages (embedded in batches)
+        stored = [
+            (filename, document) for (filename, _, _), document in zip(saved, extraction['documents'])
+            if document['parsed_text']['raw_text']
+        ]
+        await store_chunked_documents(
+            documents=[document['parsed_text']['pages'] for _, document in stored],
+            metadatas=[
+                {
+                    "project_id": str(project_id),
+                    "type": "uploaded_document",
+                    "filename": filename,
+                    "extraction_confidence": document['extraction_confidence']
+                }
+                for filename, document in stored
+            ]
+        )
+        
+        return {
+            "message": f"{len(saved)} documents uploaded and processed successfully",
+            "extracted_entities": entities,
+            "documents": [
+                {
+                    "filename": filename,
+                    "extracted_entities": document['entities'],
+                    "confidence": document['extraction_confidence']
+                }
+                for (filename, _, _), document in zip(saved, extraction['documents'])
+            ],
+            "project_updated": True,
+            "scope_pregeneration_started": speculated
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _apply_entities(project: ProjectModel, entities: dict) -> None:
+    """Copy extracted entities onto the project's fields"""
+    project.domain = entities.get('domain', project.domain)
+    project.complexity = entities.get('complexity', project.complexity)
+    project.tech_stack = ', '.join(entities.get('tech_stack', []))
+    project.use_cases = ', '.join(entities.get('key_features', []))
+    project.compliance = ', '.join(entities.get('compliance_requirements', []))
+    project.duration = entities.get('estimated_duration', project.duration)
+
 # ============================================================================
 # 4. GENERATE COMPREHENSIVE SCOPE WITH ARCHITECTURE
 # ============================================================================
@@ -194,74 +311,107 @@ async def generate_comprehensive_scope(
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
         
-        # Prepare project data
-        project_data = {
-            "id": str(project.id),
-            "name": project.name,
-            "domain": project.domain,
-            "complexity": project.complexity,
-            "tech_stack": project.tech_stack,
-            "use_cases": project.use_cases,
-            "compliance": project.compliance,
-            "duration": project.duration
-        }
+        set_llm_caller(user.id, project.company_id, PRIORITY_STANDARD)
         
-        # Search for similar projects (RAG)
-        search_query = f"{project.name} {project.domain} {project.use_cases}"
-        similar_projects = await rag_engine.search_similar_projects(
-            query=search_query,
-            filters={"domain": project.domain} if project.domain else None,
-            n_results=3
-        )
-        
-        # Generate scope using RAG
-        scope = await enhanced_ai_engine.generate_scope_with_rag(
-            project_data=project_data,
-            answered_questions=None,
-            similar_projects=similar_projects.get("similar_projects", [])
-        )
-        
-        # Generate architecture diagram
-        architecture_diagram = await architecture_generator.generate_architecture_diagram(project_data)
-        
-        # Generate workflow diagram
-        workflow_diagram = await architecture_generator.generate_workflow_diagram(
-            scope.get('activities', [])
-        )
-        
-        # Calculate confidence score
-        confidence_score = calculate_confidence_score(
-            similar_projects=similar_projects.get("similar_projects", []),
-            rag_used=len(similar_projects.get("similar_projects", [])) > 0
-        )
-        
-        # Add diagrams and metadata to scope
-        scope['diagrams'] = {
-            'architecture': architecture_diagram,
-            'workflow': workflow_diagram
-        }
-        
-        scope['metadata'] = {
-            'confidence_score': confidence_score,
-            'rag_sources_count': len(similar_projects.get("similar_projects", [])),
-            'generated_at': datetime.now().isoformat(),
-            'version': '2.0'
-        }
+        # Prepare project data
+        project_data = build_project_data(project)
         
-        # Add detailed assumptions and dependencies
-        scope['assumptions'] = generate_assumptions(project_data, scope)
-        scope['dependencies'] = extract_dependencies(scope.get('activities', []))
+        # Pre-generated after upload and the project is unchanged since
+        precomputed = await scope_speculator.claim(project_id, project_data)
+        if precomputed:
+            return precomputed
         
-        return {
-            "project_id": str(project_id),
-            "scope": scope,
-            "confidence": confidence_score,
-            "rag_enhanced": len(similar_projects.get("similar_projects", [])) > 0
-        }
+        return await run_comprehensive_scope(project_id, project_data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{project_id}/generate-comprehensive-scope/stream")
+async def stream_comprehensive_scope(
+    project_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """
+    Stream comprehensive scope generation as server-sent events:
+    - `started` once the RAG search is done
+    - `section` for each top-level scope section as soon as Gemini completes it
+    - `complete` with the same payload as generate-comprehensive-scope
+    - `error` if the pipeline fails
+    """
+    result = await db.execute(
+        select(ProjectModel).where(
+            ProjectModel.id == project_id,
+            ProjectModel.owner_id == user.id
+        )
+    )
+    project = result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Context is copied into the response task, so the stream's LLM calls are attributed too
+    set_llm_caller(user.id, project.company_id, PRIORITY_STANDARD)
+    project_data = build_project_data(project)
+    
+    async def event_stream():
+        architecture_task = None
+        try:
+            search_query = f"{project_data['name']} {project_data['domain']} {project_data['use_cases']}"
+            similar_projects = await rag_engine.search_similar_projects(
+                query=search_query,
+                filters={"domain": project_data['domain']} if project_data['domain'] else None,
+                n_results=3
+            )
+            similar_list = similar_projects.get("similar_projects", [])
+            
+            # Architecture diagram only needs project_data - overlap it with scope generation
+            architecture_task = asyncio.create_task(
+                architecture_generator.generate_architecture_diagram(project_data)
+            )
+            
+            yield format_sse("started", {
+                "project_id": str(project_id),
+                "rag_sources_count": len(similar_list)
+            })
+            
+            scope = None
+            async for event in enhanced_ai_engine.stream_scope_with_rag(
+                project_data=project_data,
+                answered_questions=None,
+                similar_projects=similar_list
+            ):
+                if event["event"] == "section":
+                    yield format_sse("section", {"section": event["section"], "data": event["data"]})
+                else:
+                    scope = event["scope"]
+            
+            architecture_diagram = await architecture_task
+            workflow_diagram = await architecture_generator.generate_workflow_diagram(
+                scope.get('activities', [])
+            )
+            
+            yield format_sse("complete", finalize_comprehensive_scope(
+                project_id=project_id,
+                project_data=project_data,
+                scope=scope,
+                similar_projects=similar_list,
+                architecture_diagram=architecture_diagram,
+                workflow_diagram=workflow_diagram
+            ))
+            
+        except Exception as e:
+            print(f"❌ Scope stream error: {e}")
+            yield format_sse("error", {"detail": str(e)})
+        finally:
+            if architecture_task and not architecture_task.done():
+                architecture_task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # ============================================================================
 # 5. INTERACTIVE REFINEMENT
 # ============================================================================
@@ -281,6 +431,7 @@ async def refine_scope(
     - Modify resources
     - Recalculate automatically
     """
+    set_llm_caller(user.id, priority=PRIORITY_INTERACTIVE)
     try:
         # Process refinement
         result = await refinement_engine.process_refinement_request(
@@ -359,48 +510,6 @@ async def finalize_scope(
 # HELPER FUNCTIONS
 # ============================================================================
 
-def calculate_confidence_score(similar_projects: list, rag_used: bool) -> float:
-    """Calculate confidence score based on RAG matches"""
-    if not rag_used or not similar_projects:
-        return 0.6  # Base confidence without RAG
-    
-    # Average similarity scores
-    avg_similarity = sum(p.get('similarity_score', 0) for p in similar_projects) / len(similar_projects)
-    
-    # Confidence = 0.6 base + 0.4 * average similarity
-    confidence = 0.6 + (0.4 * avg_similarity)
-    
-    return round(confidence, 2)
-
-def generate_assumptions(project_data: dict, scope: dict) -> list:
-    """Generate key assumptions for the project"""
-    assumptions = [
-        "Client will provide timely feedback and approvals",
-        "All required resources will be available as planned",
-        "Requirements are stable and major changes will follow change management process",
-        "Development environment and tools are accessible",
-        "Third-party services/APIs will be available and functioning"
-    ]
-    
-    # Add domain-specific assumptions
-    domain = project_data.get('domain', '')
-    if 'healthcare' in domain.lower():
-        assumptions.append("HIPAA compliance requirements are clearly documented")
-    if 'finance' in domain.lower():
-        assumptions.append("PCI-DSS and financial compliance standards are defined")
-    
-    return assumptions
-
-def extract_dependencies(activities: list) -> list:
-    """Extract and organize project dependencies"""
-    dependencies = []
-    
-    for activity in activities:
-        if activity.get('dependencies'):
-            dependencies.append({
-                "activity": activity['name'],
-                "depends_on": activity['dependencies'],
-                "phase": activity.get('phase', 'Unknown')
-            })
-    
-    return dependencies
\ No newline at end of file
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
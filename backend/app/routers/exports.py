@@ -7,6 +7,7 @@ from sqlalchemy import select
 from app.config.database import get_async_session
 from app.models.project_models import Project as ProjectModel
 from app.auth.router import fastapi_users
+from app.utils.metrics import observe_async, export_duration, export_errors
 from pydantic import BaseModel
 import json
 import os
@@ -121,6 +122,7 @@ async def generate_export(
 # PDF EXPORT
 # ============================================================================
 
+@observe_async(export_duration, export_errors, format="pdf")
 async def generate_pdf_export(project: ProjectModel, scope_data: Dict[str, Any]) -> str:
     """Generate professional PDF document"""
     
@@ -262,6 +264,7 @@ async def generate_pdf_export(project: ProjectModel, scope_data: Dict[str, Any])
 # EXCEL EXPORT
 # ============================================================================
 
+@observe_async(export_duration, export_errors, format="excel")
 async def generate_excel_export(project: ProjectModel, scope_data: Dict[str, Any]) -> str:
     """Generate detailed Excel workbook"""
     
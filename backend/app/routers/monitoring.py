@@ -0,0 +1,61 @@
+# backend/app/routers/monitoring.py
+from fastapi import APIRouter, Depends
+from app.auth.router import current_active_user
+from app.utils.architecture_generator import architecture_generator
+from app.utils.circuit_breaker import gemini_breaker, jina_breaker
+from app.utils.embedding_cache import embedding_cache
+from app.utils.embedding_service import embedding_service
+from app.utils.http_client import jina_http
+from app.utils.job_queue import scope_job_queue
+from app.utils.speculation import scope_speculator
+from app.utils.llm_gateway import llm_gateway
+from app.utils.llm_scheduler import llm_scheduler
+from app.utils.llm_cache import llm_cache
+from app.utils.model_router import model_router
+from app.utils.prompt_registry import prompt_registry
+from app.utils.semantic_cache import semantic_scope_cache
+from app.utils.single_flight import llm_flight, embedding_flight
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+
+@router.get("/providers")
+async def get_provider_status(user = Depends(current_active_user)):
+    """Circuit breaker state per AI provider, the Jina connection pool, embedding batching and cache"""
+    return {
+        "gemini": gemini_breaker.get_stats(),
+        "jina": jina_breaker.get_stats(),
+        "jina_http": jina_http.get_stats(),
+        "embedding_batches": embedding_service.get_stats(),
+        "embedding_cache": embedding_cache.get_stats()
+    }
+
+
+@router.get("/scheduler")
+async def get_scheduler_status(user = Depends(current_active_user)):
+    """LLM queue depth, wait times and quota counters"""
+    return llm_scheduler.get_stats()
+
+
+@router.get("/jobs")
+async def get_job_status(user = Depends(current_active_user)):
+    """Scope job workers and speculative pre-generation for this process"""
+    return {
+        "scope_jobs": scope_job_queue.get_stats(),
+        "speculation": scope_speculator.get_stats()
+    }
+
+
+@router.get("/llm")
+async def get_llm_stats(user = Depends(current_active_user)):
+    """Gateway, caches, request coalescing, routing and prompt size counters"""
+    return {
+        "gateway": llm_gateway.get_stats(),
+        "scheduler": llm_scheduler.get_stats(),
+        "cache": llm_cache.get_stats(),
+        "coalescing": [llm_flight.get_stats(), embedding_flight.get_stats()],
+        "routes": model_router.get_stats(),
+        "prompts": prompt_registry.get_stats(),
+        "architecture_diagrams": architecture_generator.stats,
+        "semantic_cache": semantic_scope_cache.get_stats()
+    }
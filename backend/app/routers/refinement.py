@@ -6,6 +6,7 @@ from typing import Dict, Any
 from app.config.database import get_async_session
 from app.schemas.project_schemas import RefinementRequest, RefinementResponse
 from app.utils.refinement_engine import refinement_engine
+from app.utils.llm_scheduler import set_llm_caller, PRIORITY_INTERACTIVE
 from app.auth.router import current_active_user
 
 router = APIRouter(prefix="/refinement", tags=["refinement"])
@@ -24,6 +25,8 @@ async def refine_scope(
     - Discount applications (percentage or flat amount)
     - Resource changes (add/remove team members)
     """
+    # Chat refinement jumps ahead of queued scope generation and document ingestion
+    set_llm_caller(user.id, priority=PRIORITY_INTERACTIVE)
     try:
         print(f"🔧 Processing refinement request: {request.message[:100]}...")
         
@@ -0,0 +1,146 @@
+# backend/app/routers/scope_jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Optional
+import asyncio
+import uuid
+
+from app.config.database import get_async_session, AsyncSessionLocal
+from app.models.project_models import Project as ProjectModel, ScopeJob
+from app.utils.job_queue import scope_job_queue, job_to_dict, SUCCEEDED, FAILED
+from app.utils.scope_pipeline import build_project_data
+from app.routers.enhanced_projects_v2 import format_sse
+from app.auth.router import current_active_user
+
+router = APIRouter(prefix="/projects", tags=["scope-jobs"])
+
+# How often the events stream re-reads the job row
+EVENTS_POLL_SECONDS = 1.0
+
+
+@router.post("/{project_id}/scope-jobs", status_code=202)
+async def create_scope_job(
+    project_id: uuid.UUID,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """
+    Queue comprehensive scope generation and return the job id immediately.
+    Retrying with the same Idempotency-Key returns the original job.
+    """
+    result = await db.execute(
+        select(ProjectModel).where(
+            ProjectModel.id == project_id,
+            ProjectModel.owner_id == user.id
+        )
+    )
+    project = result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    try:
+        job, created = await scope_job_queue.enqueue(
+            db,
+            project_id=project_id,
+            owner_id=user.id,
+            company_id=project.company_id,
+            payload={"project_data": build_project_data(project)},
+            idempotency_key=idempotency_key
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to queue scope job: {str(e)}")
+
+    return {**job_to_dict(job, include_result=False), "created": created}
+
+
+@router.get("/{project_id}/scope-jobs")
+async def list_scope_jobs(
+    project_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """Recent scope jobs for a project, newest first (without results)"""
+    result = await db.execute(
+        select(ScopeJob).where(
+            ScopeJob.project_id == project_id,
+            ScopeJob.owner_id == user.id
+        ).order_by(ScopeJob.created_at.desc()).limit(20)
+    )
+    return [job_to_dict(job, include_result=False) for job in result.scalars().all()]
+
+
+@router.get("/scope-jobs/{job_id}")
+async def get_scope_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """Job status and progress; includes the scope once it has succeeded"""
+    job = await _get_owned_job(db, job_id, user.id)
+    return job_to_dict(job)
+
+
+@router.get("/scope-jobs/{job_id}/events")
+async def stream_scope_job(
+    job_id: uuid.UUID,
+    db: AsyncSession = Depends(get_async_session),
+    user = Depends(current_active_user)
+):
+    """
+    Follow a job as server-sent events:
+    - `progress` whenever the stage or percentage changes
+    - `complete` with the same payload as generate-comprehensive-scope
+    - `error` if the job failed
+    Disconnecting does not affect the job.
+    """
+    await _get_owned_job(db, job_id, user.id)
+
+    async def event_stream():
+        last_progress = None
+        while True:
+            # Fresh session per poll so each read sees the worker's latest commit
+            async with AsyncSessionLocal() as poll_db:
+                job = await poll_db.get(ScopeJob, job_id)
+            if job is None:
+                yield format_sse("error", {"detail": "Job not found"})
+                return
+
+            if job.progress != last_progress:
+                last_progress = job.progress
+                yield format_sse("progress", {
+                    "job_id": str(job_id),
+                    "status": job.status,
+                    **(job.progress or {})
+                })
+
+            if job.status == SUCCEEDED:
+                yield format_sse("complete", job.result)
+                return
+            if job.status == FAILED:
+                yield format_sse("error", {"detail": job.error or "Scope job failed"})
+                return
+
+            await asyncio.sleep(EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _get_owned_job(db: AsyncSession, job_id: uuid.UUID, user_id) -> ScopeJob:
+    result = await db.execute(
+        select(ScopeJob).where(
+            ScopeJob.id == job_id,
+            ScopeJob.owner_id == user_id
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Scope job not found")
+    return job
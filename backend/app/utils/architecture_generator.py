@@ -1,46 +1,48 @@
 # backend/app/utils/architecture_generator.py - FASTER VERSION
-import google.generativeai as genai
 import re
 from typing import Dict, Any
-from app.config.config import settings
-
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from app.utils.llm_gateway import llm_gateway
+from app.utils.model_router import model_router
+from app.utils.prompt_registry import prompt_registry
+from app.utils.architecture_synthesizer import synthesize_architecture
+from app.utils.workflow_compiler import compile_workflow
 
 class ArchitectureGenerator:
     """Generate architecture diagrams - Fast version"""
     
     def __init__(self):
-        model_name = settings.GEMINI_MODEL or "gemini-1.5-flash"
-        if model_name.startswith("models/"):
-            model_name = model_name.replace("models/", "")
-        
-        print(f"🤖 Initializing ArchitectureGenerator with model: {model_name}")
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_router.model_for("architecture_diagram")
+        # How architecture diagrams were produced
+        self.stats = {"template": 0, "llm": 0, "default": 0}
+        print(f"🤖 Initializing ArchitectureGenerator with model: {self.model_name}")
     
-    async def generate_architecture_diagram(self, project_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate Mermaid diagram - Simple and fast"""
+    async def generate_architecture_diagram(self, project_data: Dict[str, Any], bypass_cache: bool = False) -> Dict[str, Any]:
+        """Generate Mermaid diagram - from component templates, Gemini only when none fit"""
+        
+        diagram = synthesize_architecture(project_data)
+        if diagram:
+            self.stats["template"] += 1
+            print(f"🧩 Architecture diagram from templates ({len(diagram['components'])} components)")
+            return diagram
         
         try:
-            # Simplified prompt for faster response
-            prompt = f"""Generate a system architecture diagram in Mermaid syntax.
-
-Project: {project_data.get('name', 'System')}
-Domain: {project_data.get('domain', 'General')}
-
-Return ONLY Mermaid code. NO explanations. Start with 'graph TD'.
-
-Show: Users -> Frontend -> API -> Backend -> Database"""
+            # No recognizable technologies - ask Gemini (answers are cached by the gateway)
+            self.stats["llm"] += 1
+            prompt = prompt_registry.render(
+                "architecture_diagram",
+                name=project_data.get('name', 'System'),
+                domain=project_data.get('domain', 'General'),
+                tech_stack=project_data.get('tech_stack') or 'Not specified'
+            )
             
-            # Generate with shorter timeout
-            response = self.model.generate_content(
+            # Fast tier, short output - see TASK_ROUTES
+            response_text = await llm_gateway.generate(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=500,  # Shorter response
-                    temperature=0.3  # Less creative, faster
-                )
+                task="architecture_diagram",
+                bypass_cache=bypass_cache
             )
             
-            diagram_code = response.text.strip()
+            diagram_code = response_text.strip()
             diagram_code = re.sub(r'```mermaid\s*', '', diagram_code)
             diagram_code = re.sub(r'```\s*', '', diagram_code)
             
@@ -51,19 +53,34 @@ Show: Users -> Frontend -> API -> Backend -> Database"""
                 'diagram_type': 'architecture',
                 'format': 'mermaid',
                 'code': diagram_code,
-                'description': 'System architecture diagram'
+                'description': 'System architecture diagram',
+                'source': 'llm'
             }
             
         except Exception as e:
             print(f"⚠️ Architecture generation error (using default): {e}")
+            self.stats["default"] += 1
             return self._get_default_architecture(project_data)
     
     async def generate_workflow_diagram(self, activities: list) -> Dict[str, Any]:
-        """Generate workflow - Simple and fast"""
+        """Compile the activity dependency graph into a workflow diagram - no LLM call"""
         
-        try:
-            # Use default for speed
+        if not activities:
             return self._get_default_workflow()
+        
+        try:
+            workflow = compile_workflow(activities)
+            if workflow['cycles']:
+                print(f"⚠️ Dependency cycles in workflow: {workflow['cycles']}")
+            
+            return {
+                'diagram_type': 'workflow',
+                'format': 'mermaid',
+                'code': workflow['code'],
+                'description': f"Project workflow: {workflow['node_count']} activities in {workflow['layer_count']} dependency layers",
+                'cycles': workflow['cycles'],
+                'unresolved_dependencies': workflow['unresolved_dependencies']
+            }
             
         except Exception as e:
             print(f"⚠️ Workflow generation error (using default): {e}")
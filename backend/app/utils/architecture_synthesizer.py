@@ -0,0 +1,244 @@
+# backend/app/utils/architecture_synthesizer.py
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+# Layers in diagram order: (id, subgraph title)
+LAYERS = [
+    ("clients", "Clients"),
+    ("edge", "Edge & Security"),
+    ("services", "Application Services"),
+    ("data", "Data Layer"),
+    ("external", "External Integrations"),
+    ("governance", "Compliance & Governance"),
+]
+
+# Component library: (node id, label template, layer, shape, keywords).
+# {match} in a label is replaced with the technology that matched, so
+# "Web App ({match})" renders as "Web App (React)"; a generic keyword
+# ("email", "mobile") drops the parenthesis.
+COMPONENTS: List[Tuple[str, str, str, str, Tuple[str, ...]]] = [
+    ("WEB", "Web App ({match})", "clients", "box",
+     ("react", "angular", "vue", "next.js", "nextjs", "svelte", "nuxt", "ember", "web app", "portal", "frontend")),
+    ("MOBILE", "Mobile App ({match})", "clients", "box",
+     ("react native", "flutter", "swift", "kotlin", "ios", "android", "mobile", "xamarin", "ionic")),
+    ("GATEWAY", "API Gateway", "edge", "box", ("api gateway", "kong", "apigee", "nginx", "graphql", "rest api", "api")),
+    ("CDN", "CDN ({match})", "edge", "box", ("cloudfront", "cloudflare", "akamai", "cdn")),
+    ("IDP", "Identity Provider ({match})", "edge", "box",
+     ("auth0", "okta", "keycloak", "cognito", "azure ad", "entra", "sso", "oauth", "saml", "openid")),
+    ("API", "Backend API ({match})", "services", "box",
+     ("node.js", "nodejs", "node", "express", "nestjs", "fastapi", "django", "flask", "spring", "java", ".net", "c#",
+      "golang", "go", "ruby on rails", "rails", "laravel", "php", "python")),
+    ("WORKER", "Background Workers ({match})", "services", "box",
+     ("celery", "sidekiq", "airflow", "spark", "databricks", "etl", "lambda", "azure functions", "cloud functions")),
+    ("ML", "ML / AI Service ({match})", "services", "box",
+     ("openai", "gemini", "llm", "gpt", "tensorflow", "pytorch", "scikit-learn", "machine learning", "ml", "ai", "nlp")),
+    ("REALTIME", "Realtime Service ({match})", "services", "box", ("websocket", "socket.io", "signalr", "realtime", "real-time")),
+    ("DB", "{match}", "data", "db",
+     ("postgresql", "postgres", "mysql", "mariadb", "sql server", "mssql", "oracle", "mongodb", "dynamodb",
+      "cosmos db", "cassandra", "firestore", "supabase", "snowflake", "bigquery", "redshift", "database", "sql")),
+    ("CACHE", "Cache ({match})", "data", "db", ("redis", "memcached", "elasticache")),
+    ("SEARCH", "Search ({match})", "data", "db", ("elasticsearch", "opensearch", "solr", "algolia")),
+    ("QUEUE", "Message Queue ({match})", "data", "queue", ("kafka", "rabbitmq", "sqs", "pub/sub", "pubsub", "service bus", "kinesis")),
+    ("STORAGE", "Object Storage ({match})", "data", "db", ("s3", "blob storage", "azure blob", "gcs", "cloud storage", "minio")),
+    ("VECTOR", "Vector Store ({match})", "data", "db", ("pinecone", "chroma", "chromadb", "weaviate", "qdrant", "milvus", "pgvector")),
+    ("PAYMENTS", "Payment Gateway ({match})", "external", "box", ("stripe", "paypal", "braintree", "adyen", "square", "payment")),
+    ("EMAIL", "Email Service ({match})", "external", "box", ("sendgrid", "mailgun", "ses", "postmark", "email")),
+    ("SMS", "SMS / Notifications ({match})", "external", "box", ("twilio", "sms", "push notification", "firebase cloud messaging", "fcm")),
+    ("CRM", "CRM ({match})", "external", "box", ("salesforce", "hubspot", "dynamics 365", "crm")),
+    ("ERP", "ERP ({match})", "external", "box", ("sap", "netsuite", "oracle erp", "erp")),
+    ("EHR", "EHR / Clinical Systems ({match})", "external", "box", ("epic systems", "epic ehr", "cerner", "hl7", "fhir", "ehr", "emr")),
+    ("MAPS", "Maps / Geolocation ({match})", "external", "box", ("google maps", "mapbox", "geolocation", "gps")),
+    ("AUDIT", "Audit Logging", "governance", "box", ("hipaa", "soc 2", "soc2", "sox", "iso 27001", "audit")),
+    ("PHI", "PHI Encryption & Access Control", "governance", "box", ("hipaa", "phi")),
+    ("VAULT", "Card Tokenization Vault", "governance", "box", ("pci", "pci-dss", "pci dss")),
+    ("PRIVACY", "Consent & Data Privacy", "governance", "box", ("gdpr", "ccpa", "privacy", "consent")),
+]
+
+# Components every diagram gets once a template fits
+_BASE = {
+    "USERS": ("Users", "clients", "round"),
+    "GATEWAY": ("API Gateway", "edge", "box"),
+    "API": ("Backend API", "services", "box"),
+    "DB": ("Database", "data", "db"),
+}
+
+# Label overrides for short or ambiguous keywords
+_DISPLAY_NAMES = {
+    "node": "Node.js", "nodejs": "Node.js", "go": "Go", "golang": "Go", "ml": "ML", "ai": "AI", "llm": "LLM",
+    "ios": "iOS", "s3": "S3", "sqs": "SQS", "ses": "SES", "gcs": "GCS", "sql": "SQL Database",
+    "database": "Database", "api": "API", "php": "PHP", ".net": ".NET", "c#": "C#", "sap": "SAP",
+    "hl7": "HL7", "fhir": "FHIR", "ehr": "EHR", "emr": "EMR", "crm": "CRM", "erp": "ERP", "sms": "SMS",
+    "cdn": "CDN", "sso": "SSO", "gpt": "GPT", "nlp": "NLP", "etl": "ETL", "mssql": "SQL Server",
+    "postgres": "PostgreSQL", "postgresql": "PostgreSQL", "mongodb": "MongoDB", "mysql": "MySQL",
+    "dynamodb": "DynamoDB", "chromadb": "ChromaDB", "pgvector": "pgvector", "fcm": "FCM",
+    "gps": "GPS",
+}
+
+# Edges between layers: (from component, to component); missing ends are skipped
+_EDGES = [
+    ("USERS", "WEB"), ("USERS", "MOBILE"), ("USERS", "CDN"),
+    ("CDN", "WEB"), ("WEB", "GATEWAY"), ("MOBILE", "GATEWAY"), ("USERS", "GATEWAY"),
+    ("GATEWAY", "IDP"), ("GATEWAY", "API"), ("GATEWAY", "REALTIME"),
+    ("API", "DB"), ("API", "CACHE"), ("API", "SEARCH"), ("API", "STORAGE"), ("API", "QUEUE"),
+    ("QUEUE", "WORKER"), ("WORKER", "DB"), ("WORKER", "STORAGE"),
+    ("API", "ML"), ("ML", "VECTOR"), ("REALTIME", "CACHE"),
+    ("API", "PAYMENTS"), ("API", "EMAIL"), ("API", "SMS"), ("API", "CRM"), ("API", "ERP"),
+    ("API", "EHR"), ("API", "MAPS"), ("WORKER", "EMAIL"),
+    ("API", "AUDIT"), ("DB", "PHI"), ("PAYMENTS", "VAULT"), ("API", "PRIVACY"),
+]
+
+_SHAPES = {"box": '{id}["{label}"]', "round": '{id}(["{label}"])', "db": '{id}[("{label}")]', "queue": '{id}[/"{label}"/]'}
+
+
+def _keyword_pattern(keyword: str) -> "re.Pattern":
+    # Word edges so "go" does not match "google"
+    return re.compile(r"(?<![\w.#+-])(" + re.escape(keyword) + r")(?![\w#+])", re.IGNORECASE)
+
+
+def _keyword_index() -> List[Tuple[str, "re.Pattern", List[int]]]:
+    """Every keyword of the library, longest first, with the components it selects"""
+    owners: Dict[str, List[int]] = {}
+    for rule, (_, _, _, _, keywords) in enumerate(COMPONENTS):
+        for keyword in keywords:
+            owners.setdefault(keyword, []).append(rule)
+    return [(keyword, _keyword_pattern(keyword), owners[keyword]) for keyword in sorted(owners, key=len, reverse=True)]
+
+
+_KEYWORDS = _keyword_index()
+
+# Keywords that name the component itself rather than a product - the label
+# stays "Web App", not "Web App (Portal)"
+_GENERIC_KEYWORDS = {"portal", "frontend", "real-time", "machine learning", "push notification", "geolocation", "gps"}
+
+
+def synthesize_architecture(project_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Build an architecture diagram from the project's technologies, integrations and compliance needs.
+
+    Reads tech_stack, use_cases and compliance (comma-separated text or
+    lists), plus integration_requirements / compliance_requirements when the
+    caller passes extracted entities. Returns None when nothing in the
+    project matches the component library - the caller then asks the LLM.
+    """
+    technology_text = _join(project_data.get('tech_stack'))
+    integration_text = " ".join([
+        _join(project_data.get('integration_requirements')),
+        _join(project_data.get('use_cases')),
+    ])
+    compliance_text = " ".join([
+        _join(project_data.get('compliance')),
+        _join(project_data.get('compliance_requirements')),
+    ])
+
+    # Integrations and compliance rules may also match the feature text;
+    # technology rules only the tech stack, so a feature like "mobile
+    # friendly reports" does not add an app
+    matches = [
+        _match_keywords(technology_text),
+        _match_keywords(integration_text, ("external", "edge")),
+        _match_keywords(compliance_text, ("governance",)),
+    ]
+
+    components: Dict[str, str] = {}
+    layers: Dict[str, str] = {}
+    shapes: Dict[str, str] = {}
+    for rule, (node_id, label, layer, shape, _) in enumerate(COMPONENTS):
+        keyword = next((found[rule] for found in matches if rule in found), None)
+        if keyword and node_id not in components:
+            components[node_id] = _label(label, keyword)
+            layers[node_id] = layer
+            shapes[node_id] = shape
+
+    if not components:
+        return None
+
+    for node_id, (label, layer, shape) in _BASE.items():
+        if node_id not in components:
+            components[node_id] = label
+            layers[node_id] = layer
+            shapes[node_id] = shape
+
+    lines = ["graph TD"]
+    for layer_id, title in LAYERS:
+        members = [node_id for node_id in components if layers[node_id] == layer_id]
+        if not members:
+            continue
+        lines.append(f'    subgraph {layer_id}["{title}"]')
+        for node_id in members:
+            lines.append("        " + _SHAPES[shapes[node_id]].format(id=node_id, label=_escape(components[node_id])))
+        lines.append("    end")
+
+    has_clients = "WEB" in components or "MOBILE" in components
+    for source, target in _EDGES:
+        if source not in components or target not in components:
+            continue
+        if source == "USERS" and target == "GATEWAY" and has_clients:
+            continue
+        if source == "USERS" and target == "CDN" and "WEB" not in components:
+            continue
+        if (source, target) == ("USERS", "WEB") and "CDN" in components:
+            continue
+        lines.append(f"    {source} --> {target}")
+
+    domain = project_data.get('domain')
+    return {
+        'diagram_type': 'architecture',
+        'format': 'mermaid',
+        'code': "\n".join(lines) + "\n",
+        'description': f'{domain} system architecture' if domain else 'System architecture',
+        'source': 'template',
+        'components': sorted(components.values())
+    }
+
+
+def _match_keywords(text: str, layers: Optional[Tuple[str, ...]] = None) -> Dict[int, str]:
+    """Component rule -> first keyword of it found in text.
+
+    Keywords of all rules are tried longest first and each match claims its
+    span, so "React Native" selects the mobile app and not also a React web
+    app. Only rules in the given layers are considered.
+    """
+    found: Dict[int, Tuple[int, str]] = {}
+    claimed: List[Tuple[int, int]] = []
+    for keyword, pattern, owners in _KEYWORDS:
+        owners = [rule for rule in owners if layers is None or COMPONENTS[rule][2] in layers]
+        if not owners:
+            continue
+        for match in pattern.finditer(text):
+            start, end = match.span(1)
+            if any(start < claimed_end and claimed_start < end for claimed_start, claimed_end in claimed):
+                continue
+            claimed.append((start, end))
+            for rule in owners:
+                if rule not in found or start < found[rule][0]:
+                    found[rule] = (start, match.group(1))
+    return {rule: keyword for rule, (_, keyword) in found.items()}
+
+
+def _label(template: str, keyword: str) -> str:
+    name = _display(keyword)
+    if "({match})" in template and (
+        keyword.lower() in _GENERIC_KEYWORDS
+        or re.search(r"\b" + re.escape(name.lower()) + r"\b", template.lower())
+    ):
+        # "Email Service", not "Email Service (Email)"
+        return template.replace(" ({match})", "")
+    return template.replace("{match}", name)
+
+
+def _join(value: Any) -> str:
+    if not value:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(item) for item in value)
+    return str(value)
+
+
+def _display(keyword: str) -> str:
+    lowered = keyword.lower()
+    if lowered in _DISPLAY_NAMES:
+        return _DISPLAY_NAMES[lowered]
+    return keyword if any(c.isupper() for c in keyword) else keyword.title()
+
+
+def _escape(label: str) -> str:
+    return label.replace('"', "#quot;")
@@ -1,67 +1,185 @@
 #backend/app/utils/chroma_db.py
 import chromadb
 from app.config.config import settings
-from .ai_engine import get_jina_embeddings
+from .ai_engine import get_jina_embeddings, get_jina_embeddings_many
+from .document_chunker import document_chunker
+from .embedding_backends import JinaEmbeddingBackend
+from .embedding_service import embedding_service
+from .metrics import chroma_operation_duration, chroma_errors, document_chunks
+import re
 import uuid
 
 # Initialize ChromaDB
 chroma_client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR)
 
-# Create collection
-collection = chroma_client.get_or_create_collection(
-    name="project_knowledge",
-    metadata={"description": "Project scoping knowledge base"}
-)
+# One collection per embedding space, so vectors of different backends never mix.
+# The pre-versioning collection is copied into them by migrate_legacy_collection().
+LEGACY_COLLECTION = "project_knowledge"
+_collections = {}
+
+def collection_for(space: str):
+    """
+    Get (or create) the knowledge base collection for an embedding space
+    """
+    if space not in _collections:
+        slug = re.sub(r"[^a-z0-9_-]+", "-", space.lower()).strip("-_")
+        _collections[space] = chroma_client.get_or_create_collection(
+            name=f"project_knowledge_{slug}"[:63].rstrip("-_"),
+            metadata={"description": "Project scoping knowledge base", "embedding_space": space}
+        )
+    return _collections[space]
+
+# Collection of the active embedding backend
+collection = collection_for(embedding_service.space)
 
 async def store_document(document: str, metadata: dict = None):
     """
     Store document in ChromaDB
     """
+    return await store_documents([document], [metadata])
+
+async def store_documents(documents: list, metadatas: list = None, ids: list = None):
+    """
+    Store many documents in ChromaDB with their embeddings fetched in batches.
+    Documents the active backend cannot embed go to the local backend's collection.
+    Existing ids are overwritten.
+    """
+    if not documents:
+        return True
+    metadatas = metadatas or [{} for _ in documents]
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
     try:
-        # Get embeddings from Jina
-        embeddings = await get_jina_embeddings(document)
+        embeddings = await get_jina_embeddings_many(documents)
+        missing = [i for i, vector in enumerate(embeddings) if not vector]
+        if missing:
+            # Fallback: embed locally, in the local space
+            local = await embedding_service.embed_local([documents[i] for i in missing])
         
-        if embeddings:
-            # Store with custom embeddings
-            collection.add(
-                embeddings=[embeddings],
-                documents=[document],
-                metadatas=[metadata] if metadata else [{}],
-                ids=[str(uuid.uuid4())]
-            )
-        else:
-            # Fallback: let ChromaDB generate embeddings
-            collection.add(
-                documents=[document],
-                metadatas=[metadata] if metadata else [{}],
-                ids=[str(uuid.uuid4())]
-            )
+        with chroma_operation_duration.time(operation="add"):
+            embedded = [i for i, vector in enumerate(embeddings) if vector]
+            if embedded:
+                _add(collection, [embeddings[i] for i in embedded], [documents[i] for i in embedded],
+                     [metadatas[i] for i in embedded], [ids[i] for i in embedded])
+            if missing:
+                _add(collection_for(embedding_service.local.space), local,
+                     [documents[i] for i in missing], [metadatas[i] for i in missing], [ids[i] for i in missing])
             
         return True
     except Exception as e:
-        print(f"Error storing document: {e}")
+        print(f"Error storing documents: {e}")
+        chroma_errors.inc(operation="add")
         return False
 
+async def store_chunked_documents(documents: list, metadatas: list = None):
+    """
+    Store long documents (each a list of page texts) as passages. Every passage
+    keeps its document's metadata plus parent_id, chunk index, pages and heading,
+    and all passages are embedded in batches.
+    """
+    metadatas = metadatas or [{} for _ in documents]
+    passages, passage_metadatas = [], []
+    for pages, metadata in zip(documents, metadatas):
+        chunks = document_chunker.chunk(pages)
+        document_chunks.observe(len(chunks))
+        if not chunks:
+            print(f"⚠️ No text to store for {(metadata or {}).get('filename', 'document')}")
+        parent_id = str(uuid.uuid4())
+        for chunk in chunks:
+            passages.append(chunk.text)
+            passage_metadatas.append({
+                **(metadata or {}),
+                "parent_id": parent_id,
+                "chunk_count": len(chunks),
+                **chunk.metadata()
+            })
+    print(f"🧩 Storing {len(documents)} documents as {len(passages)} passages")
+    return await store_documents(passages, passage_metadatas)
+
+def _add(target, embeddings: list, documents: list, metadatas: list, ids: list):
+    target.upsert(
+        embeddings=embeddings,
+        documents=documents,
+        metadatas=[metadata or {} for metadata in metadatas],
+        ids=ids
+    )
+
+async def migrate_legacy_collection(batch_size: int = 256):
+    """
+    Copy the unversioned "project_knowledge" collection into the active space's
+    collection, once per space. Stored vectors are reused when they have the
+    active backend's dimensions (Jina data under Jina); otherwise documents are
+    re-embedded. Ids are kept, so an interrupted run is safe to repeat.
+    """
+    try:
+        legacy = chroma_client.get_collection(name=LEGACY_COLLECTION)
+    except Exception:
+        return 0
+    space = embedding_service.space
+    marker = f"migrated_to_{re.sub(r'[^a-z0-9_]+', '_', space.lower())}"
+    total = legacy.count()
+    if not total or (legacy.metadata or {}).get(marker):
+        return 0
+    if not settings.CHROMA_MIGRATE_LEGACY:
+        print(f"⚠️ Legacy collection '{LEGACY_COLLECTION}' holds {total} documents that are not searched "
+              f"(CHROMA_MIGRATE_LEGACY is off)")
+        return 0
+    
+    # One vector of the active space tells whether the stored vectors are in it
+    probe = await get_jina_embeddings("dimension probe")
+    reuse = isinstance(embedding_service.backend, JinaEmbeddingBackend)
+    if reuse and not probe:
+        print(f"⚠️ Jina unavailable, legacy collection '{LEGACY_COLLECTION}' ({total} documents) is not searched "
+              f"until it is migrated on a later start")
+        return 0
+    copied = reembedded = 0
+    try:
+        for offset in range(0, total, batch_size):
+            rows = legacy.get(offset=offset, limit=batch_size, include=["documents", "metadatas", "embeddings"])
+            vectors = rows["embeddings"] if rows["embeddings"] is not None else [None] * len(rows["ids"])
+            same_space = [
+                i for i, vector in enumerate(vectors)
+                if reuse and vector is not None and len(vector) == len(probe)
+            ]
+            reused = set(same_space)
+            others = [i for i in range(len(rows["ids"])) if i not in reused and rows["documents"][i]]
+            if same_space:
+                with chroma_operation_duration.time(operation="add"):
+                    _add(collection, [list(vectors[i]) for i in same_space], [rows["documents"][i] for i in same_space],
+                         [rows["metadatas"][i] for i in same_space], [rows["ids"][i] for i in same_space])
+            if others and not await store_documents([rows["documents"][i] for i in others],
+                                                    [rows["metadatas"][i] for i in others],
+                                                    [rows["ids"][i] for i in others]):
+                raise RuntimeError("re-embedding failed")
+            copied += len(same_space)
+            reembedded += len(others)
+        legacy.modify(metadata={**(legacy.metadata or {}), marker: True})
+        print(f"📦 Migrated legacy collection '{LEGACY_COLLECTION}' to {collection.name}: "
+              f"{copied} vectors copied, {reembedded} documents re-embedded")
+        return copied + reembedded
+    except Exception as e:
+        print(f"⚠️ Legacy collection migration failed, {total} documents are not searched yet (retried on next start): {e}")
+        chroma_errors.inc(operation="migrate")
+        return 0
+
 async def search_similar_projects(query: str, n_results: int = 3):
     """
-    Search for similar projects
+    Search for similar projects. Uploaded documents are stored as passages, so
+    matches are the relevant passages (see store_chunked_documents metadata)
     """
     try:
-        # Get query embeddings from Jina
+        # Get query embeddings from the active backend
         query_embedding = await get_jina_embeddings(query)
+        target = collection
+        if not query_embedding:
+            # Fallback: search what was stored with local embeddings
+            target = collection_for(embedding_service.local.space)
+            query_embedding = (await embedding_service.embed_local([query]))[0]
         
-        if query_embedding:
-            # Search with custom embeddings
-            results = collection.query(
+        with chroma_operation_duration.time(operation="query"):
+            results = target.query(
                 query_embeddings=[query_embedding],
                 n_results=n_results
             )
-        else:
-            # Fallback: text-based search
-            results = collection.query(
-                query_texts=[query],
-                n_results=n_results
-            )
             
         return {
             "documents": results["documents"][0] if results["documents"] else [],
@@ -70,6 +188,7 @@ async def search_similar_projects(query: str, n_results: int = 3):
         }
     except Exception as e:
         print(f"Error searching projects: {e}")
+        chroma_errors.inc(operation="query")
         return {"documents": [], "metadatas": [], "distances": []}
 
 def get_collection_stats():
@@ -77,11 +196,13 @@ def get_collection_stats():
     Get statistics about the knowledge base
     """
     try:
-        collection_data = collection.get()
+        spaces = {space: target.count() for space, target in _collections.items()}
         return {
-            "document_count": len(collection_data["ids"]),
-            "collection_name": collection.name
+            "document_count": spaces.get(embedding_service.space, 0),
+            "collection_name": collection.name,
+            "embedding_space": embedding_service.space,
+            "documents_by_space": spaces
         }
     except Exception as e:
         print(f"Error getting collection stats: {e}")
-        return {"document_count": 0, "collection_name": "unknown"}
\ No newline at end of file
+        return {"document_count": 0, "collection_name": "unknown"}
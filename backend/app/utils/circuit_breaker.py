@@ -0,0 +1,285 @@
+# backend/app/utils/circuit_breaker.py
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from app.utils.metrics import metrics
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+    def __init__(self, provider: str, retry_after: float):
+        super().__init__(f"{provider} circuit is open, retry in {retry_after:.0f}s")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is worth retrying: rate limits, 5xx and connection failures"""
+    if isinstance(error, (CircuitOpenError, asyncio.TimeoutError)):
+        return False
+    # google.api_core exceptions carry the HTTP status as .code, httpx errors as .response
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, OSError))
+
+
+class CircuitBreaker:
+    """Per-provider circuit breaker with retries and hedged requests.
+
+    Outcomes are kept in a rolling time window. The circuit opens when enough
+    calls in the window failed or were slow, rejects calls for open_seconds so
+    callers fall back immediately, then lets a single probe through to decide
+    whether to close again. Successful latencies feed the p95 used as the
+    hedging delay.
+    """
+
+    def __init__(self,
+                 name: str,
+                 window_seconds: float = 60,
+                 min_calls: int = 5,
+                 failure_rate_threshold: float = 0.5,
+                 slow_call_seconds: Optional[float] = None,
+                 slow_call_rate_threshold: float = 0.8,
+                 open_seconds: float = 30,
+                 min_hedge_samples: int = 10):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.min_hedge_samples = min_hedge_samples
+
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # (timestamp, ok, latency) per call
+        self._window: Deque[Tuple[float, bool, float]] = deque()
+        # Successful latencies per hedge key (usually the task) for p95 delays
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.stats = {
+            "calls": 0,
+            "failures": 0,
+            "rejected": 0,
+            "retries": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "opened": 0
+        }
+
+    async def call(self,
+                   func: Callable[[], Awaitable[Any]],
+                   timeout: Optional[float] = None,
+                   retries: int = 0,
+                   hedge: bool = False,
+                   hedge_key: Optional[str] = None,
+                   soft_timeout: bool = False,
+                   retry_on: Callable[[BaseException], bool] = is_transient) -> Any:
+        """Run func() through the breaker.
+
+        timeout bounds the whole call including retries. Transient failures are
+        retried with jittered exponential backoff. With hedge=True a second
+        func() is started once the first has run longer than the recent p95
+        latency for hedge_key, and whichever finishes first wins. A soft_timeout
+        is the caller's own latency budget: hitting it counts as a slow call
+        rather than a provider failure. Only timeouts and errors retry_on
+        accepts count as failures; other errors (bad requests, auth, caller
+        bugs) pass through without an outcome, so one caller cannot open the
+        circuit for everybody.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        attempt = 0
+
+        while True:
+            self.before_call()
+            try:
+                return await self._attempt(func, deadline, hedge, hedge_key or self.name, soft_timeout, retry_on)
+            except asyncio.TimeoutError:
+                raise
+            except Exception as e:
+                if attempt >= retries or not retry_on(e):
+                    raise
+                delay = backoff_delay(attempt)
+                if deadline is not None and loop.time() + delay >= deadline:
+                    raise
+                self.stats["retries"] += 1
+                print(f"🔁 {self.name} call failed ({e}), retry {attempt + 1}/{retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _attempt(self,
+                       func: Callable[[], Awaitable[Any]],
+                       deadline: Optional[float],
+                       hedge: bool,
+                       hedge_key: str,
+                       soft_timeout: bool,
+                       is_failure: Callable[[BaseException], bool] = is_transient) -> Any:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        primary = asyncio.ensure_future(func())
+        pending = {primary}
+        error: Optional[BaseException] = None
+
+        try:
+            hedge_delay = self.hedge_delay(hedge_key) if hedge else None
+            if hedge_delay is not None and (deadline is None or started + hedge_delay < deadline):
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+                if not done:
+                    self.stats["hedged"] += 1
+                    print(f"🏁 {self.name} call slower than p95 ({hedge_delay:.2f}s), sending hedged request")
+                    pending.add(asyncio.ensure_future(func()))
+
+            while pending:
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise asyncio.TimeoutError()
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        self.record_success(loop.time() - started, hedge_key)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        except asyncio.CancelledError:
+            self.release_probe()
+            raise
+        except asyncio.TimeoutError:
+            if soft_timeout and self.state == CLOSED:
+                self._add_outcome(True, loop.time() - started)
+            else:
+                self.record_failure(loop.time() - started)
+            raise
+        except Exception as e:
+            if is_failure(e):
+                self.record_failure(loop.time() - started)
+            else:
+                # Not the provider's fault - no outcome
+                self.release_probe()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def raise_if_open(self) -> None:
+        """Fail fast before queueing for a provider whose circuit is open"""
+        if self.state == OPEN:
+            waited = time.monotonic() - self._opened_at
+            if waited < self.open_seconds:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.open_seconds - waited)
+
+    def before_call(self) -> None:
+        """Reject the call if the circuit is open; admit one probe when half-open"""
+        self.stats["calls"] += 1
+        if self.state == OPEN:
+            waited = time.monotonic() - self._opened_at
+            if waited < self.open_seconds:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.open_seconds - waited)
+            self.state = HALF_OPEN
+            print(f"🟡 {self.name} circuit half-open, probing")
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, 1)
+            self._probe_in_flight = True
+
+    def record_success(self, latency: float, hedge_key: Optional[str] = None) -> None:
+        self._latencies.setdefault(hedge_key or self.name, deque(maxlen=100)).append(latency)
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            self.state = CLOSED
+            self._window.clear()
+            print(f"🟢 {self.name} circuit closed")
+            return
+        self._add_outcome(True, latency)
+
+    def record_failure(self, latency: float) -> None:
+        self.stats["failures"] += 1
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+            self._open()
+            return
+        self._add_outcome(False, latency)
+
+    def hedge_delay(self, hedge_key: Optional[str] = None) -> Optional[float]:
+        """p95 of recent successful latencies, None until there are enough samples"""
+        latencies = self._latencies.get(hedge_key or self.name)
+        if not latencies or len(latencies) < self.min_hedge_samples:
+            return None
+        ordered = sorted(latencies)
+        return max(ordered[int(0.95 * (len(ordered) - 1))], 0.05)
+
+    def release_probe(self) -> None:
+        """Give up a half-open probe slot without an outcome (caller went away)"""
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _add_outcome(self, ok: bool, latency: float) -> None:
+        now = time.monotonic()
+        self._window.append((now, ok, latency))
+        while self._window and now - self._window[0][0] > self.window_seconds:
+            self._window.popleft()
+
+        if self.state != CLOSED or len(self._window) < self.min_calls:
+            return
+        failures = sum(1 for _, succeeded, _ in self._window if not succeeded)
+        if failures / len(self._window) >= self.failure_rate_threshold:
+            self._open()
+        elif self.slow_call_seconds:
+            slow = sum(1 for _, _, took in self._window if took >= self.slow_call_seconds)
+            if slow / len(self._window) >= self.slow_call_rate_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        self.stats["opened"] += 1
+        print(f"🔴 {self.name} circuit opened for {self.open_seconds}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state and rolling window summary for monitoring"""
+        window = list(self._window)
+        failures = sum(1 for _, ok, _ in window if not ok)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "retry_after": round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1) if self.state == OPEN else 0,
+            "window_calls": len(window),
+            "window_failure_rate": round(failures / len(window), 3) if window else 0,
+            "hedge_delays": {key: round(self.hedge_delay(key), 3) for key in self._latencies if self.hedge_delay(key) is not None},
+            **self.stats
+        }
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+# Global instances - Gemini scope calls legitimately take tens of seconds
+gemini_breaker = CircuitBreaker("gemini", slow_call_seconds=90)
+jina_breaker = CircuitBreaker("jina", slow_call_seconds=10)
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+metrics.callback(
+    "circuit_breaker_state", "Provider circuit state (0 closed, 1 half-open, 2 open)", "gauge",
+    lambda: {(b.name,): _STATE_VALUES[b.state] for b in (gemini_breaker, jina_breaker)},
+    ["provider"]
+)
@@ -0,0 +1,215 @@
+# backend/app/utils/document_chunker.py
+import re
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+from app.config.config import settings
+from app.utils.prompt_registry import count_tokens
+
+# Lines that start a section: markdown headings, numbered clauses
+# ("3.2 Security Requirements", "A. Scope"), "Section 4 ..." and short all-caps titles
+_NUMBERED_HEADING = re.compile(r"^(\d+(\.\d+)*\.?|[A-Z]\.|(?i:section|article|appendix|chapter|part)\s+[\w.-]+:?)\s+\S")
+_PAGE_NUMBER = re.compile(r"^(page\s+)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+HEADING = "heading"
+PARAGRAPH = "paragraph"
+# Part of a paragraph too long for one window
+PIECE = "piece"
+# Joining two units (newline or space) can add at most this much to the token count
+SEPARATOR_TOKENS = 1
+
+
+class DocumentChunk:
+    """A passage of a document, with where it came from"""
+
+    def __init__(self, text: str, index: int, page_start: int, page_end: int, heading: str, tokens: int):
+        self.text = text
+        self.index = index
+        self.page_start = page_start
+        self.page_end = page_end
+        self.heading = heading
+        self.tokens = tokens
+
+    def metadata(self) -> Dict[str, Any]:
+        # ChromaDB metadata values must be scalars
+        return {
+            "chunk_index": self.index,
+            "page_start": self.page_start,
+            "page_end": self.page_end,
+            "heading": self.heading,
+            "token_count": self.tokens
+        }
+
+
+class DocumentChunker:
+    """Split extracted documents into passages for the knowledge base.
+
+    Text is broken on pages, headings and paragraphs; paragraphs longer than
+    a window are broken on sentences, then words. Units are packed into
+    windows of at most max_tokens. A heading closes the current window once
+    it holds min_tokens, so passages follow the document's sections. Windows
+    that continue a section repeat its heading and the last overlap_tokens
+    of the previous window. Lines repeated on most pages (running headers
+    and footers) and bare page numbers are dropped; a document that would
+    leave no passages at all is packed from its raw text instead.
+    """
+
+    def __init__(self, max_tokens: int = 350, overlap_tokens: int = 50):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+        self.min_tokens = max_tokens // 4
+
+    def chunk(self, pages: List[str]) -> List[DocumentChunk]:
+        """Passages of a document given as its page texts (page numbers start at 1)"""
+        chunks = self._pack(self._units(pages))
+        if not chunks and any(page.strip() for page in pages):
+            # Only headings or running headers and footers - keep the text as it is
+            chunks = self._pack(
+                unit for page_number, page in enumerate(pages, start=1)
+                for unit in self._split_paragraph(" ".join(page.split()), page_number) if unit[0]
+            )
+        return chunks
+
+    def _pack(self, units) -> List[DocumentChunk]:
+        """Pack units into windows; a window's size counts its separators and repeated heading"""
+        chunks: List[DocumentChunk] = []
+        window: List[Tuple[str, int, int, str]] = []
+        used = 0
+        section = ""
+        window_heading = ""
+        window_section = ""
+
+        for text, page, tokens, kind in units:
+            if kind == HEADING and used >= self.min_tokens:
+                # New section - start fresh, without overlap
+                self._emit(chunks, window, window_heading, window_section)
+                window, used = [], 0
+            elif window and used + SEPARATOR_TOKENS + tokens > self.max_tokens:
+                self._emit(chunks, window, window_heading, window_section)
+                window = self._overlap(window)
+                window_heading = window_section = section
+                while window and _size(window, window_heading) + SEPARATOR_TOKENS + tokens > self.max_tokens:
+                    window.pop(0)
+                used = _size(window, window_heading)
+            if kind == HEADING:
+                section = text
+            if not window:
+                window_heading = section if kind != HEADING else ""
+                window_section = window_heading
+                if window_heading and _size([], window_heading) + SEPARATOR_TOKENS + tokens > self.max_tokens:
+                    # No room to repeat the heading - it stays in the chunk metadata
+                    window_heading = ""
+                used = _size(window, window_heading)
+            used += tokens + (SEPARATOR_TOKENS if window or window_heading else 0)
+            window.append((text, page, tokens, kind))
+
+        self._emit(chunks, window, window_heading, window_section)
+        return chunks
+
+    def _emit(self, chunks: List[DocumentChunk], window: List[Tuple[str, int, int, str]], heading: str,
+              section: str = "") -> None:
+        if not window or all(kind == HEADING for _, _, _, kind in window):
+            return
+        text = window[0][0]
+        for unit_text, _, _, kind in window[1:]:
+            text += (" " if kind == PIECE else "\n") + unit_text
+        section = heading or section or next((unit_text for unit_text, _, _, kind in window if kind == HEADING), "")
+        if heading:
+            text = f"{heading}\n{text}"
+        chunks.append(DocumentChunk(
+            text=text,
+            index=len(chunks),
+            page_start=window[0][1],
+            page_end=window[-1][1],
+            heading=section,
+            tokens=count_tokens(text)
+        ))
+
+    def _overlap(self, window: List[Tuple[str, int, int, str]]) -> List[Tuple[str, int, int, str]]:
+        """Trailing units of a window that fit in overlap_tokens"""
+        carried, used = [], 0
+        for unit in reversed(window):
+            if unit[3] == HEADING or used + unit[2] > self.overlap_tokens:
+                break
+            carried.insert(0, unit)
+            used += unit[2]
+        return carried
+
+    def _units(self, pages: List[str]):
+        """(text, page, tokens, kind) for every heading, paragraph and paragraph piece"""
+        boilerplate = _repeated_lines(pages)
+        for page_number, page in enumerate(pages, start=1):
+            paragraph: List[str] = []
+            for raw_line in page.splitlines() + [""]:
+                line = " ".join(raw_line.split())
+                if line and (line.lower() in boilerplate or _PAGE_NUMBER.match(line)):
+                    continue
+                if line and not _is_heading(line):
+                    paragraph.append(line)
+                    continue
+                if paragraph:
+                    yield from self._split_paragraph(" ".join(paragraph), page_number)
+                    paragraph = []
+                if line:
+                    yield line, page_number, count_tokens(line), HEADING
+
+    def _split_paragraph(self, text: str, page: int):
+        tokens = count_tokens(text)
+        if tokens <= self.max_tokens:
+            yield text, page, tokens, PARAGRAPH
+            return
+        kind = PARAGRAPH
+        for sentence in _SENTENCE_END.split(text):
+            sentence_tokens = count_tokens(sentence)
+            if sentence_tokens <= self.max_tokens:
+                yield sentence, page, sentence_tokens, kind
+            else:
+                # No sentence breaks (tables, lists run together) - cut on words,
+                # and overlong "words" (encoded data, long URLs) on characters
+                # (a character is at most one token, so a cut word always fits a window)
+                width = self.max_tokens
+                piece, used = [], 0
+                for word in (word[i:i + width] for word in sentence.split() for i in range(0, len(word), width)):
+                    word_tokens = count_tokens(word)
+                    if piece and used + SEPARATOR_TOKENS + word_tokens > self.max_tokens // 2:
+                        yield " ".join(piece), page, count_tokens(" ".join(piece)), kind
+                        piece, used, kind = [], 0, PIECE
+                    used += word_tokens + (SEPARATOR_TOKENS if piece else 0)
+                    piece.append(word)
+                if piece:
+                    yield " ".join(piece), page, count_tokens(" ".join(piece)), kind
+            kind = PIECE
+
+
+def _size(window: List[Tuple[str, int, int, str]], heading: str) -> int:
+    """Upper bound on the tokens of a window's text once joined"""
+    parts = [unit[2] for unit in window] + ([count_tokens(heading)] if heading else [])
+    return sum(parts) + SEPARATOR_TOKENS * max(0, len(parts) - 1)
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > 100 or line[-1] in ".,;":
+        return False
+    if line.startswith("#"):
+        return True
+    if _NUMBERED_HEADING.match(line) and len(line.split()) <= 12:
+        return True
+    return line.isupper() and len(line.split()) <= 10
+
+
+def _repeated_lines(pages: List[str]) -> set:
+    """Short lines (lowercased) found on at least half the pages of a document of 3+ pages"""
+    if len(pages) < 3:
+        return set()
+    counts = Counter()
+    for page in pages:
+        # Running headers and footers are short lines
+        counts.update({" ".join(line.split()).lower() for line in page.splitlines() if len(line) <= 100} - {""})
+    return {line for line, count in counts.items() if count >= max(3, len(pages) // 2)}
+
+
+# Global instance
+document_chunker = DocumentChunker(
+    max_tokens=settings.CHUNK_MAX_TOKENS,
+    overlap_tokens=settings.CHUNK_OVERLAP_TOKENS
+)
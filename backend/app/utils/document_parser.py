@@ -1,58 +1,65 @@
 # backend/app/utils/document_parser.py
+import asyncio
 import PyPDF2
 import docx
-import json
-import re
-from typing import Dict, Any, Optional
-import google.generativeai as genai
-from app.config.config import settings
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+from app.utils.llm_gateway import llm_gateway
+from app.utils.model_router import model_router
+from app.utils.json_parser import parse_llm_json
+from app.utils.metrics import document_parse_duration, document_parse_errors
+from app.utils.prompt_registry import prompt_registry, count_tokens, encode_schema, ENTITY_SCHEMA, ENTITY_BATCH_SCHEMA
 
-# CRITICAL FIX: Configure Gemini with correct model name
-genai.configure(api_key=settings.GEMINI_API_KEY)
+COMPLEXITY_LEVELS = ['simple', 'moderate', 'complex', 'enterprise']
+# Batch extraction: condensed size per document, document tokens per request
+# (the entity_extraction_batch prompt budget minus instructions) and documents
+# per request (bounded by the output tokens a batch response may use)
+MAX_DOCUMENT_TOKENS = 1500
+BATCH_DOCUMENT_TOKENS = 5200
+MAX_DOCUMENTS_PER_BATCH = 4
 
 class DocumentParser:
     """Enhanced document parser with entity extraction"""
     
     def __init__(self):
-        # FIX: Use simple model name without "models/" prefix
-        model_name = settings.GEMINI_MODEL or "gemini-1.5-flash"
-        
-        # Ensure we don't add "models/" prefix
-        if model_name.startswith("models/"):
-            model_name = model_name.replace("models/", "")
-        
-        print(f"🤖 Initializing DocumentParser with model: {model_name}")
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_router.model_for("entity_extraction")
+        print(f"🤖 Initializing DocumentParser with model: {self.model_name}")
     
     async def parse_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
         """Parse document and extract text"""
         text = ""
+        pages = []
         
-        if file_type == 'pdf':
-            text = self._extract_pdf_text(file_path)
-        elif file_type in ['docx', 'doc']:
-            text = self._extract_docx_text(file_path)
-        elif file_type == 'txt':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
+        with document_parse_duration.time(file_type=file_type):
+            if file_type == 'pdf':
+                pages = self._extract_pdf_pages(file_path)
+                text = "".join(page + "\n" for page in pages)
+            elif file_type in ['docx', 'doc']:
+                text = self._extract_docx_text(file_path)
+            elif file_type == 'txt':
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
         
         return {
             'raw_text': text,
+            # Text per page for chunking; documents without pages are one page
+            'pages': pages or ([text] if text else []),
             'word_count': len(text.split()),
             'char_count': len(text)
         }
     
-    def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
+    def _extract_pdf_pages(self, file_path: str) -> List[str]:
+        """Extract text from PDF, one string per page"""
+        pages = []
         try:
             with open(file_path, 'rb') as f:
                 pdf_reader = PyPDF2.PdfReader(f)
                 for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+                    pages.append(page.extract_text() or "")
         except Exception as e:
             print(f"PDF extraction error: {e}")
-        return text
+            document_parse_errors.inc(file_type="pdf")
+        return pages
     
     def _extract_docx_text(self, file_path: str) -> str:
         """Extract text from DOCX"""
@@ -63,95 +70,34 @@ class DocumentParser:
                 text += para.text + "\n"
         except Exception as e:
             print(f"DOCX extraction error: {e}")
+            document_parse_errors.inc(file_type="docx")
         return text
     
-    async def extract_entities(self, text: str) -> Dict[str, Any]:
+    async def extract_entities(self, text: str, bypass_cache: bool = False) -> Dict[str, Any]:
         """Extract key project entities using AI"""
         
-        prompt = f"""
-You are an expert at analyzing project documents (RFPs, SOWs, requirements).
-Extract the following key entities from the document below:
-
-CRITICAL: Return ONLY a valid JSON object. NO markdown, NO backticks, NO extra text.
-
-Extract these fields:
-- project_type: (e.g., "Web Application", "Mobile App", "API Integration")
-- domain: (e.g., "Healthcare", "Finance", "E-commerce")
-- complexity: (MUST be one of: "simple", "moderate", "complex", "enterprise")
-- deliverables: (array of main deliverables)
-- tech_stack: (array of technologies mentioned)
-- compliance_requirements: (array of compliance standards like GDPR, HIPAA)
-- estimated_duration: (e.g., "6 months", "12 weeks")
-- key_features: (array of main features/capabilities)
-- integration_requirements: (array of systems to integrate with)
-- security_requirements: (array of security needs)
-- user_roles: (array of user types/roles)
-- scalability_needs: (description of scale requirements)
-- budget_indicators: (any budget/cost mentions)
-
-IMPORTANT: For complexity, you MUST use ONLY these exact values:
-- "simple" (for basic projects)
-- "moderate" (for medium complexity - DO NOT USE "medium")
-- "complex" (for advanced projects)
-- "enterprise" (for large-scale enterprise projects)
-
-Document (first 5000 chars):
-{text[:5000]}
-
-Return this exact structure:
-{{
-  "project_type": "string",
-  "domain": "string",
-  "complexity": "simple|moderate|complex|enterprise",
-  "deliverables": ["item1", "item2"],
-  "tech_stack": ["tech1", "tech2"],
-  "compliance_requirements": ["requirement1"],
-  "estimated_duration": "string",
-  "key_features": ["feature1", "feature2"],
-  "integration_requirements": ["system1"],
-  "security_requirements": ["requirement1"],
-  "user_roles": ["role1", "role2"],
-  "scalability_needs": "description",
-  "budget_indicators": "any cost mentions"
-}}
-"""
+        prompt = prompt_registry.render(
+            "entity_extraction",
+            schema=encode_schema(ENTITY_SCHEMA),
+            document=text
+        )
         
         try:
             print("📤 Sending entity extraction request to Gemini...")
-            response = self.model.generate_content(prompt)
-            text_response = response.text.strip()
+            response_text = await llm_gateway.generate(
+                prompt,
+                task="entity_extraction",
+                bypass_cache=bypass_cache
+            )
+            text_response = response_text.strip()
             
             print(f"📥 Received response from Gemini")
             
-            # Clean response
-            text_response = re.sub(r'```json\s*', '', text_response)
-            text_response = re.sub(r'```\s*', '', text_response)
+            entities = parse_llm_json(text_response)
             
-            # Find JSON object
-            start = text_response.find('{')
-            end = text_response.rfind('}') + 1
-            
-            if start != -1 and end > start:
-                json_str = text_response[start:end]
-                entities = json.loads(json_str)
-                
-                # CRITICAL FIX: Ensure complexity is one of the valid values
-                complexity = entities.get('complexity', 'moderate').lower()
-                
-                # Map any "medium" to "moderate"
-                if complexity == 'medium':
-                    complexity = 'moderate'
-                    print(f"⚠️ Mapped 'medium' to 'moderate'")
-                
-                # Validate complexity
-                valid_complexities = ['simple', 'moderate', 'complex', 'enterprise']
-                if complexity not in valid_complexities:
-                    print(f"⚠️ Invalid complexity '{complexity}', defaulting to 'moderate'")
-                    complexity = 'moderate'
-                
-                entities['complexity'] = complexity
-                
-                print(f"✅ Entity extraction successful - Complexity: {complexity}")
+            if isinstance(entities, dict):
+                entities = self._normalize_entities(entities)
+                print(f"✅ Entity extraction successful - Complexity: {entities['complexity']}")
                 return entities
             else:
                 raise ValueError("No JSON object found in response")
@@ -160,6 +106,133 @@ Return this exact structure:
             print(f"❌ Entity extraction error: {e}")
             return self._get_default_entities()
     
+    def _normalize_entities(self, entities: Dict[str, Any]) -> Dict[str, Any]:
+        """Coerce complexity to one of the values the Project model accepts"""
+        # CRITICAL FIX: Ensure complexity is one of the valid values
+        complexity = str(entities.get('complexity') or 'moderate').lower()
+        
+        # Map any "medium" to "moderate"
+        if complexity == 'medium':
+            complexity = 'moderate'
+            print(f"⚠️ Mapped 'medium' to 'moderate'")
+        
+        # Validate complexity
+        if complexity not in COMPLEXITY_LEVELS:
+            print(f"⚠️ Invalid complexity '{complexity}', defaulting to 'moderate'")
+            complexity = 'moderate'
+        
+        entities['complexity'] = complexity
+        return entities
+    
+    async def extract_entities_batch(self, texts: List[str], bypass_cache: bool = False) -> List[Dict[str, Any]]:
+        """Extract entities for several documents with as few Gemini calls as possible.
+        
+        Documents are condensed and packed into batch requests under the
+        prompt's token budget; batches run in parallel. Returns one entity set
+        per input text, in order. Documents without text (unsupported types,
+        failed parses) are not sent and get the default entities. Documents a
+        batch response leaves out are retried with the single-document extraction.
+        """
+        entity_sets = [self._get_default_entities() for _ in texts]
+        with_text = [i for i, text in enumerate(texts) if text and text.strip()]
+        if len(with_text) < len(texts):
+            print(f"⚠️ Skipping entity extraction for {len(texts) - len(with_text)} document(s) without text")
+        if not with_text:
+            return entity_sets
+        if len(with_text) == 1:
+            entity_sets[with_text[0]] = await self.extract_entities(texts[with_text[0]], bypass_cache=bypass_cache)
+            return entity_sets
+        
+        documents = [(f"doc-{n + 1}", condense_text(texts[i], MAX_DOCUMENT_TOKENS)) for n, i in enumerate(with_text)]
+        batches = pack_documents(documents, BATCH_DOCUMENT_TOKENS, MAX_DOCUMENTS_PER_BATCH)
+        print(f"📦 Extracting entities for {len(documents)} documents in {len(batches)} batch request(s)")
+        
+        results = await asyncio.gather(*[self._extract_batch(batch, bypass_cache) for batch in batches])
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for batch_result in results:
+            by_id.update(batch_result)
+        
+        missing = [n for n, (doc_id, _) in enumerate(documents) if doc_id not in by_id]
+        if missing:
+            print(f"⚠️ {len(missing)} document(s) missing from batch responses, extracting individually")
+            retried = await asyncio.gather(*[
+                self.extract_entities(texts[with_text[n]], bypass_cache=bypass_cache) for n in missing
+            ])
+            for n, entities in zip(missing, retried):
+                by_id[documents[n][0]] = entities
+        
+        for n, (doc_id, _) in enumerate(documents):
+            entity_sets[with_text[n]] = by_id[doc_id]
+        return entity_sets
+    
+    async def _extract_batch(self, batch: List[Tuple[str, str]], bypass_cache: bool) -> Dict[str, Dict[str, Any]]:
+        """One batch request; returns entities by doc_id (empty on failure)"""
+        try:
+            prompt = prompt_registry.render(
+                "entity_extraction_batch",
+                schema=encode_schema(ENTITY_BATCH_SCHEMA),
+                documents="\n\n".join(f"=== doc_id: {doc_id} ===\n{text}" for doc_id, text in batch)
+            )
+            response_text = await llm_gateway.generate(
+                prompt,
+                task="entity_extraction_batch",
+                bypass_cache=bypass_cache
+            )
+            parsed = parse_llm_json(response_text.strip())
+            entries = parsed.get('documents', []) if isinstance(parsed, dict) else []
+            entries = [entry for entry in entries if isinstance(entry, dict) and isinstance(entry.get('entities'), dict)]
+        except Exception as e:
+            print(f"❌ Batch entity extraction error: {e}")
+            return {}
+        
+        batch_ids = [doc_id for doc_id, _ in batch]
+        returned_ids = [str(entry.get('doc_id', '')).strip() for entry in entries]
+        if set(returned_ids) & set(batch_ids):
+            pairs = zip(returned_ids, entries)
+        elif len(entries) == len(batch):
+            # Model renamed the ids but kept the order
+            pairs = zip(batch_ids, entries)
+        else:
+            pairs = []
+        
+        return {
+            doc_id: self._normalize_entities(entry['entities'])
+            for doc_id, entry in pairs
+            if doc_id in batch_ids
+        }
+    
+    def merge_entities(self, entity_sets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-document entities into one project-level view.
+        
+        List fields are unioned (case-insensitive, first spelling wins),
+        complexity takes the highest level found and the other text fields the
+        value most documents agree on.
+        """
+        if not entity_sets:
+            return self._get_default_entities()
+        
+        merged = self._get_default_entities()
+        for field, default in merged.items():
+            values = [entities.get(field) for entities in entity_sets]
+            if isinstance(default, list):
+                seen = set()
+                items = []
+                for value in values:
+                    for item in value if isinstance(value, list) else []:
+                        key = str(item).strip().lower()
+                        if key and key not in seen:
+                            seen.add(key)
+                            items.append(item)
+                merged[field] = items
+            elif field == 'complexity':
+                levels = [v for v in values if v in COMPLEXITY_LEVELS]
+                merged[field] = max(levels, key=COMPLEXITY_LEVELS.index) if levels else default
+            else:
+                specified = [str(v).strip() for v in values if v and str(v).strip() not in ('', 'Not specified', 'General')]
+                if specified:
+                    merged[field] = Counter(specified).most_common(1)[0][0]
+        return merged
+    
     def _get_default_entities(self) -> Dict[str, Any]:
         """Return default entity structure"""
         return {
@@ -200,10 +273,74 @@ Return this exact structure:
             
             # Return defaults on error
             return {
-                'parsed_text': {'raw_text': '', 'word_count': 0, 'char_count': 0},
+                'parsed_text': {'raw_text': '', 'pages': [], 'word_count': 0, 'char_count': 0},
                 'entities': self._get_default_entities(),
                 'extraction_confidence': 'low'
             }
 
+    async def parse_and_extract_many(self, files: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """Parse several (file_path, file_type) documents and extract their entities in batches"""
+        parsed = []
+        for file_path, file_type in files:
+            try:
+                parsed.append(await self.parse_document(file_path, file_type))
+            except Exception as e:
+                print(f"❌ Parse error for {file_path}: {e}")
+                parsed.append({'raw_text': '', 'pages': [], 'word_count': 0, 'char_count': 0})
+        
+        entity_sets = await self.extract_entities_batch([p['raw_text'] for p in parsed])
+        # Documents without text only carry defaults - leave them out of the project view
+        extracted = [entities for p, entities in zip(parsed, entity_sets) if p['raw_text'] and p['raw_text'].strip()]
+        
+        return {
+            'documents': [
+                {
+                    'parsed_text': parsed_data,
+                    'entities': entities,
+                    'extraction_confidence': 'high' if parsed_data['word_count'] > 100 else 'low'
+                }
+                for parsed_data, entities in zip(parsed, entity_sets)
+            ],
+            'entities': self.merge_entities(extracted)
+        }
+
+
+def condense_text(text: str, max_tokens: int) -> str:
+    """Shrink a document for extraction: collapse whitespace, drop repeated lines
+    (page headers and footers) and cut to max_tokens"""
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line or line.lower() in seen:
+            continue
+        seen.add(line.lower())
+        lines.append(line)
+    condensed = "\n".join(lines)
+    
+    if count_tokens(condensed) > max_tokens:
+        condensed = condensed[:max_tokens * 4]
+        while condensed and count_tokens(condensed) > max_tokens:
+            condensed = condensed[:int(len(condensed) * 0.9)]
+    return condensed
+
+
+def pack_documents(documents: List[Tuple[str, str]], token_budget: int, max_per_batch: int) -> List[List[Tuple[str, str]]]:
+    """Greedily pack (doc_id, text) pairs into batches under a token budget"""
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    used = 0
+    for doc_id, text in documents:
+        tokens = count_tokens(text) + 10  # doc_id header
+        if current and (used + tokens > token_budget or len(current) >= max_per_batch):
+            batches.append(current)
+            current, used = [], 0
+        current.append((doc_id, text))
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 # Global instance
 document_parser = DocumentParser()
\ No newline at end of file
@@ -0,0 +1,168 @@
+# backend/app/utils/embedding_backends.py
+from typing import Dict, Any, List, Sequence
+import numpy as np
+from app.config.config import settings
+from app.utils.circuit_breaker import jina_breaker
+from app.utils.http_client import jina_http
+
+JINA_EMBEDDINGS_URL = 'https://api.jina.ai/v1/embeddings'
+
+
+class EmbeddingBackend:
+    """Interface every embedding backend implements; the embedding service is the only caller.
+
+    space names the vector space the backend produces. Vectors from
+    different spaces are never compared or stored together.
+    """
+
+    name = "base"
+    # Remote backends are micro-batched and cached; local ones are cheaper to recompute
+    remote = False
+
+    @property
+    def space(self) -> str:
+        raise NotImplementedError
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "space": self.space}
+
+
+class JinaEmbeddingBackend(EmbeddingBackend):
+    """Jina embeddings API on the pooled HTTP client, through the Jina circuit breaker"""
+
+    name = "jina"
+    remote = True
+
+    @staticmethod
+    def is_configured() -> bool:
+        return bool(settings.JINA_API_KEY) and settings.JINA_API_KEY != "demo-key"
+
+    @property
+    def space(self) -> str:
+        return settings.JINA_MODEL or 'jina-embeddings-v2-base-en'
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await jina_breaker.call(
+            lambda: _post_jina_embeddings(texts, self.space),
+            timeout=settings.JINA_TIMEOUT_SECONDS,
+            retries=settings.PROVIDER_MAX_RETRIES,
+            hedge=settings.EMBEDDING_HEDGING
+        )
+
+
+class HashedNgramEmbeddingBackend(EmbeddingBackend):
+    """Local CPU embeddings from signed feature hashing of character n-grams.
+
+    Text is lowercased with whitespace collapsed; every 3- to 5-byte window is
+    hashed into one of `dimensions` buckets with a hash-derived sign, counts
+    are log-scaled and rows L2-normalized. A whole batch is encoded with a
+    handful of NumPy operations over the concatenated text - no model
+    download, deterministic across processes. The version is part of the
+    space, so a change to the scheme never mixes with stored vectors.
+    """
+
+    name = "local"
+    VERSION = "hashed-ngram-v1"
+
+    def __init__(self, dimensions: int = 512, ngram_sizes: Sequence[int] = (3, 4, 5)):
+        self.dimensions = dimensions
+        self.ngram_sizes = tuple(ngram_sizes)
+        # Polynomial rolling-hash weights per n-gram size (uint64, wrapping)
+        self._weights = {
+            n: np.array([pow(1099511628211, n - 1 - k, 2 ** 64) for k in range(n)], dtype=np.uint64)
+            for n in self.ngram_sizes
+        }
+
+    @property
+    def space(self) -> str:
+        return f"{self.VERSION}-{self.dimensions}"
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embeddings of the texts as a (len(texts), dimensions) float32 array"""
+        count = len(texts)
+        if not count:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+
+        encoded = [(" " + " ".join(text.lower().split()) + " ").encode("utf-8") for text in texts]
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=count)
+        owner = np.repeat(np.arange(count, dtype=np.int64), lengths)
+
+        rows, hashes = [], []
+        for n in self.ngram_sizes:
+            starts = len(data) - n + 1
+            if starts <= 0:
+                continue
+            # Polynomial hash of every n-byte window, as n shifted multiply-adds
+            hashed = np.full(starts, n, dtype=np.uint64)
+            with np.errstate(over="ignore"):
+                for k, weight in enumerate(self._weights[n]):
+                    hashed += data[k:k + starts] * weight
+            # Keep windows that start and end inside the same text
+            valid = owner[:starts] == owner[n - 1:]
+            hashes.append(hashed[valid])
+            rows.append(owner[:starts][valid])
+        matrix = np.zeros(count * self.dimensions, dtype=np.float64)
+        if hashes:
+            hashed = _mix(np.concatenate(hashes))
+            buckets = (hashed % np.uint64(self.dimensions)).astype(np.int64)
+            signs = 1.0 - 2.0 * (hashed >> np.uint64(63)).astype(np.float64)
+            matrix = np.bincount(np.concatenate(rows) * self.dimensions + buckets, weights=signs, minlength=count * self.dimensions)
+
+        matrix = matrix.reshape(count, self.dimensions)
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return (matrix / norms).astype(np.float32)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**super().get_stats(), "dimensions": self.dimensions}
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """64-bit finalizer (MurmurHash3 fmix64) so similar n-grams land in unrelated buckets"""
+    with np.errstate(over="ignore"):
+        values = values ^ (values >> np.uint64(33))
+        values = values * np.uint64(0xff51afd7ed558ccd)
+        values = values ^ (values >> np.uint64(33))
+        values = values * np.uint64(0xc4ceb9fe1a85ec53)
+        return values ^ (values >> np.uint64(33))
+
+
+async def _post_jina_embeddings(texts: List[str], model: str) -> List[List[float]]:
+    """One Jina embeddings request on the pooled async client"""
+    headers = {
+        'Authorization': f'Bearer {settings.JINA_API_KEY}',
+        'Content-Type': 'application/json'
+    }
+
+    data = {
+        'input': texts,
+        'model': model
+    }
+
+    response = await jina_http.post(JINA_EMBEDDINGS_URL, json=data, headers=headers)
+
+    if response.status_code != 200:
+        print(f"⚠️ Jina API error {response.status_code}: {response.text[:200]}")
+        # HTTPStatusError carries the status, so 429/5xx are retried and 4xx are not
+        response.raise_for_status()
+
+    items = sorted(response.json()['data'], key=lambda item: item.get('index', 0))
+    if len(items) != len(texts):
+        raise ValueError(f"Jina returned {len(items)} embeddings for {len(texts)} inputs")
+    print(f"✅ Jina embeddings generated ({len(texts)} texts, {len(items[0]['embedding'])} dimensions)")
+    return [item['embedding'] for item in items]
+
+
+def create_embedding_backend(mode: str) -> EmbeddingBackend:
+    """Build the backend for EMBEDDING_BACKEND: jina, local, or auto (Jina when its key is set)"""
+    if mode == "jina" or (mode == "auto" and JinaEmbeddingBackend.is_configured()):
+        return JinaEmbeddingBackend()
+    return HashedNgramEmbeddingBackend(settings.LOCAL_EMBEDDING_DIMENSIONS)
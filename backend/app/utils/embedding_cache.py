@@ -0,0 +1,206 @@
+# backend/app/utils/embedding_cache.py
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from app.config.config import settings
+from app.utils.metrics import metrics
+
+
+class EmbeddingCache:
+    """Content-addressed cache of embedding vectors.
+
+    Keys are (model, SHA-256 of the normalized text), so a vector is only
+    ever reused for the model that produced it. Vectors are stored as packed
+    float32 in SQLite behind a bounded in-memory LRU. When the embedding
+    model changes, rows of other models are dropped on the next start.
+    """
+
+    def __init__(self,
+                 max_entries: int = 5000,
+                 db_path: Optional[str] = None,
+                 max_disk_entries: int = 200000,
+                 enabled: bool = True):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.enabled = enabled
+        self._memory: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_model: Optional[str] = None
+        self._db_lock = threading.Lock()
+        self._writes_since_trim = 0
+        self._trim_interval = max(1, min(1000, max_disk_entries // 20))
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "invalidated": 0,
+            "trimmed": 0
+        }
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """SHA-256 of the text with Unicode and whitespace normalized"""
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Cached vectors for the texts that have one, keyed by text"""
+        if not self.enabled or not texts:
+            return {}
+        found: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for text in texts:
+            digest = self.text_hash(text)
+            vector = self._memory.get((model, digest))
+            if vector is not None:
+                self._memory.move_to_end((model, digest))
+                found[text] = vector
+                self.stats["memory_hits"] += 1
+            else:
+                missing[digest] = text
+
+        if missing:
+            rows = await asyncio.to_thread(self._disk_get, model, list(missing))
+            for digest, vector in rows.items():
+                self._remember(model, digest, vector)
+                found[missing[digest]] = vector
+            self.stats["disk_hits"] += len(rows)
+            self.stats["misses"] += len(missing) - len(rows)
+        return found
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        return (await self.get_many(model, [text])).get(text)
+
+    async def set_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Store vectors keyed by their text; empty vectors (failed calls) are skipped"""
+        if not self.enabled:
+            return
+        rows = []
+        for text, vector in vectors.items():
+            if vector:
+                digest = self.text_hash(text)
+                self._remember(model, digest, vector)
+                rows.append((digest, vector))
+        if rows:
+            await asyncio.to_thread(self._disk_set, model, rows)
+            self.stats["writes"] += len(rows)
+
+    def _remember(self, model: str, digest: str, vector: List[float]) -> None:
+        self._memory[(model, digest)] = vector
+        self._memory.move_to_end((model, digest))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_conn(self, model: str) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache ("
+                "model TEXT, text_hash TEXT, dimensions INTEGER, vector BLOB, created_at REAL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embedding_cache_created ON embedding_cache (created_at)")
+            self._trim(self._conn)
+        if model != self._conn_model:
+            # Vectors of another model live in a different space - never reuse them
+            deleted = self._conn.execute("DELETE FROM embedding_cache WHERE model != ?", (model,)).rowcount
+            self._conn.commit()
+            if deleted:
+                self.stats["invalidated"] += deleted
+                print(f"🧹 Embedding model is now {model}, dropped {deleted} cached vectors of other models")
+            self._conn_model = model
+        return self._conn
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """Keep the newest rows within the disk bound"""
+        trimmed = conn.execute(
+            "DELETE FROM embedding_cache WHERE rowid IN ("
+            "SELECT rowid FROM embedding_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        ).rowcount
+        conn.commit()
+        self._writes_since_trim = 0
+        if trimmed:
+            self.stats["trimmed"] += trimmed
+
+    def _disk_get(self, model: str, digests: List[str]) -> Dict[str, List[float]]:
+        try:
+            with self._db_lock:
+                conn = self._get_conn(model)
+                if conn is None:
+                    return {}
+                found = {}
+                # SQLite caps bound parameters per statement
+                for i in range(0, len(digests), 500):
+                    chunk = digests[i:i + 500]
+                    rows = conn.execute(
+                        f"SELECT text_hash, vector FROM embedding_cache WHERE model = ? AND text_hash IN ({','.join('?' * len(chunk))})",
+                        (model, *chunk)
+                    ).fetchall()
+                    for digest, blob in rows:
+                        found[digest] = array("f", blob).tolist()
+                return found
+        except Exception as e:
+            print(f"⚠️ Embedding cache read error (non-critical): {e}")
+            return {}
+
+    def _disk_set(self, model: str, rows: List[tuple]) -> None:
+        try:
+            with self._db_lock:
+                conn = self._get_conn(model)
+                if conn is None:
+                    return
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embedding_cache (model, text_hash, dimensions, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(model, digest, len(vector), array("f", vector).tobytes(), now) for digest, vector in rows]
+                )
+                conn.commit()
+                # Trim again once enough rows were written to matter (a small
+                # fraction of the bound), not on every write
+                self._writes_since_trim += len(rows)
+                if self._writes_since_trim >= self._trim_interval:
+                    self._trim(conn)
+        except Exception as e:
+            print(f"⚠️ Embedding cache write error (non-critical): {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "enabled": self.enabled
+        }
+
+
+# Global instance
+embedding_cache = EmbeddingCache(
+    max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    db_path=settings.EMBEDDING_CACHE_PATH,
+    max_disk_entries=settings.EMBEDDING_CACHE_MAX_DISK_ENTRIES,
+    enabled=settings.EMBEDDING_CACHE_ENABLED
+)
+metrics.callback(
+    "embedding_cache_lookups_total", "Embedding cache lookups by result", "counter",
+    lambda: {
+        ("memory_hit",): embedding_cache.stats["memory_hits"],
+        ("disk_hit",): embedding_cache.stats["disk_hits"],
+        ("miss",): embedding_cache.stats["misses"]
+    },
+    ["result"]
+)
@@ -0,0 +1,182 @@
+# backend/app/utils/embedding_service.py
+import asyncio
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
+from app.config.config import settings
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.embedding_backends import (
+    EmbeddingBackend, JinaEmbeddingBackend, HashedNgramEmbeddingBackend, create_embedding_backend
+)
+from app.utils.embedding_cache import embedding_cache
+from app.utils.metrics import metrics, embedding_request_duration, embedding_requests, embedding_batch_size
+from app.utils.single_flight import embedding_flight
+
+# Jina has token limits per input
+MAX_TEXT_CHARS = 5000
+
+
+class EmbeddingService:
+    """Single entry point for embeddings, in front of the configured backend.
+
+    With a remote backend (Jina), embed() callers are queued for at most
+    max_wait_ms (or until max_batch_size texts are waiting) and sent as one
+    request; the vectors are then fanned back out. embed_many() sends bulk
+    ingestion straight away in full batches. Texts already in the embedding
+    cache are not sent at all. Failures give [] per text, and callers that
+    must have a vector use embed_local() in the local backend's space.
+    The local backend encodes in process and needs no batching or cache.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, max_batch_size: int = 64, max_wait_ms: float = 5,
+                 local_dimensions: int = 512):
+        self.backend = backend
+        self.local = backend if isinstance(backend, HashedNgramEmbeddingBackend) else HashedNgramEmbeddingBackend(local_dimensions)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.stats = {"texts": 0, "batches": 0, "largest_batch": 0, "local_texts": 0}
+        print(f"🧮 Embedding backend: {backend.name} ({backend.space})")
+
+    @property
+    def space(self) -> str:
+        """Vector space of embed()/embed_many() results - vectors of different spaces never mix"""
+        return self.backend.space
+
+    def is_configured(self) -> bool:
+        return not isinstance(self.backend, JinaEmbeddingBackend) or self.backend.is_configured()
+
+    async def embed(self, text: str) -> List[float]:
+        """Embedding of one text, sent together with other concurrent requests"""
+        text = text[:MAX_TEXT_CHARS]
+        if not self.backend.remote:
+            return self._encode_local([text])[0]
+        if not self.is_configured():
+            print("⚠️ Jina API key not configured, skipping embeddings")
+            embedding_requests.inc(provider=self.backend.name, outcome="skipped")
+            return []
+
+        space = self.space
+        # Concurrent requests for the same text share one lookup and queue slot
+        key = hashlib.sha256(f"{space}:{text}".encode("utf-8")).hexdigest()
+        return await embedding_flight.do(key, lambda: self._embed_uncached(text, space))
+
+    async def _embed_uncached(self, text: str, space: str) -> List[float]:
+        cached = await embedding_cache.get(space, text)
+        if cached is not None:
+            return cached
+        vector = await self._enqueue(text)
+        await embedding_cache.set_many(space, {text: vector})
+        return vector
+
+    async def embed_many(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for many texts (bulk ingestion), in input order.
+
+        Duplicates are embedded once; batches of max_batch_size run
+        concurrently within the HTTP client's concurrency limit.
+        """
+        if not texts:
+            return []
+        if not self.backend.remote:
+            return await self.embed_local(texts)
+        if not self.is_configured():
+            embedding_requests.inc(provider=self.backend.name, outcome="skipped")
+            return [[] for _ in texts]
+
+        space = self.space
+        unique = list(dict.fromkeys(text[:MAX_TEXT_CHARS] for text in texts))
+        vectors = await embedding_cache.get_many(space, unique)
+        missing = [text for text in unique if text not in vectors]
+        batches = [missing[i:i + self.max_batch_size] for i in range(0, len(missing), self.max_batch_size)]
+        results = await asyncio.gather(*[self._fetch(batch) for batch in batches])
+        fetched = {text: vector for batch, batch_vectors in zip(batches, results) for text, vector in zip(batch, batch_vectors)}
+        await embedding_cache.set_many(space, fetched)
+        vectors.update(fetched)
+        return [vectors[text[:MAX_TEXT_CHARS]] for text in texts]
+
+    async def embed_local(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings in the local backend's space (self.local.space), never empty"""
+        texts = [text[:MAX_TEXT_CHARS] for text in texts]
+        if len(texts) <= self.max_batch_size:
+            return self._encode_local(texts)
+        # Large batches are CPU work - keep them off the event loop
+        return await asyncio.to_thread(self._encode_local, texts)
+
+    def _encode_local(self, texts: List[str]) -> List[List[float]]:
+        self.stats["local_texts"] += len(texts)
+        embedding_batch_size.observe(len(texts), provider=self.local.name)
+        with embedding_request_duration.time(provider=self.local.name):
+            vectors = self.local.encode(texts).tolist()
+        embedding_requests.inc(provider=self.local.name, outcome="success")
+        return vectors
+
+    def _enqueue(self, text: str) -> "asyncio.Future":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        vectors = [[] for _ in batch]
+        try:
+            vectors = await self._fetch([text for text, _ in batch])
+        finally:
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def _fetch(self, texts: List[str]) -> List[List[float]]:
+        """One remote request for a batch of texts, [] per text on failure"""
+        provider = self.backend.name
+        self.stats["texts"] += len(texts)
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(texts))
+        embedding_batch_size.observe(len(texts), provider=provider)
+        try:
+            with embedding_request_duration.time(provider=provider):
+                vectors = await self.backend.embed_batch(texts)
+            embedding_requests.inc(provider=provider, outcome="success")
+            return vectors
+        except CircuitOpenError as e:
+            print(f"⚡ Skipping Jina embeddings, {e}")
+            embedding_requests.inc(provider=provider, outcome="rejected")
+        except Exception as e:
+            print(f"⚠️ Jina embeddings error (non-critical): {e!r}")
+            embedding_requests.inc(provider=provider, outcome="error")
+        return [[] for _ in texts]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "backend": self.backend.get_stats(),
+            "local_space": self.local.space,
+            "avg_batch": round(self.stats["texts"] / self.stats["batches"], 1) if self.stats["batches"] else 0,
+            "pending": len(self._pending),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms
+        }
+
+
+# Global instance
+embedding_service = EmbeddingService(
+    create_embedding_backend(settings.EMBEDDING_BACKEND),
+    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+    local_dimensions=settings.LOCAL_EMBEDDING_DIMENSIONS
+)
+metrics.callback(
+    "embedding_queue_pending", "Texts waiting to be sent in the next embedding batch", "gauge",
+    lambda: {(): len(embedding_service._pending)}
+)
@@ -1,22 +1,25 @@
 # backend/app/utils/enhanced_ai_engine.py - COMPLETE FIX
-import google.generativeai as genai
+import asyncio
+import difflib
 import json
-import re
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
 from app.config.config import settings
 from app.utils.rag_engine import rag_engine
+from app.utils.llm_gateway import llm_gateway
+from app.utils.model_router import model_router
+from app.utils.json_parser import IncrementalJSONParser, parse_llm_json
+from app.utils.prompt_registry import prompt_registry, encode_schema, section_schema, SCOPE_SCHEMA, SCOPE_SECTION_GROUPS
+from app.utils.semantic_cache import semantic_scope_cache, normalize_project, rename_project, SemanticMatch
 
-# Configure Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
+# Derived during the sectioned merge instead of generated
+DERIVED_SECTIONS = ("cost_breakdown", "dependencies")
+# Rewritten when a near-duplicate project's scope is adapted
+ADAPTED_SECTIONS = SCOPE_SECTION_GROUPS["scope_overview"]
 
 class EnhancedAIEngine:
     def __init__(self):
-        model_name = settings.GEMINI_MODEL or "gemini-1.5-flash"
-        if model_name.startswith("models/"):
-            model_name = model_name.replace("models/", "")
-        
-        print(f"🤖 Initializing EnhancedAIEngine with model: {model_name}")
-        self.model = genai.GenerativeModel(model_name)
+        self.model_name = model_router.model_for("scope_generation")
+        print(f"🤖 Initializing EnhancedAIEngine with model: {self.model_name}")
         print(f"✅ EnhancedAIEngine initialized successfully")
     
     async def analyze_project_with_rag(self, project_data: Dict[str, Any], uploaded_content: Optional[str] = None) -> Dict[str, Any]:
@@ -48,384 +51,349 @@ class EnhancedAIEngine:
     async def generate_scope_with_rag(self, 
                                     project_data: Dict[str, Any], 
                                     answered_questions: List[Dict[str, Any]] = None,
-                                    similar_projects: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+                                    similar_projects: List[Dict[str, Any]] = None,
+                                    bypass_cache: bool = False,
+                                    mode: Optional[str] = None) -> Dict[str, Any]:
         """Generate COMPLETE scope with ALL resources"""
+        # Answers to clarifying questions make a project unlike its near-duplicates
+        embedding = await semantic_scope_cache.embed(project_data) if not answered_questions else []
+        if embedding and not bypass_cache:
+            match = semantic_scope_cache.lookup(project_data, embedding)
+            if match:
+                scope = await self._reuse_scope(match, project_data)
+                if scope:
+                    return scope
+        
+        if (mode or settings.SCOPE_GENERATION_MODE) == "sectioned":
+            scope, complete = await self._generate_scope_sectioned(project_data, answered_questions, similar_projects, bypass_cache)
+        else:
+            scope, complete = await self._generate_scope_single(project_data, answered_questions, similar_projects, bypass_cache)
+        
+        if embedding and complete:
+            semantic_scope_cache.store(project_data, scope, embedding)
+        return scope
+    
+    async def _reuse_scope(self, match: SemanticMatch, project_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Scope of a near-duplicate project, adapted when not close enough to use as is.
+
+        None when adapting fails - the caller then generates from scratch.
+        """
+        scope = rename_project(match.scope, match.source_project.get('name'), project_data.get('name'))
+        if match.mode == "direct":
+            return scope
+        
+        try:
+            prompt = prompt_registry.render(
+                "scope_adapt",
+                source_project=self._describe_project(match.source_project),
+                context=self._describe_project(project_data),
+                sections=json.dumps({name: scope.get(name) for name in ADAPTED_SECTIONS}, ensure_ascii=False),
+                schema=encode_schema(section_schema("scope_overview"))
+            )
+            data = parse_llm_json(await llm_gateway.generate(prompt, task="scope_adapt"))
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+        except Exception as e:
+            print(f"❌ Adapting similar scope failed (generating from scratch): {e}")
+            semantic_scope_cache.record_adapt_failure()
+            return None
+        
+        for name in ADAPTED_SECTIONS:
+            if name in scope and isinstance(data.get(name), type(scope[name])) and data[name]:
+                scope[name] = data[name]
+        print(f"✅ Adapted scope from '{match.source_project.get('name')}' (similarity {match.similarity})")
+        return scope
+    
+    def _describe_project(self, project_data: Dict[str, Any]) -> str:
+        """Project name and normalized description for the adapt prompt"""
+        return f"name: {project_data.get('name')}\n{normalize_project(project_data)}"
+    
+    async def _generate_scope_single(self,
+                                     project_data: Dict[str, Any],
+                                     answered_questions: Optional[List[Dict[str, Any]]],
+                                     similar_projects: Optional[List[Dict[str, Any]]],
+                                     bypass_cache: bool) -> Tuple[Dict[str, Any], bool]:
+        """One scope generation call; returns the scope and whether it was generated (not the fallback)"""
         try:
             print(f"🎯 Generating COMPLETE scope for: {project_data.get('name')}")
             
-            context = self._build_scope_context(project_data, answered_questions or [], similar_projects or [])
-            
-            # Use detailed prompt to ensure all resources are generated
-            prompt = f"""
-You are an expert project manager. Generate a COMPREHENSIVE project scope with COMPLETE team composition.
-
-{context}
-
-CRITICAL REQUIREMENTS:
-1. Include AT LEAST 7-10 different roles in resources
-2. Each role must have realistic count, effort, and rates
-3. Generate detailed activities for each phase
-4. Create complete timeline with milestones
-5. Return ONLY valid JSON
-
-Generate this EXACT structure with ALL fields populated:
-
-{{
-  "overview": {{
-    "project_summary": "Detailed 3-4 sentence project description",
-    "key_objectives": ["Objective 1", "Objective 2", "Objective 3", "Objective 4"],
-    "success_metrics": ["Metric 1", "Metric 2", "Metric 3"],
-    "deliverables": ["Deliverable 1", "Deliverable 2", "Deliverable 3"]
-  }},
-  "timeline": {{
-    "total_duration_months": 6,
-    "total_duration_weeks": 24,
-    "phases": [
-      {{
-        "phase_name": "Planning & Requirements",
-        "duration_weeks": 4,
-        "start_week": 1,
-        "end_week": 4,
-        "milestones": ["Requirements finalized", "Architecture approved"],
-        "activities": ["Requirements gathering", "Stakeholder interviews"]
-      }},
-      {{
-        "phase_name": "Design & Architecture",
-        "duration_weeks": 4,
-        "start_week": 5,
-        "end_week": 8,
-        "milestones": ["Design complete", "Prototype ready"],
-        "activities": ["UI/UX design", "System architecture"]
-      }},
-      {{
-        "phase_name": "Development",
-        "duration_weeks": 10,
-        "start_week": 9,
-        "end_week": 18,
-        "milestones": ["Core features complete", "Integration done"],
-        "activities": ["Frontend development", "Backend development", "API development"]
-      }},
-      {{
-        "phase_name": "Testing & QA",
-        "duration_weeks": 4,
-        "start_week": 19,
-        "end_week": 22,
-        "milestones": ["All tests passed", "UAT complete"],
-        "activities": ["Unit testing", "Integration testing", "User acceptance testing"]
-      }},
-      {{
-        "phase_name": "Deployment & Launch",
-        "duration_weeks": 2,
-        "start_week": 23,
-        "end_week": 24,
-        "milestones": ["Production deployment", "Project handover"],
-        "activities": ["Production setup", "Training", "Documentation"]
-      }}
-    ]
-  }},
-  "activities": [
-    {{
-      "name": "Requirements Analysis",
-      "phase": "Planning & Requirements",
-      "effort_days": 12,
-      "dependencies": [],
-      "resources_needed": ["Business Analyst", "Project Manager"]
-    }},
-    {{
-      "name": "System Architecture Design",
-      "phase": "Design & Architecture",
-      "effort_days": 15,
-      "dependencies": ["Requirements Analysis"],
-      "resources_needed": ["Solution Architect", "Technical Lead"]
-    }},
-    {{
-      "name": "UI/UX Design",
-      "phase": "Design & Architecture",
-      "effort_days": 18,
-      "dependencies": ["Requirements Analysis"],
-      "resources_needed": ["UI/UX Designer"]
-    }},
-    {{
-      "name": "Database Design",
-      "phase": "Design & Architecture",
-      "effort_days": 10,
-      "dependencies": ["System Architecture Design"],
-      "resources_needed": ["Database Architect", "Backend Developer"]
-    }},
-    {{
-      "name": "Frontend Development",
-      "phase": "Development",
-      "effort_days": 45,
-      "dependencies": ["UI/UX Design"],
-      "resources_needed": ["Frontend Developer"]
-    }},
-    {{
-      "name": "Backend API Development",
-      "phase": "Development",
-      "effort_days": 50,
-      "dependencies": ["Database Design"],
-      "resources_needed": ["Backend Developer"]
-    }},
-    {{
-      "name": "Third-party Integration",
-      "phase": "Development",
-      "effort_days": 20,
-      "dependencies": ["Backend API Development"],
-      "resources_needed": ["Integration Developer"]
-    }},
-    {{
-      "name": "Unit Testing",
-      "phase": "Testing & QA",
-      "effort_days": 15,
-      "dependencies": ["Frontend Development", "Backend API Development"],
-      "resources_needed": ["QA Engineer", "Developers"]
-    }},
-    {{
-      "name": "Integration Testing",
-      "phase": "Testing & QA",
-      "effort_days": 12,
-      "dependencies": ["Unit Testing"],
-      "resources_needed": ["QA Engineer"]
-    }},
-    {{
-      "name": "Security Testing",
-      "phase": "Testing & QA",
-      "effort_days": 8,
-      "dependencies": ["Integration Testing"],
-      "resources_needed": ["Security Engineer", "QA Engineer"]
-    }},
-    {{
-      "name": "User Acceptance Testing",
-      "phase": "Testing & QA",
-      "effort_days": 10,
-      "dependencies": ["Security Testing"],
-      "resources_needed": ["Business Analyst", "QA Engineer"]
-    }},
-    {{
-      "name": "Production Deployment",
-      "phase": "Deployment & Launch",
-      "effort_days": 5,
-      "dependencies": ["User Acceptance Testing"],
-      "resources_needed": ["DevOps Engineer", "Technical Lead"]
-    }},
-    {{
-      "name": "User Training",
-      "phase": "Deployment & Launch",
-      "effort_days": 6,
-      "dependencies": ["Production Deployment"],
-      "resources_needed": ["Business Analyst", "Technical Writer"]
-    }}
-  ],
-  "resources": [
-    {{
-      "role": "Project Manager",
-      "count": 1,
-      "effort_months": 6,
-      "allocation_percentage": 100,
-      "monthly_rate": 10000,
-      "total_cost": 60000
-    }},
-    {{
-      "role": "Business Analyst",
-      "count": 1,
-      "effort_months": 5,
-      "allocation_percentage": 80,
-      "monthly_rate": 8000,
-      "total_cost": 40000
-    }},
-    {{
-      "role": "Solution Architect",
-      "count": 1,
-      "effort_months": 3,
-      "allocation_percentage": 60,
-      "monthly_rate": 12000,
-      "total_cost": 36000
-    }},
-    {{
-      "role": "UI/UX Designer",
-      "count": 1,
-      "effort_months": 3,
-      "allocation_percentage": 100,
-      "monthly_rate": 7000,
-      "total_cost": 21000
-    }},
-    {{
-      "role": "Frontend Developer",
-      "count": 2,
-      "effort_months": 4,
-      "allocation_percentage": 100,
-      "monthly_rate": 8000,
-      "total_cost": 64000
-    }},
-    {{
-      "role": "Backend Developer",
-      "count": 3,
-      "effort_months": 4.5,
-      "allocation_percentage": 100,
-      "monthly_rate": 8500,
-      "total_cost": 114750
-    }},
-    {{
-      "role": "QA Engineer",
-      "count": 2,
-      "effort_months": 3.5,
-      "allocation_percentage": 100,
-      "monthly_rate": 7000,
-      "total_cost": 49000
-    }},
-    {{
-      "role": "DevOps Engineer",
-      "count": 1,
-      "effort_months": 2,
-      "allocation_percentage": 50,
-      "monthly_rate": 9000,
-      "total_cost": 9000
-    }},
-    {{
-      "role": "Security Engineer",
-      "count": 1,
-      "effort_months": 1.5,
-      "allocation_percentage": 50,
-      "monthly_rate": 10000,
-      "total_cost": 7500
-    }},
-    {{
-      "role": "Technical Writer",
-      "count": 1,
-      "effort_months": 1,
-      "allocation_percentage": 100,
-      "monthly_rate": 6000,
-      "total_cost": 6000
-    }}
-  ],
-  "architecture": {{
-    "description": "Modern scalable architecture with microservices",
-    "components": [
-      {{
-        "name": "Frontend Layer",
-        "technology": "React/Next.js",
-        "description": "Responsive web application with modern UI"
-      }},
-      {{
-        "name": "API Gateway",
-        "technology": "Kong/AWS API Gateway",
-        "description": "API management and routing"
-      }},
-      {{
-        "name": "Backend Services",
-        "technology": "Node.js/Python FastAPI",
-        "description": "RESTful microservices"
-      }},
-      {{
-        "name": "Database Layer",
-        "technology": "PostgreSQL/MongoDB",
-        "description": "Data persistence and caching"
-      }},
-      {{
-        "name": "Authentication",
-        "technology": "OAuth 2.0/JWT",
-        "description": "Secure user authentication"
-      }}
-    ]
-  }},
-  "cost_breakdown": {{
-    "total_cost": 407250,
-    "subtotal": 407250,
-    "contingency_percentage": 15,
-    "contingency_amount": 61087.5,
-    "discount_applied": 0
-  }},
-  "risks": [
-    {{
-      "risk": "Scope creep during development",
-      "severity": "High",
-      "probability": "Medium",
-      "impact": "High",
-      "mitigation": "Implement strict change management process with regular stakeholder reviews",
-      "category": "Project Management",
-      "owner": "Project Manager"
-    }},
-    {{
-      "risk": "Third-party API integration delays",
-      "severity": "Medium",
-      "probability": "Medium",
-      "impact": "Medium",
-      "mitigation": "Early API testing, sandbox environments, and fallback integration plans",
-      "category": "Technical",
-      "owner": "Technical Lead"
-    }},
-    {{
-      "risk": "Resource availability issues",
-      "severity": "Medium",
-      "probability": "Low",
-      "impact": "High",
-      "mitigation": "Maintain backup resource pool and implement cross-training programs",
-      "category": "Resource Management",
-      "owner": "Project Manager"
-    }},
-    {{
-      "risk": "Security vulnerabilities",
-      "severity": "High",
-      "probability": "Low",
-      "impact": "Critical",
-      "mitigation": "Regular security audits, penetration testing, and secure coding practices",
-      "category": "Security",
-      "owner": "Security Engineer"
-    }},
-    {{
-      "risk": "Performance bottlenecks",
-      "severity": "Medium",
-      "probability": "Medium",
-      "impact": "Medium",
-      "mitigation": "Load testing throughout development and scalable architecture design",
-      "category": "Technical",
-      "owner": "Solution Architect"
-    }}
-  ],
-  "assumptions": [
-    "Client will provide timely feedback and approvals within 3 business days",
-    "All required resources will be available as per project schedule",
-    "Requirements are stable and major changes will follow formal change management process",
-    "Development environment and necessary tools will be accessible from project start",
-    "Third-party services and APIs will be available and functioning as documented",
-    "Client team will be available for regular meetings and clarifications"
-  ],
-  "dependencies": [
-    {{
-      "activity": "UI/UX Design",
-      "depends_on": ["Requirements Analysis"],
-      "phase": "Design & Architecture"
-    }},
-    {{
-      "activity": "Frontend Development",
-      "depends_on": ["UI/UX Design"],
-      "phase": "Development"
-    }},
-    {{
-      "activity": "Backend API Development",
-      "depends_on": ["Database Design", "System Architecture Design"],
-      "phase": "Development"
-    }}
-  ]
-}}
-
-Return ONLY this JSON. NO markdown, NO explanations.
-"""
+            prompt = self._build_scope_prompt(project_data, answered_questions, similar_projects)
             
             print("📤 Sending COMPLETE scope request to Gemini...")
-            response = self.model.generate_content(prompt)
+            response_text = await llm_gateway.generate(
+                prompt,
+                task="scope_generation",
+                bypass_cache=bypass_cache
+            )
             
-            scope = self._parse_json_response(response.text)
+            scope = parse_llm_json(response_text)
+            if not isinstance(scope, dict):
+                raise ValueError("Expected a JSON object")
+            scope = self._drop_incomplete_rows(scope)
             scope = self._enhance_scope_with_rag_insights(scope, similar_projects)
             
             print(f"✅ COMPLETE scope generated with {len(scope.get('resources', []))} roles")
-            return scope
+            return scope, True
             
         except Exception as e:
             print(f"❌ Scope generation error: {e}")
             import traceback
             traceback.print_exc()
-            return self._get_comprehensive_fallback_scope(project_data)
+            return self._get_comprehensive_fallback_scope(project_data), False
+    
+    async def generate_scope_sectioned(self,
+                                       project_data: Dict[str, Any],
+                                       answered_questions: List[Dict[str, Any]] = None,
+                                       similar_projects: List[Dict[str, Any]] = None,
+                                       bypass_cache: bool = False) -> Dict[str, Any]:
+        """Generate the scope as concurrent section calls merged into the usual shape"""
+        scope, _ = await self._generate_scope_sectioned(project_data, answered_questions, similar_projects, bypass_cache)
+        return scope
+    
+    async def _generate_scope_sectioned(self,
+                                        project_data: Dict[str, Any],
+                                        answered_questions: Optional[List[Dict[str, Any]]],
+                                        similar_projects: Optional[List[Dict[str, Any]]],
+                                        bypass_cache: bool) -> Tuple[Dict[str, Any], bool]:
+        """Sectioned generation; returns the scope and whether no section fell back.
+
+        The plan (timeline and activities), overview and risks are generated at
+        the same time; resources are then staffed from the generated plan and
+        costs computed from the resources. Wall-clock time is the longest
+        chain of calls instead of the sum of every section's output.
+        """
+        print(f"🎯 Generating sectioned scope for: {project_data.get('name')}")
+        context = self._build_scope_context(project_data, answered_questions or [], similar_projects or []).strip()
+        fallback = self._get_comprehensive_fallback_scope(project_data)
+        
+        results = await asyncio.gather(
+            self._generate_plan_and_resources(context, fallback, bypass_cache),
+            self._generate_section("scope_overview", context, bypass_cache),
+            self._generate_section("scope_risks", context, bypass_cache)
+        )
+        sections = {}
+        for result in results:
+            sections.update(result)
+        
+        scope, fell_back = self._merge_scope_sections(sections, fallback)
+        if fell_back:
+            print(f"⚠️ Sections taken from fallback scope: {', '.join(fell_back)}")
+        scope = self._enhance_scope_with_rag_insights(scope, similar_projects)
+        
+        print(f"✅ Sectioned scope generated with {len(scope.get('resources', []))} roles")
+        return scope, not fell_back
+    
+    async def _generate_plan_and_resources(self, context: str, fallback: Dict[str, Any], bypass_cache: bool) -> Dict[str, Any]:
+        """Generate the plan, then staff it - resources depend on the activities"""
+        plan = await self._generate_section("scope_plan", context, bypass_cache)
+        if not isinstance(plan.get("activities"), list) or not plan["activities"]:
+            # Without a plan the fallback resources match the fallback activities
+            return plan
+        
+        timeline = self._validate_timeline(plan.get("timeline")) or fallback["timeline"]
+        resources = await self._generate_section(
+            "scope_resources",
+            context,
+            bypass_cache,
+            plan=self._summarize_plan(timeline, plan["activities"]),
+            duration_weeks=timeline["total_duration_weeks"],
+            duration_months=timeline["total_duration_months"]
+        )
+        return {**plan, **resources}
+    
+    async def _generate_section(self, template: str, context: str, bypass_cache: bool, **values: Any) -> Dict[str, Any]:
+        """Generate one group of scope sections, {} if the call or parse fails"""
+        sections = SCOPE_SECTION_GROUPS[template]
+        
+        try:
+            prompt = prompt_registry.render(template, context=context, schema=encode_schema(section_schema(template)), **values)
+            response_text = await llm_gateway.generate(
+                prompt,
+                task=template,
+                bypass_cache=bypass_cache
+            )
+            data = parse_llm_json(response_text)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            return {name: data[name] for name in sections if name in data}
+        except Exception as e:
+            print(f"❌ Scope section '{template}' failed: {e}")
+            return {}
+    
+    def _summarize_plan(self, timeline: Dict[str, Any], activities: List[Dict[str, Any]]) -> str:
+        """Compact plan description for the resources prompt"""
+        lines = [f"Phase: {p['phase_name']} ({p['duration_weeks']} weeks)" for p in timeline["phases"]]
+        for activity in activities:
+            if isinstance(activity, dict):
+                roles = ", ".join(str(r) for r in activity.get("resources_needed") or [])
+                lines.append(f"- {activity.get('name')} [{activity.get('phase')}] {activity.get('effort_days')}d: {roles}")
+        return "\n".join(lines)
+    
+    def _merge_scope_sections(self, sections: Dict[str, Any], fallback: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        """Combine generated sections into one consistent scope.
+
+        Missing or mistyped sections come from the fallback scope. Phases are
+        made contiguous, activity phases and dependencies are resolved against
+        names that exist, resource costs are recomputed and cost_breakdown and
+        dependencies are derived. Returns the scope and the sections that fell back.
+        """
+        scope: Dict[str, Any] = {}
+        fell_back: List[str] = []
+        for name, default in fallback.items():
+            value = sections.get(name)
+            if name not in DERIVED_SECTIONS and isinstance(value, type(default)) and value:
+                scope[name] = value
+            else:
+                scope[name] = default
+                if name not in DERIVED_SECTIONS:
+                    fell_back.append(name)
+        
+        timeline = self._validate_timeline(scope["timeline"])
+        if not timeline:
+            timeline = fallback["timeline"]
+            fell_back.append("timeline")
+        scope["timeline"] = timeline
+        phase_names = [p["phase_name"] for p in timeline["phases"]]
+        
+        activities = [a for a in scope["activities"] if isinstance(a, dict) and a.get("name")]
+        activity_names = {a["name"] for a in activities}
+        for activity in activities:
+            if activity.get("phase") not in phase_names:
+                activity["phase"] = difflib.get_close_matches(str(activity.get("phase", "")), phase_names, n=1, cutoff=0)[0]
+            activity["effort_days"] = max(1, round(_as_number(activity.get("effort_days"), 5)))
+            dependencies = activity.get("dependencies") if isinstance(activity.get("dependencies"), list) else []
+            activity["dependencies"] = [d for d in dependencies if d in activity_names and d != activity["name"]]
+            if not isinstance(activity.get("resources_needed"), list):
+                activity["resources_needed"] = []
+        scope["activities"] = activities
+        scope["dependencies"] = [
+            {"activity": a["name"], "depends_on": a["dependencies"], "phase": a["phase"]}
+            for a in activities if a["dependencies"]
+        ]
+        
+        default_rates = {r["role"]: r["monthly_rate"] for r in fallback["resources"]}
+        resources = [r for r in scope["resources"] if isinstance(r, dict) and r.get("role")]
+        for resource in resources:
+            resource["count"] = max(1, round(_as_number(resource.get("count"), 1)))
+            resource["effort_months"] = min(
+                max(_as_number(resource.get("effort_months"), 1), 0.5),
+                timeline["total_duration_months"]
+            )
+            resource["allocation_percentage"] = min(max(round(_as_number(resource.get("allocation_percentage"), 100)), 1), 100)
+            resource["monthly_rate"] = _as_number(resource.get("monthly_rate"), default_rates.get(resource["role"], 8000))
+            resource["total_cost"] = round(resource["count"] * resource["effort_months"] * resource["monthly_rate"], 2)
+        scope["resources"] = resources or fallback["resources"]
+        
+        subtotal = round(sum(r["total_cost"] for r in scope["resources"]), 2)
+        contingency_percentage = fallback["cost_breakdown"]["contingency_percentage"]
+        scope["cost_breakdown"] = {
+            "total_cost": subtotal,
+            "subtotal": subtotal,
+            "contingency_percentage": contingency_percentage,
+            "contingency_amount": round(subtotal * contingency_percentage / 100, 2),
+            "discount_applied": 0
+        }
+        return scope, fell_back
+    
+    def _validate_timeline(self, timeline: Any) -> Optional[Dict[str, Any]]:
+        """Make phases contiguous and totals consistent, None if there are no usable phases"""
+        if not isinstance(timeline, dict) or not isinstance(timeline.get("phases"), list):
+            return None
+        phases = [p for p in timeline["phases"] if isinstance(p, dict) and p.get("phase_name")]
+        if not phases:
+            return None
+        
+        week = 1
+        for phase in phases:
+            weeks = max(1, round(_as_number(phase.get("duration_weeks"), 1)))
+            phase.update(duration_weeks=weeks, start_week=week, end_week=week + weeks - 1)
+            phase.setdefault("milestones", [])
+            phase.setdefault("activities", [])
+            week += weeks
+        
+        total_weeks = week - 1
+        return {
+            **timeline,
+            "phases": phases,
+            "total_duration_weeks": total_weeks,
+            "total_duration_months": round(total_weeks / 4, 1)
+        }
+    
+    async def stream_scope_with_rag(self,
+                                    project_data: Dict[str, Any],
+                                    answered_questions: List[Dict[str, Any]] = None,
+                                    similar_projects: List[Dict[str, Any]] = None,
+                                    bypass_cache: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the scope one top-level section at a time.
+
+        Yields {"event": "section", "section": name, "data": value} as soon as
+        each section is complete, then a final {"event": "complete", "scope": scope}.
+        """
+        print(f"🎯 Streaming COMPLETE scope for: {project_data.get('name')}")
+        parser = IncrementalJSONParser()
+        chunks = []
+        
+        try:
+            prompt = self._build_scope_prompt(project_data, answered_questions, similar_projects)
+            
+            print("📤 Streaming COMPLETE scope request from Gemini...")
+            stream = llm_gateway.stream(
+                prompt,
+                task="scope_generation",
+                bypass_cache=bypass_cache
+            )
+            try:
+                # Read to the end even once the object is closed, so the gateway
+                # settles tokens, records latency and caches the response
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    for section, data in parser.feed(chunk):
+                        yield {"event": "section", "section": section, "data": data}
+            finally:
+                # Release the gateway's scheduler slot now if our consumer went away
+                await stream.aclose()
+            
+            if not parser.done:
+                # Cut off at the token limit - continue from the last complete element
+                text = await llm_gateway.resume(prompt, "".join(chunks), task="scope_generation")
+                remaining = parse_llm_json(text)
+                if not isinstance(remaining, dict):
+                    raise ValueError("Expected a JSON object")
+                for section, data in remaining.items():
+                    if section not in parser.sections:
+                        parser.sections[section] = data
+                        yield {"event": "section", "section": section, "data": data}
+            
+            scope = self._drop_incomplete_rows(dict(parser.sections))
+            scope = self._enhance_scope_with_rag_insights(scope, similar_projects)
+            print(f"✅ COMPLETE scope streamed with {len(scope.get('resources', []))} roles")
+            yield {"event": "complete", "scope": scope, "fallback": False}
+            
+        except Exception as e:
+            print(f"❌ Scope streaming error: {e}")
+            # Salvage the complete elements of a truncated final section, then
+            # fill in whatever the stream did not deliver from the fallback scope
+            for section, data in parser.close():
+                yield {"event": "section", "section": section, "data": data}
+            scope = self._get_comprehensive_fallback_scope(project_data)
+            for section, data in scope.items():
+                if section not in parser.sections:
+                    yield {"event": "section", "section": section, "data": data}
+            scope.update(parser.sections)
+            yield {"event": "complete", "scope": scope, "fallback": True}
+    
+    def _build_scope_prompt(self,
+                            project_data: Dict[str, Any],
+                            answered_questions: Optional[List[Dict[str, Any]]],
+                            similar_projects: Optional[List[Dict[str, Any]]]) -> str:
+        """Build the full scope generation prompt"""
+        context = self._build_scope_context(project_data, answered_questions or [], similar_projects or [])
+        # Compact schema instead of a full worked example keeps input tokens low
+        return prompt_registry.render(
+            "scope_generation",
+            context=context.strip(),
+            schema=encode_schema(SCOPE_SCHEMA)
+        )
     
     def _build_search_query(self, project_data: Dict[str, Any], uploaded_content: Optional[str] = None) -> str:
         """Build search query"""
@@ -475,24 +443,12 @@ PROJECT DETAILS:
             }
         }
     
-    def _parse_json_response(self, response_text: str) -> Any:
-        """Parse JSON"""
-        try:
-            text = re.sub(r'```json\s*', '', response_text)
-            text = re.sub(r'```\s*', '', text).strip()
-            
-            start = text.find('{')
-            end = text.rfind('}') + 1
-            
-            if start != -1 and end > start:
-                json_str = text[start:end]
-                return json.loads(json_str)
-            
-            raise ValueError("No JSON found")
-                
-        except Exception as e:
-            print(f"❌ JSON parsing error: {e}")
-            raise
+    def _drop_incomplete_rows(self, scope: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop activities without a name and resources without a role (left by a cut-off response)"""
+        for section, key in (("activities", "name"), ("resources", "role")):
+            if isinstance(scope.get(section), list):
+                scope[section] = [row for row in scope[section] if isinstance(row, dict) and row.get(key)]
+        return scope
     
     def _enhance_scope_with_rag_insights(self, scope: Dict[str, Any], similar_projects: List) -> Dict[str, Any]:
         """Enhance with RAG"""
@@ -630,5 +586,14 @@ PROJECT DETAILS:
             "rag_used": False
         }
 
+def _as_number(value: Any, default: float) -> float:
+    """Coerce an LLM-provided number ("8,000", "$9000", 4) to float"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(str(value).replace(",", "").replace("$", "").strip())
+    except (TypeError, ValueError):
+        return default
+
 # Global instance
 enhanced_ai_engine = EnhancedAIEngine()
\ No newline at end of file
@@ -0,0 +1,113 @@
+# backend/app/utils/http_client.py
+import asyncio
+import importlib.util
+from typing import Dict, Any, Optional
+import httpx
+from app.config.config import settings
+from app.utils.metrics import metrics
+
+
+class PooledHTTPClient:
+    """Process-wide async HTTP client for a provider API.
+
+    One httpx.AsyncClient is shared by every call, so connections (and their
+    TLS sessions) are kept alive and reused instead of opened per request.
+    HTTP/2 is negotiated when the h2 package is installed. Connect and read
+    timeouts are separate, and a semaphore bounds concurrent requests. The
+    client is created on first use and closed in the app lifespan.
+    """
+
+    def __init__(self,
+                 name: str,
+                 max_connections: int = 20,
+                 max_keepalive_connections: int = 10,
+                 max_concurrency: int = 8,
+                 connect_timeout: float = 5,
+                 read_timeout: float = 15,
+                 keepalive_expiry: float = 30):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.stats = {
+            "requests": 0,
+            "timeouts": 0,
+            "connection_errors": 0,
+            "clients_created": 0
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            )
+            self.stats["clients_created"] += 1
+            print(f"🌐 {self.name} HTTP client ready (HTTP/{'2' if self.http2 else '1.1'}, {self.max_connections} connections)")
+        return self._client
+
+    async def post(self, url: str, json: Any, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """POST a JSON body on a pooled connection.
+
+        Transport failures are raised as ConnectionError and timeouts as
+        asyncio.TimeoutError, so the circuit breaker classifies them the same
+        way as for every other provider. Status codes are left to the caller.
+        """
+        async with self._semaphore:
+            self.in_flight += 1
+            self.stats["requests"] += 1
+            try:
+                return await self._get_client().post(url, json=json, headers=headers)
+            except httpx.TimeoutException as e:
+                self.stats["timeouts"] += 1
+                raise asyncio.TimeoutError(f"{self.name} request timed out: {e!r}") from e
+            except httpx.TransportError as e:
+                self.stats["connection_errors"] += 1
+                raise ConnectionError(f"{self.name} connection failed: {e!r}") from e
+            finally:
+                self.in_flight -= 1
+
+    async def aclose(self) -> None:
+        """Close pooled connections (app shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "http2": self.http2,
+            "open": self._client is not None and not self._client.is_closed,
+            "max_connections": self.max_connections,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            **self.stats
+        }
+
+
+# Global instance
+jina_http = PooledHTTPClient(
+    "Jina",
+    max_connections=settings.JINA_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.JINA_MAX_CONNECTIONS,
+    max_concurrency=settings.JINA_MAX_CONCURRENCY,
+    connect_timeout=settings.JINA_CONNECT_TIMEOUT_SECONDS,
+    read_timeout=settings.JINA_TIMEOUT_SECONDS
+)
+metrics.callback(
+    "http_client_in_flight", "Provider HTTP requests currently running", "gauge",
+    lambda: {(jina_http.name,): jina_http.in_flight},
+    ["client"]
+)
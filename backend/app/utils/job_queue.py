@@ -0,0 +1,377 @@
+# backend/app/utils/job_queue.py
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import select, update, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config.config import settings
+from app.config.database import AsyncSessionLocal
+from app.models.project_models import ScopeJob
+from app.utils.llm_scheduler import set_llm_caller, PRIORITY_STANDARD
+from app.utils.metrics import metrics, scope_jobs
+from app.utils.scope_pipeline import run_comprehensive_scope
+from app.utils.speculation import scope_speculator
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+class LeaseLostError(Exception):
+    """The job was reclaimed by another worker (missed heartbeats)"""
+
+
+class ScopeJobQueue:
+    """Durable Postgres-backed queue for comprehensive scope generation.
+
+    Jobs are rows in scope_jobs. A bounded pool of workers claims queued rows
+    with FOR UPDATE SKIP LOCKED, so any number of API processes can run
+    workers against the same table. A running job's heartbeat is refreshed
+    while it works; a job whose heartbeat goes stale (worker crashed or was
+    killed) is claimed again, up to max_attempts. Every write from a worker is
+    fenced on the attempt it claimed, so a worker that lost its lease cannot
+    overwrite the new owner's progress or result.
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 poll_seconds: float = 2,
+                 heartbeat_seconds: float = 10,
+                 stale_seconds: float = 60,
+                 max_attempts: int = 3):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.running = 0
+        self.stats = {
+            "enqueued": 0,
+            "deduplicated": 0,
+            "claimed": 0,
+            "reclaimed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "requeued": 0,
+            "lease_lost": 0
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    async def enqueue(self,
+                      db: AsyncSession,
+                      project_id: Any,
+                      owner_id: Any,
+                      company_id: Any,
+                      payload: Dict[str, Any],
+                      idempotency_key: Optional[str] = None) -> Tuple[ScopeJob, bool]:
+        """Create a job, or return the existing one; returns (job, created).
+
+        With an idempotency key the same key from the same user for the same
+        project always maps to one job. Without one, an active job for the
+        same project is reused so double submissions do not pay for
+        generation twice.
+        """
+        existing = await self._find_existing(db, project_id, owner_id, idempotency_key)
+        if existing:
+            self.stats["deduplicated"] += 1
+            return existing, False
+
+        job = ScopeJob(
+            project_id=project_id,
+            owner_id=owner_id,
+            company_id=company_id,
+            idempotency_key=idempotency_key,
+            status=QUEUED,
+            payload=payload,
+            progress={"stage": QUEUED, "percent": 0},
+            max_attempts=self.max_attempts
+        )
+        db.add(job)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Concurrent request with the same key won the insert
+            await db.rollback()
+            existing = await self._find_existing(db, project_id, owner_id, idempotency_key)
+            if existing:
+                self.stats["deduplicated"] += 1
+                return existing, False
+            raise
+        await db.refresh(job)
+
+        self.stats["enqueued"] += 1
+        scope_jobs.inc(outcome="enqueued")
+        print(f"📥 Scope job {job.id} queued for project {project_id}")
+        if self._wakeup:
+            self._wakeup.set()
+        return job, True
+
+    async def _find_existing(self, db: AsyncSession, project_id: Any, owner_id: Any,
+                             idempotency_key: Optional[str]) -> Optional[ScopeJob]:
+        if idempotency_key:
+            query = select(ScopeJob).where(
+                ScopeJob.owner_id == owner_id,
+                ScopeJob.project_id == project_id,
+                ScopeJob.idempotency_key == idempotency_key
+            )
+        else:
+            query = select(ScopeJob).where(
+                ScopeJob.owner_id == owner_id,
+                ScopeJob.project_id == project_id,
+                ScopeJob.status.in_(ACTIVE_STATUSES)
+            ).order_by(ScopeJob.created_at.desc()).limit(1)
+        result = await db.execute(query)
+        return result.scalars().first()
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the worker pool (called from the app lifespan)"""
+        if self._tasks or self.workers <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker_loop(i)) for i in range(self.workers)]
+        print(f"👷 Started {self.workers} scope job workers ({self.worker_id})")
+
+    async def stop(self) -> None:
+        """Stop the workers; jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker_loop(self, index: int) -> None:
+        while True:
+            try:
+                claimed = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Scope job claim failed: {e}")
+                claimed = None
+
+            if claimed:
+                await self._run(*claimed)
+                continue
+
+            # Nothing to do: sleep until a local enqueue or the next poll
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim(self) -> Optional[Tuple[uuid.UUID, int, Dict[str, Any]]]:
+        """Lock the oldest runnable job; returns (job id, attempt, job fields)"""
+        while True:
+            now = datetime.now(timezone.utc)
+            stale_before = now - timedelta(seconds=self.stale_seconds)
+
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(ScopeJob)
+                    .where(or_(
+                        ScopeJob.status == QUEUED,
+                        and_(ScopeJob.status == RUNNING, ScopeJob.heartbeat_at < stale_before)
+                    ))
+                    .order_by(ScopeJob.created_at)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                job = result.scalar_one_or_none()
+                if job is None:
+                    return None
+
+                if job.status == RUNNING:
+                    self.stats["reclaimed"] += 1
+                    print(f"♻️ Reclaiming scope job {job.id} from {job.locked_by} (heartbeat stale)")
+
+                if job.attempts >= job.max_attempts:
+                    job.status = FAILED
+                    job.error = job.error or f"Gave up after {job.attempts} attempts"
+                    job.finished_at = now
+                    job.locked_by = None
+                    await db.commit()
+                    self.stats["failed"] += 1
+                    scope_jobs.inc(outcome="failed")
+                    print(f"❌ Scope job {job.id} failed after {job.attempts} attempts")
+                    # Look for another job straight away, in a fresh session
+                    continue
+
+                job.status = RUNNING
+                job.attempts += 1
+                job.locked_by = self.worker_id
+                job.heartbeat_at = now
+                job.started_at = job.started_at or now
+                await db.commit()
+
+                self.stats["claimed"] += 1
+                return job.id, job.attempts, {
+                    "project_id": job.project_id,
+                    "owner_id": job.owner_id,
+                    "company_id": job.company_id,
+                    "max_attempts": job.max_attempts,
+                    "payload": job.payload
+                }
+
+    async def _run(self, job_id: uuid.UUID, attempt: int, job: Dict[str, Any]) -> None:
+        """Run one claimed job to completion, keeping its heartbeat fresh"""
+        self.running += 1
+        set_llm_caller(job["owner_id"], job["company_id"], PRIORITY_STANDARD)
+        print(f"🏗️ Running scope job {job_id} (attempt {attempt})")
+
+        async def progress(stage: str, percent: int) -> None:
+            try:
+                await self._update(job_id, attempt, progress={"stage": stage, "percent": percent})
+            except LeaseLostError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Scope job {job_id} progress update failed: {e}")
+
+        async def generate() -> Dict[str, Any]:
+            project_data = job["payload"]["project_data"]
+            precomputed = await scope_speculator.claim(job["project_id"], project_data)
+            if precomputed:
+                return precomputed
+            return await run_comprehensive_scope(job["project_id"], project_data, progress)
+
+        pipeline = asyncio.create_task(generate())
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, attempt, pipeline))
+        try:
+            result = await pipeline
+            await self._update(
+                job_id, attempt,
+                status=SUCCEEDED, result=result, error=None, locked_by=None,
+                finished_at=datetime.now(timezone.utc)
+            )
+            self.stats["succeeded"] += 1
+            scope_jobs.inc(outcome="succeeded")
+            print(f"✅ Scope job {job_id} succeeded")
+        except LeaseLostError:
+            self.stats["lease_lost"] += 1
+            print(f"⚠️ Scope job {job_id} was reclaimed by another worker, dropping attempt {attempt}")
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled() and isinstance(heartbeat.exception(), LeaseLostError):
+                # The heartbeat found the job reclaimed and stopped the pipeline
+                self.stats["lease_lost"] += 1
+                print(f"⚠️ Scope job {job_id} lost its lease, dropping attempt {attempt}")
+            else:
+                # Shutdown - hand the job back without spending an attempt
+                await asyncio.shield(self._requeue(job_id, attempt))
+                raise
+        except Exception as e:
+            await self._fail_or_retry(job_id, attempt, job["max_attempts"], e)
+        finally:
+            heartbeat.cancel()
+            if not pipeline.done():
+                pipeline.cancel()
+            self.running -= 1
+
+    async def _heartbeat(self, job_id: uuid.UUID, attempt: int, pipeline: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self._update(job_id, attempt, heartbeat_at=datetime.now(timezone.utc))
+            except LeaseLostError:
+                pipeline.cancel()
+                raise
+            except Exception as e:
+                # A missed beat is fine; enough of them and the job is reclaimed
+                print(f"⚠️ Scope job {job_id} heartbeat failed: {e}")
+
+    async def _update(self, job_id: uuid.UUID, attempt: int, **values: Any) -> None:
+        """Write job fields, fenced on this worker still owning the attempt"""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(ScopeJob)
+                .where(ScopeJob.id == job_id, ScopeJob.attempts == attempt, ScopeJob.status == RUNNING)
+                .values(**values)
+            )
+            await db.commit()
+        if result.rowcount == 0:
+            raise LeaseLostError(str(job_id))
+
+    async def _requeue(self, job_id: uuid.UUID, attempt: int) -> None:
+        try:
+            await self._update(
+                job_id, attempt,
+                status=QUEUED, attempts=attempt - 1, locked_by=None, heartbeat_at=None
+            )
+            self.stats["requeued"] += 1
+            print(f"↩️ Scope job {job_id} returned to the queue")
+        except Exception as e:
+            print(f"⚠️ Could not requeue scope job {job_id}, it will be reclaimed: {e}")
+
+    async def _fail_or_retry(self, job_id: uuid.UUID, attempt: int, max_attempts: int, error: Exception) -> None:
+        print(f"❌ Scope job {job_id} attempt {attempt} failed: {error}")
+        # The job's own limit, fixed at enqueue time - the same one _claim enforces
+        retry = attempt < max_attempts
+        try:
+            await self._update(
+                job_id, attempt,
+                status=QUEUED if retry else FAILED,
+                error=str(error),
+                locked_by=None,
+                finished_at=None if retry else datetime.now(timezone.utc)
+            )
+        except LeaseLostError:
+            return
+        if retry:
+            self.stats["requeued"] += 1
+        else:
+            self.stats["failed"] += 1
+            scope_jobs.inc(outcome="failed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Worker pool counters for monitoring (this process only)"""
+        return {
+            "worker_id": self.worker_id,
+            "workers": len(self._tasks),
+            "running": self.running,
+            **self.stats
+        }
+
+
+def job_to_dict(job: ScopeJob, include_result: bool = True) -> Dict[str, Any]:
+    """API representation of a scope job"""
+    data = {
+        "job_id": str(job.id),
+        "project_id": str(job.project_id),
+        "status": job.status,
+        "progress": job.progress or {},
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+    if include_result:
+        data["result"] = job.result
+    return data
+
+
+# Global instance
+scope_job_queue = ScopeJobQueue(
+    workers=settings.SCOPE_JOB_WORKERS,
+    heartbeat_seconds=settings.SCOPE_JOB_HEARTBEAT_SECONDS,
+    stale_seconds=settings.SCOPE_JOB_STALE_SECONDS,
+    max_attempts=settings.SCOPE_JOB_MAX_ATTEMPTS
+)
+metrics.callback(
+    "scope_jobs_running", "Scope jobs running in this process", "gauge",
+    lambda: {(): scope_job_queue.running}
+)
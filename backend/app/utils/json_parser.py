@@ -0,0 +1,346 @@
+# backend/app/utils/json_parser.py
+import json
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_decoder = json.JSONDecoder()
+
+_WHITESPACE = ' \t\r\n'
+_WHITESPACE_RUN = re.compile(r'[ \t\r\n]+')
+_STRUCTURAL = re.compile(r'["{}\[\],]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_BARE_TOKEN = re.compile(r'[^\s,:\[\]{}"\']+')
+_DOUBLE_QUOTED_BODY = re.compile(r'[^"\\\x00-\x1f]+')
+_SINGLE_QUOTED_BODY = re.compile(r'[^\'"\\\x00-\x1f]+')
+_LITERALS = {"True": "true", "False": "false", "None": "null", "undefined": "null"}
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+def parse_llm_json(text: str) -> Any:
+    """Parse the JSON document in an LLM response.
+
+    Markdown fences and prose around the document are skipped without any
+    regex pre-processing. Well-formed output is decoded in a single C-level
+    pass; only if that fails is the text run through repair_json.
+    """
+    if not text:
+        raise ValueError("Empty LLM response")
+
+    start = _find_json_start(text)
+    if start == -1:
+        raise ValueError("No JSON found")
+
+    try:
+        value, _ = _decoder.raw_decode(text, start)
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    repaired, repairs = repair_json(text, start)
+    value = json.loads(repaired)
+    print(f"🩹 Repaired LLM JSON ({', '.join(sorted(repairs))})")
+    return value
+
+
+def repair_json(text: str, start: int = 0) -> Tuple[str, Set[str]]:
+    """Rewrite common LLM JSON defects in one pass.
+
+    Handles trailing and missing commas, unquoted keys, single-quoted strings,
+    raw control characters in strings, Python literals and truncated output
+    (cut back to the last complete element, then closed; containers with no
+    complete element are dropped). Anything after the document's closing
+    bracket is ignored. Returns the repaired text and the names of the
+    repairs applied.
+    """
+    out, stack, checkpoint, truncated, repairs = _scan(text, start)
+    if stack or truncated:
+        repairs.add("truncated")
+        out = out[:checkpoint[0]]
+        stack = checkpoint[1][:]
+        # Containers cut off before their first complete element are dropped
+        # (with their key), not closed into empty {} or [] entries
+        while len(stack) > 1 and out[-1] in '{[':
+            out.pop()
+            stack.pop()
+            if out[-1] == ':':
+                del out[-2:]
+            if out[-1] == ',':
+                out.pop()
+        for opener in reversed(stack):
+            out.append('}' if opener == '{' else ']')
+
+    return ''.join(out), repairs
+
+
+def truncated_prefix(text: str) -> Optional[str]:
+    """The JSON document in text cut back to its last complete element, None if it is complete.
+
+    The prefix is repaired JSON with its brackets left open, so a continuation
+    of the output can be appended to it directly. Text without any JSON counts
+    as complete - there is nothing to resume.
+    """
+    start = _find_json_start(text or "")
+    if start == -1:
+        return None
+    try:
+        _decoder.raw_decode(text, start)
+        return None
+    except json.JSONDecodeError:
+        pass
+
+    out, stack, checkpoint, truncated, _ = _scan(text, start)
+    if not stack and not truncated:
+        return None
+    return ''.join(out[:checkpoint[0]])
+
+
+def _scan(text: str, start: int) -> Tuple[List[str], List[str], Tuple[int, List[str]], bool, Set[str]]:
+    """Single pass of repair_json: output pieces, open brackets, last complete element, whether cut off"""
+    out: List[str] = []
+    stack: List[str] = []
+    repairs: Set[str] = set()
+    checkpoint: Tuple[int, List[str]] = (0, [])
+    expect_key = False
+    pending_comma = False
+    need_comma = False
+    truncated = False
+    i = start
+    n = len(text)
+
+    while i < n:
+        c = text[i]
+
+        if c in _WHITESPACE:
+            i = _WHITESPACE_RUN.match(text, i).end()
+            continue
+
+        if c in '}]':
+            if not stack:
+                break
+            if pending_comma:
+                repairs.add("trailing_comma")
+                pending_comma = False
+            closing = '}' if stack[-1] == '{' else ']'
+            if c != closing:
+                repairs.add("mismatched_bracket")
+            out.append(closing)
+            stack.pop()
+            i += 1
+            if not stack:
+                break
+            expect_key = False
+            need_comma = True
+            checkpoint = (len(out), stack[:])
+            continue
+
+        if c == ',':
+            if pending_comma or not need_comma:
+                repairs.add("extra_comma")
+            else:
+                checkpoint = (len(out), stack[:])
+                pending_comma = True
+            need_comma = False
+            expect_key = bool(stack) and stack[-1] == '{'
+            i += 1
+            continue
+
+        if c == ':':
+            out.append(':')
+            expect_key = False
+            i += 1
+            continue
+
+        # Start of a key or value
+        if pending_comma:
+            out.append(',')
+            pending_comma = False
+        elif need_comma:
+            out.append(',')
+            repairs.add("missing_comma")
+            need_comma = False
+        if stack and stack[-1] == '{' and not expect_key and out and out[-1] in '{,':
+            expect_key = True
+
+        if c in '{[':
+            out.append(c)
+            stack.append(c)
+            expect_key = c == '{'
+            need_comma = False
+            checkpoint = (len(out), stack[:])
+            i += 1
+            continue
+
+        if c == '"' or c == "'":
+            body = _DOUBLE_QUOTED_BODY if c == '"' else _SINGLE_QUOTED_BODY
+            if c == "'":
+                repairs.add("single_quotes")
+            parts = ['"']
+            j = i + 1
+            closed = False
+            while j < n:
+                m = body.match(text, j)
+                if m:
+                    parts.append(m.group())
+                    j = m.end()
+                    if j >= n:
+                        break
+                ch = text[j]
+                if ch == c:
+                    closed = True
+                    j += 1
+                    break
+                if ch == '\\':
+                    if j + 1 >= n:
+                        j = n
+                        break
+                    escaped = text[j + 1]
+                    parts.append("'" if c == "'" and escaped == "'" else text[j:j + 2])
+                    j += 2
+                elif ch == '"':
+                    parts.append('\\"')
+                    j += 1
+                else:
+                    parts.append(_CONTROL_ESCAPES.get(ch, '\\u%04x' % ord(ch)))
+                    repairs.add("control_character")
+                    j += 1
+            if not closed:
+                truncated = True
+                break
+            parts.append('"')
+            out.append(''.join(parts))
+            i = j
+            if expect_key:
+                expect_key = False
+            else:
+                need_comma = True
+                checkpoint = (len(out), stack[:])
+            continue
+
+        m = _BARE_TOKEN.match(text, i)
+        token = m.group()
+        i = m.end()
+        if expect_key:
+            out.append(json.dumps(token))
+            repairs.add("unquoted_key")
+            expect_key = False
+        else:
+            literal = _LITERALS.get(token)
+            if literal:
+                repairs.add("python_literal")
+            out.append(literal or token)
+            need_comma = True
+            # A token running into the end of the text may itself be cut off
+            if i < n:
+                checkpoint = (len(out), stack[:])
+
+    return out, stack, checkpoint, truncated, repairs
+
+
+def _find_json_start(text: str) -> int:
+    """Index of the first opening brace or bracket, -1 if there is none"""
+    starts = [i for i in (text.find('{'), text.find('[')) if i != -1]
+    return min(starts) if starts else -1
+
+
+class IncrementalJSONParser:
+    """Incremental parser that emits top-level members of a JSON object as soon as they complete.
+
+    Feed it raw LLM chunks (markdown fences and prose before the opening
+    brace are ignored). Each chunk is scanned once, jumping between
+    structural characters; only the text of the unfinished member is kept.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.done = False
+        self.sections: Dict[str, Any] = {}
+        self.failed_members = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (key, value) members completed by it"""
+        if self.done or not chunk:
+            return []
+
+        emitted: List[Tuple[str, Any]] = []
+        n = len(chunk)
+        i = 0
+        member_start = 0
+
+        while i < n:
+            if not self._started:
+                i = chunk.find('{', i)
+                if i == -1:
+                    return emitted
+                self._started = True
+                self._depth = 1
+                i += 1
+                member_start = i
+            elif self._escape:
+                self._escape = False
+                i += 1
+            elif self._in_string:
+                m = _STRING_SPECIAL.search(chunk, i)
+                if m is None:
+                    break
+                i = m.end()
+                if m.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+            else:
+                m = _STRUCTURAL.search(chunk, i)
+                if m is None:
+                    break
+                c = m.group()
+                i = m.end()
+                if c == '"':
+                    self._in_string = True
+                elif c in '{[':
+                    self._depth += 1
+                elif c in '}]':
+                    self._depth -= 1
+                    if self._depth == 0:
+                        emitted.extend(self._emit_member(self._take_segment(chunk, member_start, i - 1)))
+                        self.done = True
+                        return emitted
+                elif self._depth == 1:
+                    emitted.extend(self._emit_member(self._take_segment(chunk, member_start, i - 1)))
+                    member_start = i
+
+        self._parts.append(chunk[member_start:])
+        return emitted
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """Salvage what can be repaired from an unfinished final member"""
+        if self.done or not self._started:
+            return []
+        self.done = True
+        return self._emit_member(self._take_segment("", 0, 0), repair_only=True)
+
+    def _take_segment(self, chunk: str, start: int, end: int) -> str:
+        segment = "".join(self._parts) + chunk[start:end]
+        self._parts = []
+        return segment
+
+    def _emit_member(self, segment: str, repair_only: bool = False) -> List[Tuple[str, Any]]:
+        if not segment.strip():
+            return []
+        try:
+            if repair_only:
+                raise json.JSONDecodeError("unfinished member", segment, 0)
+            member = json.loads("{" + segment + "}")
+        except json.JSONDecodeError:
+            try:
+                repaired, _ = repair_json("{" + segment + ("" if repair_only else "}"))
+                member = json.loads(repaired)
+            except (json.JSONDecodeError, ValueError):
+                self.failed_members += 1
+                return []
+        if not isinstance(member, dict):
+            return []
+        self.sections.update(member)
+        return list(member.items())
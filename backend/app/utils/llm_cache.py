@@ -0,0 +1,188 @@
+# backend/app/utils/llm_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+from app.config.config import settings
+from app.utils.metrics import metrics
+
+# Per-task TTLs in seconds - 0 disables caching for that task
+TASK_TTLS = {
+    "scope_generation": 6 * 3600,
+    "scope_plan": 6 * 3600,
+    "scope_overview": 6 * 3600,
+    "scope_risks": 6 * 3600,
+    "scope_resources": 6 * 3600,
+    "scope_adapt": 6 * 3600,
+    "entity_extraction": 7 * 24 * 3600,
+    "entity_extraction_batch": 7 * 24 * 3600,
+    "architecture_diagram": 7 * 24 * 3600,
+    "task_modification": 0,
+    "refinement_guidance": 0,
+}
+DEFAULT_TTL = 3600
+
+
+class LLMCache:
+    """Content-addressed LLM response cache.
+
+    Keys are a SHA-256 of model, generation config and prompt. A bounded
+    in-memory LRU sits in front of a persistent SQLite tier so responses
+    survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[str] = None, enabled: bool = True):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "writes": 0,
+            "expired": 0
+        }
+
+    @staticmethod
+    def make_key(model_name: str, generation_config: Optional[Dict[str, Any]], prompt: str) -> str:
+        """Hash model, generation config and prompt into a cache key"""
+        payload = json.dumps(
+            {"model": model_name, "config": generation_config or {}, "prompt": prompt},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def ttl_for(task: str) -> int:
+        return TASK_TTLS.get(task, DEFAULT_TTL)
+
+    def is_cacheable(self, task: str) -> bool:
+        return self.enabled and self.ttl_for(task) > 0
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a response in memory, then on disk"""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return value
+            del self._memory[key]
+            self.stats["expired"] += 1
+
+        row = await asyncio.to_thread(self._disk_get, key)
+        if row is not None:
+            value, expires_at = row
+            if expires_at > now:
+                self._remember(key, value, expires_at)
+                self.stats["disk_hits"] += 1
+                return value
+            self.stats["expired"] += 1
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, task: str, value: str) -> None:
+        """Store a response in both tiers"""
+        ttl = self.ttl_for(task)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        await asyncio.to_thread(self._disk_set, key, task, value, expires_at)
+        self.stats["writes"] += 1
+
+    def record_bypass(self) -> None:
+        self.stats["bypassed"] += 1
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, task TEXT, value TEXT, expires_at REAL, created_at REAL)"
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        try:
+            with self._db_lock:
+                conn = self._get_conn()
+                if conn is None:
+                    return None
+                return conn.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"⚠️ LLM cache read error (non-critical): {e}")
+            return None
+
+    def _disk_set(self, key: str, task: str, value: str, expires_at: float) -> None:
+        try:
+            with self._db_lock:
+                conn = self._get_conn()
+                if conn is None:
+                    return
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, task, value, expires_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, task, value, expires_at, time.time())
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ LLM cache write error (non-critical): {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "enabled": self.enabled
+        }
+
+
+# Global instance
+llm_cache = LLMCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    db_path=settings.LLM_CACHE_PATH,
+    enabled=settings.LLM_CACHE_ENABLED
+)
+metrics.callback(
+    "llm_cache_lookups_total", "LLM cache lookups by result", "counter",
+    lambda: {
+        ("memory_hit",): llm_cache.stats["memory_hits"],
+        ("disk_hit",): llm_cache.stats["disk_hits"],
+        ("miss",): llm_cache.stats["misses"],
+        ("bypassed",): llm_cache.stats["bypassed"]
+    },
+    ["result"]
+)
+metrics.callback(
+    "llm_cache_hit_ratio", "Share of LLM cache lookups served from memory or disk", "gauge",
+    lambda: {(): llm_cache.get_stats()["hit_ratio"]}
+)
@@ -0,0 +1,423 @@
+# backend/app/utils/llm_gateway.py
+import asyncio
+from typing import Dict, Any, Callable, Optional, AsyncIterator
+from app.config.config import settings
+from app.utils.circuit_breaker import gemini_breaker, CircuitOpenError, is_transient
+from app.utils.json_parser import parse_llm_json, truncated_prefix
+from app.utils.llm_cache import llm_cache
+from app.utils.llm_providers import LLMProvider, LLMResponse, create_provider
+from app.utils.llm_scheduler import llm_scheduler
+from app.utils.metrics import metrics, llm_request_duration, llm_requests, llm_tokens, llm_truncations
+from app.utils.model_router import model_router, Route
+from app.utils.prompt_registry import count_tokens, prompt_registry
+from app.utils.single_flight import llm_flight
+
+# Per-task timeouts in seconds - full scope generation produces the largest outputs
+TASK_TIMEOUTS = {
+    "scope_generation": 120,
+    "scope_plan": 60,
+    "scope_overview": 30,
+    "scope_risks": 30,
+    "scope_resources": 45,
+    "scope_adapt": 30,
+    "entity_extraction": 45,
+    "entity_extraction_batch": 90,
+    "task_modification": 30,
+    "refinement_guidance": 30,
+    "architecture_diagram": 20,
+}
+
+# Tasks whose output is a JSON document - checked structurally for truncation
+# and resumed from the last complete element
+JSON_TASKS = {
+    "scope_generation", "scope_plan", "scope_overview", "scope_risks", "scope_resources", "scope_adapt",
+    "entity_extraction", "entity_extraction_batch", "task_modification",
+}
+# How much of the cut-off output is shown to the model when asking it to continue
+CONTINUATION_TAIL_CHARS = 2000
+
+
+def resolve_model_name(model_name: Optional[str] = None) -> str:
+    """Normalize a Gemini model name (no "models/" prefix)"""
+    model_name = model_name or settings.GEMINI_MODEL or "gemini-1.5-flash"
+    if model_name.startswith("models/"):
+        model_name = model_name.replace("models/", "")
+    return model_name
+
+
+class LLMGateway:
+    """Shared non-blocking gateway for every LLM call.
+
+    Sends calls to the configured provider (live Gemini, recording or replay),
+    admits them through the fair-share scheduler (which caps concurrency) and
+    applies a per-call timeout so a slow generation never stalls the event loop
+    for other requests.
+    """
+
+    def __init__(self, provider: LLMProvider, max_concurrency: int = 8, default_timeout: float = 60):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.in_flight = 0
+        self.total_calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+        self.truncations: Dict[str, Dict[str, int]] = {}
+
+    async def generate(self,
+                       prompt: str,
+                       task: str = "default",
+                       generation_config: Optional[Dict[str, Any]] = None,
+                       model_name: Optional[str] = None,
+                       timeout: Optional[float] = None,
+                       bypass_cache: bool = False,
+                       validate: Optional[Callable[[str], bool]] = None) -> str:
+        """Generate text for a prompt without blocking the event loop.
+
+        The model and generation config come from the task's route unless
+        model_name pins a model; generation_config entries override the route's.
+        A response is cached only if validate accepts it (by default, JSON
+        tasks need a complete document that parses), so a bad answer is not
+        replayed for the whole TTL.
+        """
+        route = model_router.route(task, model_name and resolve_model_name(model_name), generation_config)
+        request_key = llm_cache.make_key(route.model_name, route.generation_config, prompt)
+        cacheable = llm_cache.is_cacheable(task)
+        if cacheable:
+            if bypass_cache:
+                # Skip the lookup but still refresh the stored response
+                llm_cache.record_bypass()
+            else:
+                cached = await llm_cache.get(request_key)
+                if cached is not None:
+                    print(f"⚡ LLM cache hit (task: {task})")
+                    return cached
+
+        # Degraded provider: fail now so callers use their fallbacks instead of waiting
+        self._raise_if_circuit_open(task)
+
+        async def call_and_store() -> str:
+            # The first call and any continuations share one task timeout
+            deadline = asyncio.get_running_loop().time() + (timeout or TASK_TIMEOUTS.get(task, self.default_timeout))
+            response = await self._generate_routed(prompt, route, timeout)
+            text = await self._complete_truncated(prompt, route, response.text, response.finish_reason, deadline)
+            if cacheable and _cacheable_response(task, text, validate):
+                await llm_cache.set(request_key, task, text)
+            return text
+
+        # Identical concurrent requests (double clicks, client retries) share one call
+        return await llm_flight.do(f"{task}:{request_key}", call_and_store)
+
+    async def resume(self, prompt: str, partial: str, task: str = "default", timeout: Optional[float] = None) -> str:
+        """Finish an output that was cut off, e.g. a stream that ended before its document closed"""
+        self._raise_if_circuit_open(task)
+        deadline = asyncio.get_running_loop().time() + (timeout or TASK_TIMEOUTS.get(task, self.default_timeout))
+        return await self._complete_truncated(prompt, model_router.route(task), partial, "MAX_TOKENS", deadline)
+
+    async def _complete_truncated(self,
+                                  prompt: str,
+                                  route: Route,
+                                  text: str,
+                                  finish_reason: str,
+                                  deadline: float) -> str:
+        """Continue an output that hit the token limit instead of discarding it.
+
+        JSON outputs count as truncated when the document is not closed (the
+        finish reason alone is not trusted either way), other outputs when the
+        provider stopped at max tokens. Each continuation is asked to pick up
+        after the last complete element and is stitched onto the output cut
+        back to that point. Continuations only get the time left before
+        deadline. Gives up after LLM_MAX_CONTINUATIONS calls or at the deadline
+        and returns what it has - parse_llm_json still salvages complete elements.
+        """
+        task = route.task
+        stats = self.truncations.setdefault(
+            task, {"checked": 0, "truncated": 0, "continuations": 0, "recovered": 0, "unrecovered": 0}
+        )
+        stats["checked"] += 1
+        resume_from = _resume_point(task, text, finish_reason)
+        if resume_from is None:
+            return text
+
+        stats["truncated"] += 1
+        llm_truncations.inc(task=task, outcome="detected")
+        print(f"✂️ LLM output cut off (task: {task}, finish reason: {finish_reason}), continuing")
+        loop = asyncio.get_running_loop()
+        attempts = 0
+        for attempt in range(1, settings.LLM_MAX_CONTINUATIONS + 1):
+            remaining = deadline - loop.time()
+            if remaining < 1:
+                print(f"⏱️ No time left in the task timeout to continue the output (task: {task})")
+                break
+            attempts = attempt
+            continuation_prompt = prompt_registry.render(
+                "continuation",
+                prompt=prompt,
+                partial=resume_from[-CONTINUATION_TAIL_CHARS:]
+            )
+            stats["continuations"] += 1
+            llm_truncations.inc(task=task, outcome="continued")
+            response = await self._generate_routed(continuation_prompt, route, remaining)
+            continuation = _strip_fences(response.text) if task in JSON_TASKS else response.text
+            text = resume_from + continuation
+            resume_from = _resume_point(task, text, response.finish_reason)
+            if resume_from is None:
+                stats["recovered"] += 1
+                llm_truncations.inc(task=task, outcome="recovered")
+                print(f"🧵 Stitched {attempt} continuation(s) into a complete output (task: {task})")
+                return text
+
+        stats["unrecovered"] += 1
+        llm_truncations.inc(task=task, outcome="unrecovered")
+        print(f"⚠️ LLM output still cut off after {attempts} continuation(s) (task: {task})")
+        return text
+
+    async def _generate_routed(self, prompt: str, route: Route, timeout: Optional[float]) -> LLMResponse:
+        """Run the call on the routed model, moving to the fallback tier if it overruns its latency budget"""
+        timeout = timeout or TASK_TIMEOUTS.get(route.task, self.default_timeout)
+        if not route.fallback_model or not route.latency_budget or route.latency_budget >= timeout:
+            return await self._generate_uncached(prompt, route.task, route.generation_config, route.model_name, timeout)
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            return await self._generate_uncached(
+                prompt, route.task, route.generation_config, route.model_name, route.latency_budget,
+                soft_timeout=True
+            )
+        except asyncio.TimeoutError:
+            model_router.record_budget_exceeded(route.task, route.model_name)
+
+        model_router.record_fallback(route.task)
+        remaining = max(timeout - (loop.time() - started), 1)
+        return await self._generate_uncached(
+            prompt, route.task, route.generation_config, route.fallback_model, remaining
+        )
+
+    async def _generate_uncached(self,
+                                 prompt: str,
+                                 task: str,
+                                 generation_config: Optional[Dict[str, Any]],
+                                 model_name: str,
+                                 timeout: Optional[float],
+                                 soft_timeout: bool = False) -> LLMResponse:
+        timeout = timeout or TASK_TIMEOUTS.get(task, self.default_timeout)
+
+        async with llm_scheduler.slot(task, _estimate_tokens(prompt, generation_config)) as ticket:
+            self.in_flight += 1
+            self.total_calls += 1
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                # Breaker applies the timeout, retries transient errors and,
+                # when enabled, hedges calls slower than this task's p95
+                response = await gemini_breaker.call(
+                    lambda: self.provider.generate(prompt, model_name, generation_config, task),
+                    timeout=timeout,
+                    retries=settings.PROVIDER_MAX_RETRIES,
+                    hedge=settings.LLM_HEDGING,
+                    hedge_key=f"{task}:{model_name}",
+                    soft_timeout=soft_timeout
+                )
+                prompt_tokens, output_tokens = _token_counts(response, prompt)
+                ticket.actual_tokens = prompt_tokens + output_tokens
+                elapsed = loop.time() - started
+                model_router.record(task, model_name, elapsed, prompt_tokens, output_tokens)
+                _observe(task, model_name, "success", elapsed, prompt_tokens, output_tokens)
+                return response
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                print(f"⏱️ LLM call timed out after {timeout}s (task: {task})")
+                _observe(task, model_name, "timeout", loop.time() - started)
+                raise
+            except CircuitOpenError:
+                self.rejected += 1
+                _observe(task, model_name, "rejected")
+                raise
+            except Exception:
+                self.errors += 1
+                _observe(task, model_name, "error", loop.time() - started)
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def _raise_if_circuit_open(self, task: str) -> None:
+        try:
+            gemini_breaker.raise_if_open()
+        except CircuitOpenError as e:
+            self.rejected += 1
+            llm_requests.inc(task=task, model="", outcome="rejected")
+            print(f"⚡ Skipping LLM call, {e} (task: {task})")
+            raise
+
+    async def stream(self,
+                     prompt: str,
+                     task: str = "default",
+                     generation_config: Optional[Dict[str, Any]] = None,
+                     model_name: Optional[str] = None,
+                     timeout: Optional[float] = None,
+                     bypass_cache: bool = False,
+                     validate: Optional[Callable[[str], bool]] = None) -> AsyncIterator[str]:
+        """Stream text chunks for a prompt as the provider produces them.
+
+        Routed like generate(); a stream cannot switch models midway, so only
+        a task already demoted by an earlier overrun starts on the fallback tier.
+        The full text is cached under the same rules as generate().
+        """
+        route = model_router.route(task, model_name and resolve_model_name(model_name), generation_config)
+        model_name, generation_config = route.model_name, route.generation_config
+        request_key = llm_cache.make_key(model_name, generation_config, prompt)
+        cacheable = llm_cache.is_cacheable(task)
+        if cacheable:
+            if bypass_cache:
+                llm_cache.record_bypass()
+            else:
+                cached = await llm_cache.get(request_key)
+                if cached is not None:
+                    print(f"⚡ LLM cache hit (task: {task}, streamed)")
+                    yield cached
+                    return
+
+        self._raise_if_circuit_open(task)
+        timeout = timeout or TASK_TIMEOUTS.get(task, self.default_timeout)
+        loop = asyncio.get_running_loop()
+        chunks = []
+        # Streams are not retried or hedged (chunks are already out), only reported to the breaker
+        recorded = False
+
+        async with llm_scheduler.slot(task, _estimate_tokens(prompt, generation_config)) as ticket:
+            gemini_breaker.before_call()
+            self.in_flight += 1
+            self.total_calls += 1
+            started = loop.time()
+            deadline = started + timeout
+            iterator = self.provider.stream(prompt, model_name, generation_config, task)
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(iterator.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    chunks.append(chunk)
+                    yield chunk
+                text = "".join(chunks)
+                elapsed = loop.time() - started
+                gemini_breaker.record_success(elapsed, f"{task}:{model_name}")
+                recorded = True
+                prompt_tokens, output_tokens = count_tokens(prompt), count_tokens(text)
+                ticket.actual_tokens = prompt_tokens + output_tokens
+                model_router.record(task, model_name, elapsed, prompt_tokens, output_tokens)
+                _observe(task, model_name, "success", elapsed, prompt_tokens, output_tokens)
+                if route.latency_budget and elapsed > route.latency_budget and route.fallback_model:
+                    model_router.record_budget_exceeded(task, model_name)
+            except (GeneratorExit, asyncio.CancelledError):
+                # Consumer stopped reading - charge the tokens produced so far, no breaker outcome
+                elapsed = loop.time() - started
+                prompt_tokens, output_tokens = count_tokens(prompt), count_tokens("".join(chunks))
+                ticket.actual_tokens = prompt_tokens + output_tokens
+                _observe(task, model_name, "cancelled", elapsed, prompt_tokens, output_tokens)
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                    print(f"⏱️ LLM stream timed out after {timeout}s (task: {task})")
+                    _observe(task, model_name, "timeout", loop.time() - started)
+                else:
+                    self.errors += 1
+                    _observe(task, model_name, "error", loop.time() - started)
+                if isinstance(e, asyncio.TimeoutError) or is_transient(e):
+                    gemini_breaker.record_failure(loop.time() - started)
+                    recorded = True
+                raise
+            finally:
+                if not recorded:
+                    gemini_breaker.release_probe()
+                self.in_flight -= 1
+                await iterator.aclose()
+
+        # A stream cut off mid-document must not be replayed from the cache
+        if cacheable and _resume_point(task, text, "STOP") is None and _cacheable_response(task, text, validate):
+            await llm_cache.set(request_key, task, text)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Gateway counters for monitoring"""
+        return {
+            "provider": self.provider.get_stats(),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "total_calls": self.total_calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "truncations": self.truncations
+        }
+
+
+def _observe(task: str, model_name: str, outcome: str, elapsed: Optional[float] = None,
+             prompt_tokens: int = 0, output_tokens: int = 0) -> None:
+    """Record one Gemini call in the metrics registry"""
+    llm_requests.inc(task=task, model=model_name, outcome=outcome)
+    if elapsed is not None:
+        llm_request_duration.observe(elapsed, task=task, model=model_name)
+    if prompt_tokens or output_tokens:
+        llm_tokens.inc(prompt_tokens, task=task, model=model_name, direction="prompt")
+        llm_tokens.inc(output_tokens, task=task, model=model_name, direction="output")
+
+
+def _resume_point(task: str, text: str, finish_reason: str) -> Optional[str]:
+    """Output to continue from if it was cut off, else None"""
+    if task in JSON_TASKS:
+        return truncated_prefix(text)
+    return text if finish_reason == "MAX_TOKENS" else None
+
+
+def _cacheable_response(task: str, text: str, validate: Optional[Callable[[str], bool]]) -> bool:
+    """Whether a response may be cached: validate accepts it, or by default a
+    JSON task's output is a complete document that parses"""
+    try:
+        if validate is not None:
+            return bool(validate(text))
+        if task not in JSON_TASKS:
+            return bool(text and text.strip())
+        return truncated_prefix(text) is None and isinstance(parse_llm_json(text), (dict, list))
+    except Exception:
+        return False
+
+
+def _strip_fences(text: str) -> str:
+    """Markdown fences a model may wrap around a continuation"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.endswith("```"):
+        text = text[:-3]
+    return text
+
+
+def _estimate_tokens(prompt: str, generation_config: Optional[Dict[str, Any]]) -> int:
+    """Quota estimate before the call: prompt plus the most the model may return"""
+    return count_tokens(prompt) + (generation_config or {}).get("max_output_tokens", 2048)
+
+
+def _token_counts(response, prompt: str):
+    """Prompt and output tokens as reported by the provider, else estimated"""
+    return (
+        response.prompt_tokens or count_tokens(prompt),
+        response.output_tokens or count_tokens(response.text)
+    )
+
+
+# Global instance
+llm_gateway = LLMGateway(
+    create_provider(settings.LLM_PROVIDER_MODE),
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    default_timeout=settings.LLM_TIMEOUT_SECONDS
+)
+metrics.callback(
+    "llm_in_flight", "LLM calls currently running", "gauge",
+    lambda: {(): llm_gateway.in_flight}
+)
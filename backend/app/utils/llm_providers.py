@@ -0,0 +1,343 @@
+# backend/app/utils/llm_providers.py
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, AsyncIterator
+from app.config.config import settings
+from app.utils.prompt_registry import (
+    SCOPE_SCHEMA, ENTITY_SCHEMA, ENTITY_BATCH_SCHEMA, TASK_INSTRUCTION_SCHEMA, SCOPE_SECTION_GROUPS, section_schema
+)
+
+_STREAM_END = object()
+
+
+class LLMResponse:
+    """Provider-neutral result of one generation"""
+
+    def __init__(self,
+                 text: str,
+                 finish_reason: str = "STOP",
+                 prompt_tokens: Optional[int] = None,
+                 output_tokens: Optional[int] = None):
+        self.text = text
+        self.finish_reason = finish_reason
+        self.prompt_tokens = prompt_tokens
+        self.output_tokens = output_tokens
+
+
+class ProviderError(Exception):
+    """Provider failure carrying an HTTP-style status code (retried when 429/5xx)"""
+
+    def __init__(self, message: str, code: int = 503):
+        super().__init__(message)
+        self.code = code
+
+
+class LLMProvider:
+    """Interface every LLM backend implements; the gateway is the only caller"""
+
+    name = "base"
+
+    async def generate(self, prompt: str, model_name: str, generation_config: Optional[Dict[str, Any]], task: str) -> LLMResponse:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, model_name: str, generation_config: Optional[Dict[str, Any]], task: str) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+
+class GeminiProvider(LLMProvider):
+    """Live Gemini backend.
+
+    Uses the async API when the installed SDK has it and a bounded thread pool
+    otherwise. The SDK is imported lazily so stub and replay modes run without
+    it or an API key.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], max_workers: int = 8):
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        self._models: Dict[str, Any] = {}
+
+    def get_model(self, model_name: str):
+        """Return a cached GenerativeModel for the given name"""
+        if model_name not in self._models:
+            self._models[model_name] = self._genai.GenerativeModel(model_name)
+        return self._models[model_name]
+
+    async def generate(self, prompt, model_name, generation_config, task) -> LLMResponse:
+        model = self.get_model(model_name)
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(prompt, generation_config=generation_config)
+        else:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor,
+                functools.partial(model.generate_content, prompt, generation_config=generation_config)
+            )
+
+        usage = getattr(response, "usage_metadata", None)
+        return LLMResponse(
+            text=response.text,
+            finish_reason=_finish_reason(response),
+            prompt_tokens=getattr(usage, "prompt_token_count", None) or None,
+            output_tokens=getattr(usage, "candidates_token_count", None) or None
+        )
+
+    async def stream(self, prompt, model_name, generation_config, task) -> AsyncIterator[str]:
+        """Yield text chunks from Gemini's streaming mode"""
+        model = self.get_model(model_name)
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+            async for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+            return
+
+        # Drain the synchronous stream on the bounded executor
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for chunk in model.generate_content(prompt, generation_config=generation_config, stream=True):
+                    loop.call_soon_threadsafe(queue.put_nowait, _chunk_text(chunk))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        loop.run_in_executor(self._executor, produce)
+        while True:
+            item = await queue.get()
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if item:
+                yield item
+
+
+class RecordingProvider(LLMProvider):
+    """Pass calls through to another provider and append prompt/response pairs to a JSONL file"""
+
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, path: str):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self.recorded = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    async def generate(self, prompt, model_name, generation_config, task) -> LLMResponse:
+        started = time.perf_counter()
+        response = await self.inner.generate(prompt, model_name, generation_config, task)
+        await asyncio.to_thread(
+            self._append, prompt, model_name, generation_config, task,
+            response.text, response.finish_reason, time.perf_counter() - started
+        )
+        return response
+
+    async def stream(self, prompt, model_name, generation_config, task) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        chunks = []
+        async for chunk in self.inner.stream(prompt, model_name, generation_config, task):
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(
+            self._append, prompt, model_name, generation_config, task,
+            "".join(chunks), "STOP", time.perf_counter() - started
+        )
+
+    def _append(self, prompt, model_name, generation_config, task, text, finish_reason, latency) -> None:
+        record = {
+            "key": recording_key(prompt),
+            "task": task,
+            "model": model_name,
+            "generation_config": generation_config or {},
+            "prompt": prompt,
+            "response": text,
+            "finish_reason": finish_reason,
+            "latency": round(latency, 3),
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"provider": self.name, "inner": self.inner.name, "path": self.path, "recorded": self.recorded}
+
+
+class ReplayProvider(LLMProvider):
+    """Offline provider for load tests: recorded responses first, synthetic ones otherwise.
+
+    Responses are looked up by prompt hash in a recording file. Prompts that
+    were never recorded get a deterministic synthetic response built from the
+    task's JSON schema. Latency (mean and jitter) and an error rate can be
+    injected to mimic a real provider.
+    """
+
+    name = "replay"
+
+    def __init__(self,
+                 path: Optional[str] = None,
+                 latency_ms: float = 0,
+                 jitter_ms: float = 0,
+                 error_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.path = path
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._recordings: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"replayed": 0, "synthetic": 0, "injected_errors": 0}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self._recordings[record["key"]] = record
+            print(f"📼 Loaded {len(self._recordings)} recorded LLM responses from {path}")
+
+    async def generate(self, prompt, model_name, generation_config, task) -> LLMResponse:
+        await self._simulate_latency()
+        record = self._recordings.get(recording_key(prompt))
+        if record:
+            self.stats["replayed"] += 1
+            return LLMResponse(record["response"], record.get("finish_reason", "STOP"))
+        self.stats["synthetic"] += 1
+        return LLMResponse(synthetic_response(task, prompt))
+
+    async def stream(self, prompt, model_name, generation_config, task) -> AsyncIterator[str]:
+        response = await self.generate(prompt, model_name, generation_config, task)
+        # Spread the text over chunks roughly the size Gemini streams
+        for i in range(0, len(response.text), 256):
+            await asyncio.sleep(0)
+            yield response.text[i:i + 256]
+
+    async def _simulate_latency(self) -> None:
+        delay = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats["injected_errors"] += 1
+            raise ProviderError("Injected provider error", code=503)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "recordings": len(self._recordings),
+            "latency_ms": self.latency_ms,
+            "error_rate": self.error_rate,
+            **self.stats
+        }
+
+
+def recording_key(prompt: str) -> str:
+    """Recordings are matched on the prompt alone so they replay under any model routing"""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+# JSON tasks and the schema their synthetic responses follow
+_TASK_SCHEMAS = {
+    "scope_generation": SCOPE_SCHEMA,
+    "entity_extraction": ENTITY_SCHEMA,
+    "entity_extraction_batch": ENTITY_BATCH_SCHEMA,
+    "task_modification": TASK_INSTRUCTION_SCHEMA,
+    **{template: section_schema(template) for template in SCOPE_SECTION_GROUPS},
+    "scope_adapt": section_schema("scope_overview"),
+}
+
+_SYNTHETIC_TEXT = {
+    "architecture_diagram": (
+        "graph TD\n"
+        "    Users[Users] --> Frontend[Web Frontend]\n"
+        "    Frontend --> API[API Gateway]\n"
+        "    API --> Backend[Backend Services]\n"
+        "    Backend --> Database[(Database)]"
+    ),
+    "refinement_guidance": (
+        "Consider adjusting the timeline, team composition or scope of individual "
+        "activities. Tell me which phase or role to change and by how much."
+    ),
+}
+
+
+def synthetic_response(task: str, prompt: str) -> str:
+    """Deterministic response for a task, seeded by the prompt"""
+    if task in _SYNTHETIC_TEXT:
+        return _SYNTHETIC_TEXT[task]
+    schema = _TASK_SCHEMAS.get(task)
+    if schema is None:
+        return f"Synthetic response for {task}."
+    rng = random.Random(recording_key(prompt))
+    if task == "entity_extraction_batch":
+        # One entry per packed document, echoing its id
+        doc_ids = re.findall(r"^=== doc_id: (\S+) ===$", prompt, re.MULTILINE)
+        return json.dumps({"documents": [
+            {"doc_id": doc_id, "entities": _synthesize(ENTITY_SCHEMA, rng, "item")} for doc_id in doc_ids
+        ]})
+    return json.dumps(_synthesize(schema, rng, "item"))
+
+
+def _synthesize(spec: Any, rng: random.Random, name: str) -> Any:
+    if isinstance(spec, dict):
+        return {key: _synthesize(value, rng, key) for key, value in spec.items()}
+    if isinstance(spec, list):
+        return [_synthesize(spec[0], rng, f"{name} {i + 1}") for i in range(rng.randint(3, 6))]
+    if spec == "int":
+        return rng.randint(1, 20)
+    if spec == "num":
+        return round(rng.uniform(1, 12), 1) if "months" in name or "percentage" in name else rng.randint(5, 15) * 1000
+    if "|" in spec:
+        return rng.choice(spec.split("|"))
+    return f"Synthetic {name}"
+
+
+def _finish_reason(response) -> str:
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError):
+        return "STOP"
+    return getattr(reason, "name", str(reason))
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed chunk (empty for chunks without parts, e.g. safety stops)"""
+    try:
+        return chunk.text
+    except (ValueError, AttributeError):
+        return ""
+
+
+def create_provider(mode: str) -> LLMProvider:
+    """Build the provider for LLM_PROVIDER_MODE: gemini, record or replay"""
+    if mode == "replay":
+        return ReplayProvider(
+            path=settings.LLM_RECORDINGS_PATH,
+            latency_ms=settings.LLM_STUB_LATENCY_MS,
+            jitter_ms=settings.LLM_STUB_JITTER_MS,
+            error_rate=settings.LLM_STUB_ERROR_RATE
+        )
+    gemini = GeminiProvider(settings.GEMINI_API_KEY, max_workers=settings.LLM_MAX_CONCURRENCY)
+    if mode == "record":
+        return RecordingProvider(gemini, settings.LLM_RECORDINGS_PATH)
+    return gemini
@@ -0,0 +1,312 @@
+# backend/app/utils/llm_scheduler.py
+import asyncio
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional, AsyncIterator, Deque
+from app.config.config import settings
+from app.utils.metrics import metrics
+
+# Interactive work (refinement chat) always goes first; standard and batch
+# share the remaining capacity by weight
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_STANDARD = "standard"
+PRIORITY_BATCH = "batch"
+PRIORITY_RANKS = {PRIORITY_INTERACTIVE: 0, PRIORITY_STANDARD: 1, PRIORITY_BATCH: 1}
+PRIORITY_WEIGHTS = {PRIORITY_INTERACTIVE: 8, PRIORITY_STANDARD: 4, PRIORITY_BATCH: 1}
+# Completed calls between sweeps of idle per-user and per-company state
+PRUNE_EVERY = 256
+
+
+class QuotaExceededError(Exception):
+    """Raised when an LLM request waited longer than allowed for its user's or company's quota"""
+
+
+class SchedulerOverloadedError(Exception):
+    """Raised when an LLM request had quota but waited longer than allowed for a free slot"""
+
+
+class LLMCaller:
+    """Who an LLM call is made for"""
+
+    def __init__(self, user_id: Optional[str] = None, company_id: Optional[str] = None, priority: str = PRIORITY_STANDARD):
+        self.user_id = user_id
+        self.company_id = company_id
+        self.priority = priority if priority in PRIORITY_WEIGHTS else PRIORITY_STANDARD
+
+
+_current_caller: ContextVar[Optional[LLMCaller]] = ContextVar("llm_caller", default=None)
+
+
+def set_llm_caller(user_id: Any = None, company_id: Any = None, priority: str = PRIORITY_STANDARD) -> None:
+    """Attribute LLM calls made from the current request (and tasks it starts) to a user"""
+    _current_caller.set(LLMCaller(
+        str(user_id) if user_id else None,
+        str(company_id) if company_id else None,
+        priority
+    ))
+
+
+def current_llm_caller() -> LLMCaller:
+    return _current_caller.get() or LLMCaller()
+
+
+class TokenBucket:
+    """Tokens-per-minute quota; capacity is one minute's worth of tokens"""
+
+    def __init__(self, tokens_per_minute: float):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.tokens = tokens_per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def seconds_until(self, amount: float, now: float) -> float:
+        """0 if amount is available now, else how long until it will be"""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        # May go negative when actual usage exceeds the estimate - that debt delays the next call
+        self.tokens -= amount
+
+
+class _Ticket:
+    def __init__(self, seq: int, caller: LLMCaller, task: str, cost: int, finish_tag: float):
+        self.seq = seq
+        self.caller = caller
+        self.task = task
+        self.cost = cost
+        self.finish_tag = finish_tag
+        self.enqueued_at = time.monotonic()
+        self.granted: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.actual_tokens: Optional[int] = None
+        self.throttled = False
+
+
+class LLMScheduler:
+    """Fair-share admission for every LLM call.
+
+    Calls wait for one of max_concurrency slots. Waiting calls are ordered by
+    priority class, then by weighted fair queuing across users: each user's
+    calls get virtual finish tags advancing by cost / weight, so a user with
+    ten queued documents cannot starve a user with one. A call is only
+    admitted while its user's and company's token buckets can cover its
+    estimated tokens; estimates are reconciled with actual usage afterwards.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 8,
+                 user_tokens_per_minute: float = 60000,
+                 company_tokens_per_minute: float = 200000,
+                 max_wait: float = 120):
+        self.max_concurrency = max_concurrency
+        self.user_tokens_per_minute = user_tokens_per_minute
+        self.company_tokens_per_minute = company_tokens_per_minute
+        self.max_wait = max_wait
+        self._queue: List[_Ticket] = []
+        self._running = 0
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._user_buckets: Dict[str, TokenBucket] = {}
+        self._company_buckets: Dict[str, TokenBucket] = {}
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._waits: Dict[str, Deque[float]] = {p: deque(maxlen=200) for p in PRIORITY_WEIGHTS}
+        self.stats = {
+            "admitted": 0,
+            "throttled": 0,
+            "quota_rejections": 0,
+            "overload_rejections": 0,
+            "cancelled": 0
+        }
+        self._releases = itertools.count(1)
+
+    @asynccontextmanager
+    async def slot(self, task: str, estimated_tokens: int) -> AsyncIterator[_Ticket]:
+        """Wait for a fair turn at an LLM slot; set ticket.actual_tokens once known"""
+        caller = current_llm_caller()
+        flow = caller.user_id or "anonymous"
+        cost = int(max(1, min(estimated_tokens, self.user_tokens_per_minute, self.company_tokens_per_minute)))
+
+        start_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish_tag = start_tag + cost / PRIORITY_WEIGHTS[caller.priority]
+        self._last_finish[flow] = finish_tag
+
+        ticket = _Ticket(next(self._seq), caller, task, cost, finish_tag)
+        self._queue.append(ticket)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(ticket.granted, timeout=self.max_wait)
+        except BaseException as e:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                # Admitted just as the caller gave up
+                self._release(ticket)
+            elif ticket in self._queue:
+                self._queue.remove(ticket)
+            if isinstance(e, asyncio.TimeoutError):
+                if self._quota_wait(ticket, time.monotonic()) > 0:
+                    self.stats["quota_rejections"] += 1
+                    print(f"🚦 LLM request for user {flow} waited {self.max_wait}s without quota (task: {task})")
+                    raise QuotaExceededError(f"LLM quota exceeded for user {flow}") from None
+                self.stats["overload_rejections"] += 1
+                print(f"🚦 LLM request for user {flow} waited {self.max_wait}s for a free slot (task: {task})")
+                raise SchedulerOverloadedError(f"LLM capacity busy, request for user {flow} timed out") from None
+            self.stats["cancelled"] += 1
+            raise
+
+        try:
+            yield ticket
+        finally:
+            self._release(ticket)
+
+    def _dispatch(self) -> None:
+        """Admit waiting calls while slots are free, in priority then fair-share order"""
+        now = time.monotonic()
+        while self._queue and self._running < self.max_concurrency:
+            eligible = []
+            next_refill = None
+            for ticket in self._queue:
+                wait = self._quota_wait(ticket, now)
+                if wait == 0:
+                    eligible.append(ticket)
+                else:
+                    ticket.throttled = True
+                    next_refill = wait if next_refill is None else min(next_refill, wait)
+
+            if not eligible:
+                self._schedule_wakeup(next_refill)
+                return
+
+            ticket = min(eligible, key=lambda t: (PRIORITY_RANKS[t.caller.priority], t.finish_tag, t.seq))
+            self._queue.remove(ticket)
+            self._charge(ticket.caller, ticket.cost)
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, ticket.finish_tag - ticket.cost / PRIORITY_WEIGHTS[ticket.caller.priority])
+
+            waited = now - ticket.enqueued_at
+            self._waits[ticket.caller.priority].append(waited)
+            self.stats["admitted"] += 1
+            if ticket.throttled:
+                self.stats["throttled"] += 1
+            ticket.granted.set_result(None)
+
+    def _quota_wait(self, ticket: _Ticket, now: float) -> float:
+        wait = self._user_bucket(ticket.caller).seconds_until(ticket.cost, now)
+        company_bucket = self._company_bucket(ticket.caller)
+        if company_bucket:
+            wait = max(wait, company_bucket.seconds_until(ticket.cost, now))
+        return wait
+
+    def _charge(self, caller: LLMCaller, tokens: float) -> None:
+        self._user_bucket(caller).consume(tokens)
+        company_bucket = self._company_bucket(caller)
+        if company_bucket:
+            company_bucket.consume(tokens)
+
+    def _user_bucket(self, caller: LLMCaller) -> TokenBucket:
+        key = caller.user_id or "anonymous"
+        if key not in self._user_buckets:
+            self._user_buckets[key] = TokenBucket(self.user_tokens_per_minute)
+        return self._user_buckets[key]
+
+    def _company_bucket(self, caller: LLMCaller) -> Optional[TokenBucket]:
+        if not caller.company_id:
+            return None
+        if caller.company_id not in self._company_buckets:
+            self._company_buckets[caller.company_id] = TokenBucket(self.company_tokens_per_minute)
+        return self._company_buckets[caller.company_id]
+
+    def _schedule_wakeup(self, delay: Optional[float]) -> None:
+        if delay is None or self._wakeup is not None:
+            return
+
+        def wake():
+            self._wakeup = None
+            self._dispatch()
+
+        self._wakeup = asyncio.get_running_loop().call_later(delay, wake)
+
+    def _release(self, ticket: _Ticket) -> None:
+        self._running -= 1
+        if ticket.actual_tokens is not None:
+            # Settle the difference between the estimate and what was really used
+            self._charge(ticket.caller, ticket.actual_tokens - ticket.cost)
+        if not self._queue and not self._running and self._last_finish:
+            # Idle - nobody is behind anybody, so the virtual clock catches up with every finish tag
+            self._virtual_time = max(self._virtual_time, max(self._last_finish.values()))
+        if next(self._releases) % PRUNE_EVERY == 0:
+            self._prune()
+        self._dispatch()
+
+    def _prune(self) -> None:
+        """Forget per-user and per-company state that no longer affects scheduling:
+        finish tags behind the virtual clock and buckets that have refilled"""
+        self._last_finish = {flow: tag for flow, tag in self._last_finish.items() if tag > self._virtual_time}
+        now = time.monotonic()
+        queued_users = {ticket.caller.user_id or "anonymous" for ticket in self._queue}
+        queued_companies = {ticket.caller.company_id for ticket in self._queue}
+        for buckets, queued in ((self._user_buckets, queued_users), (self._company_buckets, queued_companies)):
+            for key in [key for key, bucket in buckets.items()
+                        if key not in queued and bucket.seconds_until(bucket.capacity, now) == 0]:
+                del buckets[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and quota counters for monitoring"""
+        now = time.monotonic()
+        depth = {priority: 0 for priority in PRIORITY_WEIGHTS}
+        oldest = 0.0
+        for ticket in self._queue:
+            depth[ticket.caller.priority] += 1
+            oldest = max(oldest, now - ticket.enqueued_at)
+
+        waits = {}
+        for priority, samples in self._waits.items():
+            ordered = sorted(samples)
+            waits[priority] = {
+                "avg": round(sum(ordered) / len(ordered), 3) if ordered else 0,
+                "p95": round(ordered[int(0.95 * (len(ordered) - 1))], 3) if ordered else 0
+            }
+
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "queue_depth": len(self._queue),
+            "queue_depth_by_priority": depth,
+            "oldest_wait": round(oldest, 3),
+            "wait_seconds": waits,
+            "users_tracked": len(self._user_buckets),
+            "flows_tracked": len(self._last_finish),
+            "companies_tracked": len(self._company_buckets),
+            **self.stats
+        }
+
+
+# Global instance
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    user_tokens_per_minute=settings.LLM_USER_TOKENS_PER_MINUTE,
+    company_tokens_per_minute=settings.LLM_COMPANY_TOKENS_PER_MINUTE,
+    max_wait=settings.LLM_QUEUE_MAX_WAIT_SECONDS
+)
+metrics.callback(
+    "llm_queue_depth", "LLM calls waiting for a scheduler slot", "gauge",
+    lambda: {(priority,): depth for priority, depth in llm_scheduler.get_stats()["queue_depth_by_priority"].items()},
+    ["priority"]
+)
+metrics.callback(
+    "llm_quota_rejections_total", "LLM calls rejected after waiting too long for quota", "counter",
+    lambda: {(): llm_scheduler.stats["quota_rejections"]}
+)
+metrics.callback(
+    "llm_overload_rejections_total", "LLM calls with quota rejected after waiting too long for a free slot", "counter",
+    lambda: {(): llm_scheduler.stats["overload_rejections"]}
+)
@@ -0,0 +1,270 @@
+# backend/app/utils/metrics.py
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds - spans fast cache/Chroma calls up to two-minute scope generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+    type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations (latencies in seconds)"""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum, count)
+        self._values: Dict[LabelValues, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Observe the duration of the with-block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        samples = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound) if bound == float("inf") else repr(float(bound))}"'
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative))
+            samples.append((f"{self.name}_sum", _format_labels(self.labelnames, key), total))
+            samples.append((f"{self.name}_count", _format_labels(self.labelnames, key), count))
+        return samples
+
+
+class CallbackMetric(_Metric):
+    """Metric read from existing component stats at scrape time"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str,
+                 func: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.type = metric_type
+        self._func = func
+
+    def samples(self):
+        try:
+            values = self._func()
+        except Exception as e:
+            print(f"⚠️ Metric {self.name} collection failed: {e}")
+            return []
+        return [(self.name, _format_labels(self.labelnames, key), value) for key, value in values.items()]
+
+
+class MetricsRegistry:
+    """In-process metrics registry rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, metric_type: str,
+                 func: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()) -> CallbackMetric:
+        """Expose values computed on each scrape; func returns {label values tuple: value}"""
+        return self._register(CallbackMetric(name, documentation, metric_type, func, labelnames))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+def observe_async(histogram: Histogram, errors: Optional[Counter] = None, **labels: Any):
+    """Decorator timing an async function into histogram and counting its exceptions"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    if errors is not None:
+                        errors.inc(**labels)
+                    raise
+        return wrapper
+    return decorator
+
+
+# Global registry
+metrics = MetricsRegistry()
+
+# LLM calls (every generate_content call goes through the gateway)
+llm_request_duration = metrics.histogram(
+    "llm_request_duration_seconds", "Gemini call latency", ["task", "model"]
+)
+llm_requests = metrics.counter(
+    "llm_requests_total", "Gemini calls by outcome (success, timeout, rejected, error, cancelled)", ["task", "model", "outcome"]
+)
+llm_tokens = metrics.counter(
+    "llm_tokens_total", "Gemini tokens by direction (prompt, output)", ["task", "model", "direction"]
+)
+llm_truncations = metrics.counter(
+    "llm_truncations_total", "Cut-off LLM outputs by outcome (detected, continued, recovered, unrecovered)", ["task", "outcome"]
+)
+
+# Embeddings
+embedding_request_duration = metrics.histogram(
+    "embedding_request_duration_seconds", "Jina embedding call latency", ["provider"]
+)
+embedding_requests = metrics.counter(
+    "embedding_requests_total", "Jina embedding calls by outcome (success, rejected, error, skipped)", ["provider", "outcome"]
+)
+embedding_batch_size = metrics.histogram(
+    "embedding_batch_size", "Texts per embedding request", ["provider"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+)
+
+# Vector store
+chroma_operation_duration = metrics.histogram(
+    "chroma_operation_duration_seconds", "ChromaDB collection operation latency", ["operation"]
+)
+chroma_errors = metrics.counter(
+    "chroma_errors_total", "Failed ChromaDB collection operations", ["operation"]
+)
+
+# Documents and exports
+document_parse_duration = metrics.histogram(
+    "document_parse_duration_seconds", "Text extraction latency per uploaded document", ["file_type"]
+)
+document_parse_errors = metrics.counter(
+    "document_parse_errors_total", "Failed document text extractions", ["file_type"]
+)
+document_chunks = metrics.histogram(
+    "document_chunks", "Knowledge-base passages per ingested document",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+export_duration = metrics.histogram(
+    "export_duration_seconds", "Scope export generation latency", ["format"]
+)
+export_errors = metrics.counter(
+    "export_errors_total", "Failed scope exports", ["format"]
+)
+
+# Background jobs
+scope_jobs = metrics.counter(
+    "scope_jobs_total", "Scope jobs by outcome (enqueued, succeeded, failed)", ["outcome"]
+)
@@ -0,0 +1,208 @@
+# backend/app/utils/model_router.py
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Deque
+from app.config.config import settings
+
+# How many recent calls the latency percentiles are computed over
+LATENCY_WINDOW = 50
+# After a budget overrun the task goes straight to the fallback tier for this long
+DEMOTION_SECONDS = 120
+
+# Task -> model tier, generation config and latency budget in seconds.
+# Structured extraction and short text tasks run on the fast tier; scope
+# generation needs the quality tier and falls back to fast when too slow.
+TASK_ROUTES = {
+    "scope_generation": {
+        "tier": "quality",
+        "fallback_tier": "fast",
+        "latency_budget": 60,
+        "generation_config": {"max_output_tokens": 8192, "temperature": 0.4},
+    },
+    "scope_plan": {
+        "tier": "quality",
+        "fallback_tier": "fast",
+        "latency_budget": 30,
+        "generation_config": {"max_output_tokens": 3072, "temperature": 0.4},
+    },
+    "scope_resources": {
+        "tier": "quality",
+        "fallback_tier": "fast",
+        "latency_budget": 25,
+        "generation_config": {"max_output_tokens": 2048, "temperature": 0.3},
+    },
+    "scope_overview": {
+        "tier": "fast",
+        "latency_budget": 20,
+        "generation_config": {"max_output_tokens": 1536, "temperature": 0.5},
+    },
+    "scope_risks": {
+        "tier": "fast",
+        "latency_budget": 20,
+        "generation_config": {"max_output_tokens": 1536, "temperature": 0.5},
+    },
+    "scope_adapt": {
+        "tier": "fast",
+        "latency_budget": 20,
+        "generation_config": {"max_output_tokens": 1536, "temperature": 0.3},
+    },
+    "entity_extraction": {
+        "tier": "fast",
+        "latency_budget": 15,
+        "generation_config": {"max_output_tokens": 1024, "temperature": 0.1},
+    },
+    "entity_extraction_batch": {
+        "tier": "fast",
+        "latency_budget": 30,
+        "generation_config": {"max_output_tokens": 4096, "temperature": 0.1},
+    },
+    "task_modification": {
+        "tier": "fast",
+        "latency_budget": 10,
+        "generation_config": {"max_output_tokens": 512, "temperature": 0.1},
+    },
+    "refinement_guidance": {
+        "tier": "fast",
+        "latency_budget": 10,
+        "generation_config": {"max_output_tokens": 512, "temperature": 0.5},
+    },
+    "architecture_diagram": {
+        "tier": "fast",
+        "latency_budget": 10,
+        "generation_config": {"max_output_tokens": 500, "temperature": 0.3},
+    },
+}
+DEFAULT_ROUTE = {"tier": "quality", "latency_budget": None, "generation_config": {}}
+
+
+class Route:
+    """Where and how one call for a task should run"""
+
+    def __init__(self,
+                 task: str,
+                 model_name: str,
+                 generation_config: Dict[str, Any],
+                 latency_budget: Optional[float] = None,
+                 fallback_model: Optional[str] = None):
+        self.task = task
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.latency_budget = latency_budget
+        self.fallback_model = fallback_model
+
+
+class ModelRouter:
+    """Map each LLM task to a model tier, generation config and latency budget.
+
+    A call that exceeds its task's budget is retried on the faster tier and the
+    task is demoted to that tier for DEMOTION_SECONDS. Latency and token counts
+    are recorded per task and model so the routing table can be tuned.
+    """
+
+    def __init__(self, tiers: Dict[str, str]):
+        self.tiers = tiers
+        self._demoted_until: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def model_for(self, task: str) -> str:
+        """Model of the task's primary tier"""
+        return self.tiers[TASK_ROUTES.get(task, DEFAULT_ROUTE)["tier"]]
+
+    def route(self,
+              task: str,
+              model_name: Optional[str] = None,
+              generation_config: Optional[Dict[str, Any]] = None) -> Route:
+        """Resolve the model and config for a call; explicit arguments win over the table"""
+        spec = TASK_ROUTES.get(task, DEFAULT_ROUTE)
+        config = {**spec["generation_config"], **(generation_config or {})}
+
+        if model_name:
+            # Pinned model - no tier fallback
+            return Route(task, model_name, config, spec["latency_budget"])
+
+        fallback_tier = spec.get("fallback_tier")
+        if fallback_tier and self._demoted_until.get(task, 0) > time.monotonic():
+            return Route(task, self.tiers[fallback_tier], config, spec["latency_budget"])
+
+        fallback_model = self.tiers[fallback_tier] if fallback_tier else None
+        if fallback_model == self.tiers[spec["tier"]]:
+            fallback_model = None
+        return Route(task, self.tiers[spec["tier"]], config, spec["latency_budget"], fallback_model)
+
+    def record(self, task: str, model_name: str, latency: float, prompt_tokens: int, output_tokens: int) -> None:
+        """Record a completed call"""
+        stats = self._task_stats(task)
+        stats["calls"] += 1
+        stats["calls_by_model"][model_name] = stats["calls_by_model"].get(model_name, 0) + 1
+        stats["latencies"].append(latency)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["output_tokens"] += output_tokens
+        stats["max_output_tokens_seen"] = max(stats["max_output_tokens_seen"], output_tokens)
+
+    def record_budget_exceeded(self, task: str, model_name: str) -> None:
+        """Note a budget overrun and demote the task to its fallback tier for a while"""
+        stats = self._task_stats(task)
+        stats["budget_exceeded"] += 1
+        self._demoted_until[task] = time.monotonic() + DEMOTION_SECONDS
+        print(f"🐢 {task} exceeded its {TASK_ROUTES.get(task, DEFAULT_ROUTE)['latency_budget']}s budget on {model_name}, "
+              f"using the fallback tier for {DEMOTION_SECONDS}s")
+
+    def record_fallback(self, task: str) -> None:
+        self._task_stats(task)["fallbacks"] += 1
+
+    def _task_stats(self, task: str) -> Dict[str, Any]:
+        if task not in self._stats:
+            self._stats[task] = {
+                "calls": 0,
+                "calls_by_model": {},
+                "latencies": deque(maxlen=LATENCY_WINDOW),
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+                "max_output_tokens_seen": 0,
+                "budget_exceeded": 0,
+                "fallbacks": 0
+            }
+        return self._stats[task]
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-task routing, latency and token report"""
+        now = time.monotonic()
+        report = {}
+        for task, stats in self._stats.items():
+            spec = TASK_ROUTES.get(task, DEFAULT_ROUTE)
+            latencies = sorted(stats["latencies"])
+            calls = stats["calls"]
+            report[task] = {
+                "tier": spec["tier"],
+                "latency_budget": spec["latency_budget"],
+                "max_output_tokens": spec["generation_config"].get("max_output_tokens"),
+                "demoted": self._demoted_until.get(task, 0) > now,
+                "calls": calls,
+                "calls_by_model": dict(stats["calls_by_model"]),
+                "budget_exceeded": stats["budget_exceeded"],
+                "fallbacks": stats["fallbacks"],
+                "p50_latency": _percentile(latencies, 0.5),
+                "p95_latency": _percentile(latencies, 0.95),
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / calls) if calls else 0,
+                "avg_output_tokens": round(stats["output_tokens"] / calls) if calls else 0,
+                "max_output_tokens_seen": stats["max_output_tokens_seen"]
+            }
+        return report
+
+
+def _percentile(sorted_values, fraction: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 3)
+
+
+def _normalize(model_name: str) -> str:
+    return model_name.replace("models/", "", 1) if model_name.startswith("models/") else model_name
+
+
+# Global instance
+model_router = ModelRouter({
+    "quality": _normalize(settings.GEMINI_MODEL or "gemini-1.5-flash"),
+    "fast": _normalize(settings.GEMINI_FAST_MODEL),
+})
@@ -0,0 +1,121 @@
+# backend/app/utils/pipeline_executor.py
+import asyncio
+import inspect
+import time
+from typing import Dict, Any, Callable, Optional, Sequence, Awaitable
+
+
+class PipelineError(Exception):
+    """A stage without a fallback failed, or the stage graph is invalid"""
+
+
+class Stage:
+    """One pipeline step.
+
+    func receives the results of the named inputs as keyword arguments and may
+    be sync or async. A timeout bounds async stages. When the stage fails or
+    times out, fallback (called with the same arguments) provides its result
+    instead; without one the whole pipeline fails.
+    """
+
+    def __init__(self,
+                 name: str,
+                 func: Callable[..., Any],
+                 inputs: Sequence[str] = (),
+                 timeout: Optional[float] = None,
+                 fallback: Optional[Callable[..., Any]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.timeout = timeout
+        self.fallback = fallback
+
+
+class PipelineExecutor:
+    """Run stages as soon as their inputs are ready.
+
+    Stages form a DAG through their inputs; names given to run() as initial
+    values count as ready from the start. Independent stages run
+    concurrently. Per-stage timings and outcomes are collected for the
+    response metadata.
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise PipelineError("Duplicate stage names")
+
+    async def run(self,
+                  initial: Dict[str, Any],
+                  on_stage_done: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Execute the pipeline; returns {"results": {...}, "timings": {...}}"""
+        self._validate(initial)
+        results = dict(initial)
+        timings: Dict[str, Dict[str, Any]] = {}
+        pending = dict(self.stages)
+        running: Dict[asyncio.Task, str] = {}
+        started = time.perf_counter()
+
+        try:
+            while pending or running:
+                for name in [n for n, s in pending.items() if all(i in results for i in s.inputs)]:
+                    stage = pending.pop(name)
+                    running[asyncio.create_task(self._run_stage(stage, results, started))] = name
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    results[name], timings[name] = task.result()
+                    if on_stage_done:
+                        await on_stage_done(name)
+        finally:
+            for task in running:
+                task.cancel()
+
+        total = round(time.perf_counter() - started, 3)
+        timings["total"] = {"seconds": total, "status": "ok"}
+        return {"results": results, "timings": timings}
+
+    async def _run_stage(self, stage: Stage, results: Dict[str, Any], pipeline_started: float):
+        kwargs = {name: results[name] for name in stage.inputs}
+        started = time.perf_counter()
+        status = "ok"
+        error = None
+        try:
+            value = await _call(stage.func, kwargs, stage.timeout)
+        except Exception as e:
+            status = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+            error = f"timed out after {stage.timeout}s" if status == "timeout" else str(e)
+            if stage.fallback is None:
+                raise PipelineError(f"Stage '{stage.name}' failed: {error}") from e
+            print(f"⚠️ Pipeline stage '{stage.name}' {error}, using fallback")
+            value = await _call(stage.fallback, kwargs, None)
+            status = f"fallback_{status}"
+
+        timing = {
+            "seconds": round(time.perf_counter() - started, 3),
+            "started_at": round(started - pipeline_started, 3),
+            "status": status
+        }
+        if error:
+            timing["error"] = error
+        return value, timing
+
+    def _validate(self, initial: Dict[str, Any]) -> None:
+        """Every input must be produced by a stage or given up front, with no cycles"""
+        available = set(initial)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, stage in remaining.items() if set(stage.inputs) <= available]
+            if not ready:
+                missing = {name: sorted(set(s.inputs) - available) for name, s in remaining.items()}
+                raise PipelineError(f"Unsatisfiable stage inputs or cycle: {missing}")
+            for name in ready:
+                available.add(name)
+                del remaining[name]
+
+
+async def _call(func: Callable[..., Any], kwargs: Dict[str, Any], timeout: Optional[float]) -> Any:
+    if inspect.iscoroutinefunction(func):
+        return await asyncio.wait_for(func(**kwargs), timeout=timeout)
+    return func(**kwargs)
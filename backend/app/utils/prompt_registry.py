@@ -0,0 +1,496 @@
+# backend/app/utils/prompt_registry.py
+import math
+import re
+from string import Template
+from typing import Dict, Any, List, Optional
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Compact schema specs - leaf strings are value types, [x] is an array of x
+SCOPE_SCHEMA = {
+    "overview": {
+        "project_summary": "str (3-4 sentences)",
+        "key_objectives": ["str"],
+        "success_metrics": ["str"],
+        "deliverables": ["str"]
+    },
+    "timeline": {
+        "total_duration_months": "num",
+        "total_duration_weeks": "int",
+        "phases": [{
+            "phase_name": "str",
+            "duration_weeks": "int",
+            "start_week": "int",
+            "end_week": "int",
+            "milestones": ["str"],
+            "activities": ["str"]
+        }]
+    },
+    "activities": [{
+        "name": "str",
+        "phase": "phase_name",
+        "effort_days": "int",
+        "dependencies": ["activity name"],
+        "resources_needed": ["role"]
+    }],
+    "resources": [{
+        "role": "str",
+        "count": "int",
+        "effort_months": "num",
+        "allocation_percentage": "int",
+        "monthly_rate": "num",
+        "total_cost": "num"
+    }],
+    "architecture": {
+        "description": "str",
+        "components": [{"name": "str", "technology": "str", "description": "str"}]
+    },
+    "cost_breakdown": {
+        "total_cost": "num",
+        "subtotal": "num",
+        "contingency_percentage": "num",
+        "contingency_amount": "num",
+        "discount_applied": "num"
+    },
+    "risks": [{
+        "risk": "str",
+        "severity": "High|Medium|Low",
+        "probability": "High|Medium|Low",
+        "impact": "Critical|High|Medium|Low",
+        "mitigation": "str",
+        "category": "str",
+        "owner": "role"
+    }],
+    "assumptions": ["str"],
+    "dependencies": [{"activity": "str", "depends_on": ["activity name"], "phase": "phase_name"}]
+}
+
+ENTITY_SCHEMA = {
+    "project_type": "str",
+    "domain": "str",
+    "complexity": "simple|moderate|complex|enterprise",
+    "deliverables": ["str"],
+    "tech_stack": ["str"],
+    "compliance_requirements": ["str"],
+    "estimated_duration": "str",
+    "key_features": ["str"],
+    "integration_requirements": ["str"],
+    "security_requirements": ["str"],
+    "user_roles": ["str"],
+    "scalability_needs": "str",
+    "budget_indicators": "str"
+}
+
+# Several documents per call: one entity set per document id
+ENTITY_BATCH_SCHEMA = {
+    "documents": [{"doc_id": "str", "entities": ENTITY_SCHEMA}]
+}
+
+# Sections produced by each call in sectioned scope generation
+SCOPE_SECTION_GROUPS = {
+    "scope_plan": ("timeline", "activities"),
+    "scope_overview": ("overview", "architecture", "assumptions"),
+    "scope_risks": ("risks",),
+    "scope_resources": ("resources",),
+}
+
+TASK_INSTRUCTION_SCHEMA = {
+    "action": "add|remove|modify",
+    "activity_name": "str",
+    "activity_description": "str",
+    "target_phase": "Planning|Design|Development|Testing|Deployment",
+    "effort_days": "int",
+    "dependencies": ["activity name"],
+    "resources_required": ["role"]
+}
+
+
+def count_tokens(text: str) -> int:
+    """Approximate Gemini token count without a network round trip.
+
+    Counts word and punctuation pieces, charging long words extra, and never
+    reports fewer tokens than the usual ~4 characters per token.
+    """
+    pieces = _TOKEN_PIECES.findall(text)
+    estimate = sum(1 + len(piece) // 8 for piece in pieces)
+    return max(estimate, math.ceil(len(text) / 4))
+
+
+def encode_schema(schema: Any) -> str:
+    """Render a schema spec as compact JSON-like text"""
+    if isinstance(schema, dict):
+        return "{" + ",".join(f'"{key}":{encode_schema(value)}' for key, value in schema.items()) + "}"
+    if isinstance(schema, list):
+        return "[" + encode_schema(schema[0]) + ",...]"
+    return str(schema)
+
+
+def section_schema(template: str) -> Dict[str, Any]:
+    """Schema for one sectioned scope call"""
+    schema = {name: SCOPE_SCHEMA[name] for name in SCOPE_SECTION_GROUPS[template]}
+    if "resources" in schema:
+        # total_cost is computed in the merge, do not spend output tokens on it
+        schema["resources"] = [{k: v for k, v in SCOPE_SCHEMA["resources"][0].items() if k != "total_cost"}]
+    return schema
+
+
+class PromptBudgetError(ValueError):
+    """Raised when a prompt cannot be brought under its token budget"""
+
+
+class PromptTemplate:
+    """A named prompt with $placeholders, a token budget and fields that may be shortened.
+
+    Truncatable fields lose their end, or their middle when listed in
+    truncate_middle (for embedded prompts whose closing instructions matter).
+    """
+
+    def __init__(self, name: str, template: str, token_budget: int, truncatable: Optional[List[str]] = None,
+                 truncate_middle: Optional[List[str]] = None):
+        self.name = name
+        self.template = Template(template.strip() + "\n")
+        self.token_budget = token_budget
+        self.truncatable = truncatable or []
+        self.truncate_middle = set(truncate_middle or [])
+
+
+class PromptRegistry:
+    """Registry of every engine prompt with token accounting"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, template: PromptTemplate) -> None:
+        self._templates[template.name] = template
+        self._stats[template.name] = {
+            "renders": 0,
+            "total_tokens": 0,
+            "last_tokens": 0,
+            "max_tokens": 0,
+            "truncated": 0,
+            "token_budget": template.token_budget
+        }
+
+    def render(self, name: str, /, **values: Any) -> str:
+        """Render a prompt, shortening truncatable fields to fit the token budget"""
+        template = self._templates[name]
+        values = {key: str(value) for key, value in values.items()}
+
+        # Never tokenize far more text than could possibly fit
+        max_chars = template.token_budget * 6
+        for field in template.truncatable:
+            if len(values.get(field, "")) > max_chars:
+                values[field] = _shorten(values[field], max_chars, field in template.truncate_middle)
+
+        prompt = template.template.substitute(values)
+        tokens = count_tokens(prompt)
+        truncated = False
+
+        while tokens > template.token_budget:
+            field = max(template.truncatable, key=lambda f: len(values.get(f, "")), default=None)
+            if not field or not values.get(field):
+                raise PromptBudgetError(
+                    f"Prompt '{name}' needs {tokens} tokens, budget is {template.token_budget}"
+                )
+            overflow_chars = (tokens - template.token_budget) * 4 + 100
+            values[field] = _shorten(values[field], max(0, len(values[field]) - overflow_chars),
+                                     field in template.truncate_middle)
+            prompt = template.template.substitute(values)
+            tokens = count_tokens(prompt)
+            truncated = True
+
+        stats = self._stats[name]
+        stats["renders"] += 1
+        stats["total_tokens"] += tokens
+        stats["last_tokens"] = tokens
+        stats["max_tokens"] = max(stats["max_tokens"], tokens)
+        if truncated:
+            stats["truncated"] += 1
+
+        print(f"📏 Prompt '{name}': ~{tokens} tokens (budget {template.token_budget}{', truncated' if truncated else ''})")
+        return prompt
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Prompt size report per template"""
+        report = {}
+        for name, stats in self._stats.items():
+            template = self._templates[name]
+            report[name] = {
+                **stats,
+                "avg_tokens": round(stats["total_tokens"] / stats["renders"]) if stats["renders"] else 0,
+                # Size of the instructions alone, with every placeholder empty
+                "template_tokens": count_tokens(template.template.substitute(
+                    {field: "" for field in template.template.get_identifiers()}
+                ))
+            }
+        return report
+
+
+TRUNCATION_MARKER = "\n[...]\n"
+
+
+def _shorten(value: str, length: int, middle: bool) -> str:
+    """Cut value to length characters, from the end or (keeping a third of the
+    room for the head and the rest for the tail) from the middle"""
+    if len(value) <= length:
+        return value
+    if not middle or length <= len(TRUNCATION_MARKER):
+        return value[:length]
+    room = length - len(TRUNCATION_MARKER)
+    head = room // 3
+    return value[:head] + TRUNCATION_MARKER + value[len(value) - (room - head):]
+
+
+# Global instance
+prompt_registry = PromptRegistry()
+
+prompt_registry.register(PromptTemplate(
+    name="scope_generation",
+    token_budget=1500,
+    template="""
+You are an expert project manager. Generate a COMPREHENSIVE project scope with COMPLETE team composition.
+
+$context
+
+CRITICAL REQUIREMENTS:
+1. Include AT LEAST 7-10 different roles in resources
+2. Each role must have realistic count, effort, and rates
+3. Generate 10-15 detailed activities spread over 4-6 phases
+4. Create complete timeline with milestones; phases are contiguous in weeks
+5. resources[].total_cost = count * effort_months * monthly_rate; cost_breakdown.total_cost is their sum
+6. Activity dependencies, phases and resources_needed must reference names defined in this scope
+7. Include at least 5 risks and 6 assumptions
+8. Return ONLY valid JSON
+
+JSON schema (str/int/num are value types, [x,...] is an array of x, a|b lists allowed values):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+# Section prompts for sectioned scope generation - plan, overview and risks run
+# concurrently, resources are then derived from the generated plan
+prompt_registry.register(PromptTemplate(
+    name="scope_plan",
+    token_budget=700,
+    template="""
+You are an expert project manager. Plan the delivery timeline and activities for this project.
+
+$context
+
+REQUIREMENTS:
+1. 4-6 contiguous phases with milestones
+2. 10-15 detailed activities; each activity's phase is one of the phase names above
+3. Activity dependencies reference activity names defined here
+4. resources_needed lists roles (e.g. "Backend Developer", "QA Engineer")
+
+JSON schema (str/int/num are value types, [x,...] is an array of x):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="scope_overview",
+    token_budget=500,
+    template="""
+You are an expert solution architect. Describe this project's overview, architecture and assumptions.
+
+$context
+
+Include 3-5 objectives, success metrics and deliverables, the main architecture components and at least 6 assumptions.
+
+JSON schema (str/int/num are value types, [x,...] is an array of x):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="scope_risks",
+    token_budget=500,
+    template="""
+You are an expert delivery manager. Identify at least 5 project risks with mitigations.
+
+$context
+
+JSON schema (str/int/num are value types, [x,...] is an array of x, a|b lists allowed values):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="scope_resources",
+    token_budget=1200,
+    truncatable=["plan"],
+    template="""
+You are an expert project manager. Staff this project plan with a COMPLETE team.
+
+$context
+
+Plan ($duration_weeks weeks):
+$plan
+
+REQUIREMENTS:
+1. AT LEAST 7-10 different roles, covering every role the activities need
+2. Realistic count, effort_months (at most $duration_months per person) and monthly_rate in USD
+3. allocation_percentage is the share of each person's time on this project
+
+JSON schema (str/int/num are value types, [x,...] is an array of x):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="scope_adapt",
+    token_budget=1500,
+    truncatable=["sections"],
+    template="""
+You are an expert project manager. A scope was written for a very similar project.
+Rewrite its overview, architecture and assumptions for the new project, changing only what differs.
+
+Original project:
+$source_project
+
+New project:
+$context
+
+Original sections (JSON):
+$sections
+
+JSON schema (str/int/num are value types, [x,...] is an array of x):
+$schema
+
+Return ONLY this JSON. NO markdown, NO explanations.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="entity_extraction",
+    token_budget=2000,
+    truncatable=["document"],
+    template="""
+You are an expert at analyzing project documents (RFPs, SOWs, requirements).
+Extract the key project entities from the document below.
+
+CRITICAL: Return ONLY a valid JSON object. NO markdown, NO backticks, NO extra text.
+
+Rules:
+- Arrays list every relevant item mentioned (deliverables, technologies, compliance standards like GDPR/HIPAA, features, integrations, security needs, user roles)
+- complexity MUST be exactly one of: "simple", "moderate", "complex", "enterprise" (never "medium")
+- estimated_duration like "6 months" or "12 weeks"; use "Not specified" when absent
+
+JSON schema:
+$schema
+
+Document:
+$document
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="entity_extraction_batch",
+    token_budget=6000,
+    template="""
+You are an expert at analyzing project documents (RFPs, SOWs, requirements).
+Extract the key project entities from EACH document below separately.
+
+CRITICAL: Return ONLY a valid JSON object. NO markdown, NO backticks, NO extra text.
+
+Rules:
+- Return one entry per document, in the same order, copying its doc_id exactly
+- Only use information from that document; never mix entities between documents
+- Arrays list every relevant item mentioned (deliverables, technologies, compliance standards like GDPR/HIPAA, features, integrations, security needs, user roles)
+- complexity MUST be exactly one of: "simple", "moderate", "complex", "enterprise" (never "medium")
+- estimated_duration like "6 months" or "12 weeks"; use "Not specified" when absent
+
+JSON schema:
+$schema
+
+Documents:
+$documents
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="task_modification",
+    token_budget=800,
+    truncatable=["activities", "message"],
+    template="""
+Analyze this task modification request and provide structured instructions:
+
+User Request: "$message"
+
+Current Activities:
+$activities
+
+Determine the action, the activity details, target phase, effort in days, dependencies and required roles.
+
+Return ONLY valid JSON:
+$schema
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="refinement_guidance",
+    token_budget=400,
+    truncatable=["message"],
+    template="""
+User wants to refine the project scope. Provide helpful, specific guidance.
+
+User Request: "$message"
+
+Current Scope Summary:
+- Total Duration: $duration_months months
+- Total Cost: $$$total_cost
+- Team Size: $team_size roles
+- Activities: $activity_count tasks
+
+Based on their request, suggest specific, actionable refinements they can make.
+Be concise but helpful.
+
+Return ONLY plain text response.
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="architecture_diagram",
+    token_budget=300,
+    truncatable=["tech_stack"],
+    template="""
+Generate a system architecture diagram in Mermaid syntax.
+
+Project: $name
+Domain: $domain
+Technologies: $tech_stack
+
+Return ONLY Mermaid code. NO explanations. Start with 'graph TD'.
+
+Show: Users -> Frontend -> API -> Backend -> Database
+"""
+))
+
+prompt_registry.register(PromptTemplate(
+    name="continuation",
+    token_budget=4000,
+    truncatable=["prompt"],
+    # The original prompt ends with its schema and output instructions
+    truncate_middle=["prompt"],
+    template="""
+$prompt
+
+Your previous response was cut off by the output limit. It ended with:
+$partial
+
+Continue EXACTLY where it stops. Do not repeat anything already written and do not start over.
+Return ONLY the remaining output.
+"""
+))
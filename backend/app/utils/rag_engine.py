@@ -1,19 +1,13 @@
 # backend/app/utils/rag_engine.py
-import google.generativeai as genai
 from typing import List, Dict, Any, Optional
 import json
 import uuid
 from datetime import datetime
 from app.config.config import settings
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
-
 class RAGEngine:
     """Enhanced RAG engine with knowledge base learning and better error handling"""
     
-    def __init__(self):
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-    
     async def search_similar_projects(self, query: str, filters: Optional[Dict] = None, n_results: int = 5) -> Dict[str, Any]:
         """
         Enhanced similarity search with filtering and better mock data
@@ -1,20 +1,17 @@
 # backend/app/utils/refinement_engine.py
-import google.generativeai as genai
 import json
 import re
 import math
 from typing import Dict, Any, List, Tuple
-from app.config.config import settings
 from app.schemas.project_schemas import RefinementIntent
-
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from app.utils.llm_gateway import llm_gateway
+from app.utils.json_parser import parse_llm_json
+from app.utils.prompt_registry import prompt_registry, encode_schema, TASK_INSTRUCTION_SCHEMA
 
 class RefinementEngine:
     """Enhanced interactive scope refinement with advanced NLP intent detection"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        
         # Enhanced intent patterns with weights
         self.intent_patterns = {
             'modify_tasks': {
@@ -92,37 +89,20 @@ class RefinementEngine:
     async def _modify_tasks(self, message: str, scope: Dict[str, Any]) -> Dict[str, Any]:
         """Enhanced task modification with phase awareness"""
         
-        prompt = f"""
-Analyze this task modification request and provide structured instructions:
-
-User Request: "{message}"
-
-Current Activities (first 10): 
-{json.dumps([{'name': a.get('name'), 'phase': a.get('phase'), 'effort_days': a.get('effort_days')} 
-              for a in scope.get('activities', [])[:10]], indent=2)}
-
-Determine:
-1. Action: "add" or "remove" or "modify"
-2. Activity details (name, description if adding)
-3. Target phase
-4. Estimated effort in days
-5. Dependencies (if any)
-
-Return ONLY valid JSON:
-{{
-  "action": "add|remove|modify",
-  "activity_name": "specific activity name",
-  "activity_description": "detailed description if adding",
-  "target_phase": "Planning|Design|Development|Testing|Deployment",
-  "effort_days": number,
-  "dependencies": ["list of prerequisite activities"],
-  "resources_required": ["list of required roles"]
-}}
-"""
+        activities = [
+            {'name': a.get('name'), 'phase': a.get('phase'), 'effort_days': a.get('effort_days')}
+            for a in scope.get('activities', [])[:10]
+        ]
+        prompt = prompt_registry.render(
+            "task_modification",
+            message=message,
+            activities=json.dumps(activities),
+            schema=encode_schema(TASK_INSTRUCTION_SCHEMA)
+        )
         
         try:
-            response = self.model.generate_content(prompt)
-            instruction = self._parse_json_response(response.text)
+            response_text = await llm_gateway.generate(prompt, task="task_modification")
+            instruction = self._parse_json_response(response_text)
             
             updated_scope = scope.copy()
             activities = updated_scope.get('activities', [])
@@ -444,29 +424,21 @@ Return ONLY valid JSON:
     async def _generic_refinement(self, message: str, scope: Dict[str, Any], intent: RefinementIntent) -> Dict[str, Any]:
         """Enhanced generic refinement with better suggestions"""
         
-        prompt = f"""
-User wants to refine the project scope. Provide helpful, specific guidance.
-
-User Request: "{message}"
-
-Current Scope Summary:
-- Total Duration: {scope.get('timeline', {}).get('total_duration_months', 0)} months
-- Total Cost: ${scope.get('cost_breakdown', {}).get('total_cost', 0):,.2f}
-- Team Size: {len(scope.get('resources', []))} roles
-- Activities: {len(scope.get('activities', []))} tasks
-
-Based on their request, suggest specific, actionable refinements they can make.
-Be concise but helpful.
-
-Return ONLY plain text response.
-"""
+        prompt = prompt_registry.render(
+            "refinement_guidance",
+            message=message,
+            duration_months=scope.get('timeline', {}).get('total_duration_months', 0),
+            total_cost=f"{scope.get('cost_breakdown', {}).get('total_cost', 0):,.2f}",
+            team_size=len(scope.get('resources', [])),
+            activity_count=len(scope.get('activities', []))
+        )
         
         try:
-            response = self.model.generate_content(prompt)
+            response_text = await llm_gateway.generate(prompt, task="refinement_guidance")
             
             return {
                 'updated_scope': scope,
-                'response': response.text.strip(),
+                'response': response_text.strip(),
                 'changes_made': ['No automatic changes made - provided guidance only'],
                 'intent': intent
             }
@@ -568,25 +540,12 @@ Return ONLY plain text response.
         return rates.get(role, 8000)
     
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
-        """Enhanced JSON parsing with better error handling"""
+        """Parse the instruction JSON, falling back to a safe default"""
         try:
-            # Remove markdown code blocks and clean
-            text = re.sub(r'```json\s*', '', response_text)
-            text = re.sub(r'```\s*', '', text).strip()
-            
-            # Find JSON object with multiple attempts
-            json_pattern = r'\{[^{}]*\{[^{}]*\}[^{}]*\}|\{[^{}]*\}'
-            matches = re.finditer(json_pattern, text, re.DOTALL)
-            
-            for match in matches:
-                try:
-                    json_str = match.group()
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    continue
-            
-            # If no valid JSON found, try parsing as simple structure
-            raise ValueError("No valid JSON found in response")
+            instruction = parse_llm_json(response_text)
+            if not isinstance(instruction, dict):
+                raise ValueError("Expected a JSON object")
+            return instruction
                 
         except Exception as e:
             print(f"JSON parsing error: {e}")
@@ -0,0 +1,209 @@
+# backend/app/utils/scope_pipeline.py
+import uuid
+from datetime import datetime
+from typing import Dict, Any, Optional, Callable, Awaitable
+from app.utils.architecture_generator import architecture_generator
+from app.utils.enhanced_ai_engine import enhanced_ai_engine
+from app.utils.pipeline_executor import PipelineExecutor, Stage
+from app.utils.rag_engine import rag_engine
+
+# progress(stage, percent) - called as the pipeline moves between stages
+ProgressCallback = Callable[[str, int], Awaitable[None]]
+
+
+async def run_comprehensive_scope(project_id: Any,
+                                  project_data: Dict[str, Any],
+                                  progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """RAG search, scope generation and diagrams for one project.
+
+    Shared by the synchronous endpoint and background scope jobs. Stages run
+    as soon as their inputs are ready (the architecture diagram overlaps the
+    RAG search and scope generation) and fall back to defaults on failure or
+    timeout. LLM results are cached by the gateway, so re-running after a
+    crash reuses work that already completed.
+    """
+    async def stage_done(name: str) -> None:
+        if progress and name in STAGE_PROGRESS:
+            await progress(name, STAGE_PROGRESS[name])
+
+    if progress:
+        await progress("started", 0)
+    run = await SCOPE_PIPELINE.run({"project_id": project_id, "project_data": project_data}, stage_done)
+    results = run["results"]
+
+    result = finalize_comprehensive_scope(
+        project_id=project_id,
+        project_data=project_data,
+        scope=results["scope"],
+        similar_projects=results["rag_search"],
+        architecture_diagram=results["architecture_diagram"],
+        workflow_diagram=results["workflow_diagram"],
+        confidence_score=results["confidence"],
+        assumptions=results["assumptions"],
+        dependencies=results["dependencies"],
+        stage_timings=run["timings"]
+    )
+    if progress:
+        await progress("complete", 100)
+    return result
+
+
+async def _search_similar_projects(project_data: Dict[str, Any]) -> list:
+    search_query = f"{project_data['name']} {project_data['domain']} {project_data['use_cases']}"
+    similar_projects = await rag_engine.search_similar_projects(
+        query=search_query,
+        filters={"domain": project_data['domain']} if project_data['domain'] else None,
+        n_results=3
+    )
+    return similar_projects.get("similar_projects", [])
+
+
+async def _generate_scope(project_data: Dict[str, Any], rag_search: list) -> Dict[str, Any]:
+    return await enhanced_ai_engine.generate_scope_with_rag(
+        project_data=project_data,
+        answered_questions=None,
+        similar_projects=rag_search
+    )
+
+
+async def _generate_workflow(scope: Dict[str, Any]) -> Dict[str, Any]:
+    return await architecture_generator.generate_workflow_diagram(scope.get('activities', []))
+
+
+def build_project_data(project) -> dict:
+    """Project fields used by the scoping engines"""
+    return {
+        "id": str(project.id),
+        "name": project.name,
+        "domain": project.domain,
+        "complexity": project.complexity,
+        "tech_stack": project.tech_stack,
+        "use_cases": project.use_cases,
+        "compliance": project.compliance,
+        "duration": project.duration
+    }
+
+
+def finalize_comprehensive_scope(project_id: uuid.UUID,
+                                 project_data: dict,
+                                 scope: dict,
+                                 similar_projects: list,
+                                 architecture_diagram: dict,
+                                 workflow_diagram: dict,
+                                 confidence_score: Optional[float] = None,
+                                 assumptions: Optional[list] = None,
+                                 dependencies: Optional[list] = None,
+                                 stage_timings: Optional[dict] = None) -> dict:
+    """Attach diagrams, metadata, assumptions and dependencies to a generated scope.
+
+    Values the pipeline already computed are used as given, the rest are derived here.
+    """
+    rag_used = len(similar_projects) > 0
+
+    # Calculate confidence score
+    if confidence_score is None:
+        confidence_score = calculate_confidence_score(
+            similar_projects=similar_projects,
+            rag_used=rag_used
+        )
+
+    # Add diagrams and metadata to scope
+    scope['diagrams'] = {
+        'architecture': architecture_diagram,
+        'workflow': workflow_diagram
+    }
+
+    scope['metadata'] = {
+        'confidence_score': confidence_score,
+        'rag_sources_count': len(similar_projects),
+        'generated_at': datetime.now().isoformat(),
+        'version': '2.0'
+    }
+    if stage_timings:
+        scope['metadata']['stage_timings'] = stage_timings
+
+    # Add detailed assumptions and dependencies
+    scope['assumptions'] = assumptions if assumptions is not None else generate_assumptions(project_data, scope)
+    scope['dependencies'] = dependencies if dependencies is not None else extract_dependencies(scope.get('activities', []))
+
+    return {
+        "project_id": str(project_id),
+        "scope": scope,
+        "confidence": confidence_score,
+        "rag_enhanced": rag_used
+    }
+
+
+def calculate_confidence_score(similar_projects: list, rag_used: bool) -> float:
+    """Calculate confidence score based on RAG matches"""
+    if not rag_used or not similar_projects:
+        return 0.6  # Base confidence without RAG
+
+    # Average similarity scores
+    avg_similarity = sum(p.get('similarity_score', 0) for p in similar_projects) / len(similar_projects)
+
+    # Confidence = 0.6 base + 0.4 * average similarity
+    confidence = 0.6 + (0.4 * avg_similarity)
+
+    return round(confidence, 2)
+
+
+def generate_assumptions(project_data: dict, scope: dict) -> list:
+    """Generate key assumptions for the project"""
+    assumptions = [
+        "Client will provide timely feedback and approvals",
+        "All required resources will be available as planned",
+        "Requirements are stable and major changes will follow change management process",
+        "Development environment and tools are accessible",
+        "Third-party services/APIs will be available and functioning"
+    ]
+
+    # Add domain-specific assumptions
+    domain = project_data.get('domain', '')
+    if 'healthcare' in domain.lower():
+        assumptions.append("HIPAA compliance requirements are clearly documented")
+    if 'finance' in domain.lower():
+        assumptions.append("PCI-DSS and financial compliance standards are defined")
+
+    return assumptions
+
+
+def extract_dependencies(activities: list) -> list:
+    """Extract and organize project dependencies"""
+    dependencies = []
+
+    for activity in activities:
+        if activity.get('dependencies'):
+            dependencies.append({
+                "activity": activity['name'],
+                "depends_on": activity['dependencies'],
+                "phase": activity.get('phase', 'Unknown')
+            })
+
+    return dependencies
+
+
+# Stage timeouts in seconds - scope generation has its own LLM timeouts and
+# fallback inside, this only bounds the stage as a whole
+SCOPE_PIPELINE = PipelineExecutor([
+    Stage("rag_search", _search_similar_projects, inputs=["project_data"], timeout=30,
+          fallback=lambda project_data: []),
+    Stage("architecture_diagram", architecture_generator.generate_architecture_diagram, inputs=["project_data"],
+          timeout=45, fallback=architecture_generator._get_default_architecture),
+    Stage("scope", _generate_scope, inputs=["project_data", "rag_search"], timeout=300,
+          fallback=lambda project_data, rag_search: enhanced_ai_engine._get_comprehensive_fallback_scope(project_data)),
+    Stage("workflow_diagram", _generate_workflow, inputs=["scope"], timeout=15,
+          fallback=lambda scope: architecture_generator._get_default_workflow()),
+    Stage("confidence", lambda rag_search: calculate_confidence_score(rag_search, len(rag_search) > 0),
+          inputs=["rag_search"]),
+    Stage("assumptions", generate_assumptions, inputs=["project_data", "scope"]),
+    Stage("dependencies", lambda scope: extract_dependencies(scope.get('activities', [])), inputs=["scope"]),
+])
+
+# Job progress reported when each stage finishes
+STAGE_PROGRESS = {
+    "rag_search": 10,
+    "architecture_diagram": 20,
+    "scope": 85,
+    "workflow_diagram": 95,
+}
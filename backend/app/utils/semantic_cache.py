@@ -0,0 +1,286 @@
+# backend/app/utils/semantic_cache.py
+import copy
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from app.config.config import settings
+from app.utils.ai_engine import get_jina_embeddings
+from app.utils.embedding_service import embedding_service
+from app.utils.llm_scheduler import current_llm_caller
+from app.utils.metrics import metrics
+
+# Project fields that describe what is being scoped - the name is left out so
+# "Patient portal for clinic X" and "... clinic Y" embed the same
+DESCRIPTION_FIELDS = ("domain", "complexity", "tech_stack", "use_cases", "compliance", "duration")
+# Fields with the description and requirements text (use cases are the key
+# features extracted from uploaded documents). Domain and complexity alone
+# match every project of a kind, so a key without any of these is not cached.
+CONTENT_FIELDS = ("description", "requirements", "use_cases", "tech_stack", "compliance")
+# Extracted entity values that carry no information
+_PLACEHOLDERS = {"", "not specified", "none", "n/a", "tbd", "unknown"}
+
+
+class SemanticMatch:
+    """A cached scope whose project is similar enough to reuse"""
+
+    def __init__(self, scope: Dict[str, Any], similarity: float, source_project: Dict[str, Any], mode: str):
+        self.scope = scope
+        self.similarity = similarity
+        self.source_project = source_project
+        # "direct" - use as is, "adapt" - have the LLM adjust it to the new project
+        self.mode = mode
+
+
+class _Entry:
+    def __init__(self, embedding: List[float], model: str, project: Dict[str, Any], scope: Dict[str, Any]):
+        self.embedding = embedding
+        self.model = model
+        self.project = project
+        self.scope = scope
+        self.created_at = time.time()
+
+
+class SemanticScopeCache:
+    """Reuse scopes generated for near-duplicate projects.
+
+    Keyed on the embedding of the normalized project description,
+    requirements and extracted entities; projects with none of those (only a
+    domain and complexity) are neither looked up nor stored. Entries are
+    kept per tenant (company, else user) so one customer's scopes are never
+    returned to another; calls without a known user or company skip the
+    cache entirely. Entries are bounded per tenant with LRU eviction and
+    expired after ttl_seconds. Similarity at or above direct_threshold returns the
+    cached scope as is; at or above adapt_threshold the caller adapts it with
+    a short prompt instead of generating from scratch.
+    """
+
+    def __init__(self,
+                 enabled: bool = False,
+                 direct_threshold: float = 0.97,
+                 adapt_threshold: float = 0.9,
+                 max_entries_per_tenant: int = 200,
+                 max_tenants: int = 1000,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.enabled = enabled
+        self.direct_threshold = direct_threshold
+        self.adapt_threshold = adapt_threshold
+        self.max_entries_per_tenant = max_entries_per_tenant
+        self.max_tenants = max_tenants
+        self.ttl_seconds = ttl_seconds
+        self._tenants: "OrderedDict[str, OrderedDict[str, _Entry]]" = OrderedDict()
+        self.stats = {
+            "direct_hits": 0,
+            "adapt_hits": 0,
+            "adapt_failures": 0,
+            "misses": 0,
+            "unavailable": 0,
+            "undescribed": 0,
+            "no_tenant": 0,
+            "writes": 0,
+            "evicted": 0,
+            "expired": 0
+        }
+
+    async def embed(self, project_data: Dict[str, Any]) -> List[float]:
+        """Embedding of the normalized project description, [] when disabled or unavailable"""
+        if not self.enabled:
+            return []
+        if not has_description(project_data):
+            self.stats["undescribed"] += 1
+            return []
+        if _tenant() is None:
+            self.stats["no_tenant"] += 1
+            return []
+        embedding = await get_jina_embeddings(normalize_project(project_data))
+        if not embedding:
+            self.stats["unavailable"] += 1
+        return embedding
+
+    def lookup(self, project_data: Dict[str, Any], embedding: List[float]) -> Optional[SemanticMatch]:
+        """Most similar cached scope for the current tenant, None below adapt_threshold"""
+        tenant = _tenant()
+        if not embedding or not has_description(project_data) or tenant is None:
+            return None
+        entries = self._entries(tenant, create=False)
+        best_key, best, best_similarity = None, None, -1.0
+        if entries:
+            now = time.time()
+            for key in list(entries):
+                entry = entries[key]
+                if now - entry.created_at > self.ttl_seconds:
+                    del entries[key]
+                    self.stats["expired"] += 1
+                    continue
+                if entry.model != _model() or not _same_partition(entry.project, project_data):
+                    continue
+                similarity = _cosine(embedding, entry.embedding)
+                if similarity > best_similarity:
+                    best_key, best, best_similarity = key, entry, similarity
+
+        if best is None or best_similarity < self.adapt_threshold:
+            self.stats["misses"] += 1
+            return None
+
+        entries.move_to_end(best_key)
+        mode = "direct" if best_similarity >= self.direct_threshold else "adapt"
+        self.stats[f"{mode}_hits"] += 1
+        print(f"🧠 Semantic cache {mode} hit (similarity {best_similarity:.3f}, from '{best.project.get('name')}')")
+        return SemanticMatch(copy.deepcopy(best.scope), round(best_similarity, 4), best.project, mode)
+
+    def store(self, project_data: Dict[str, Any], scope: Dict[str, Any], embedding: List[float]) -> None:
+        """Remember a freshly generated scope for the current tenant"""
+        tenant = _tenant()
+        if not embedding or not has_description(project_data) or tenant is None:
+            return
+        key = normalize_project(project_data) + "|" + str(project_data.get('name') or '')
+        entries = self._entries(tenant, create=True)
+        entries[key] = _Entry(embedding, _model(), dict(project_data), copy.deepcopy(scope))
+        entries.move_to_end(key)
+        self.stats["writes"] += 1
+        while len(entries) > self.max_entries_per_tenant:
+            entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def record_adapt_failure(self) -> None:
+        # The adapt hit turned into a full generation
+        self.stats["adapt_hits"] -= 1
+        self.stats["adapt_failures"] += 1
+        self.stats["misses"] += 1
+
+    def clear(self, tenant: Optional[str] = None) -> None:
+        """Drop one tenant's entries, or everything"""
+        if tenant is None:
+            self._tenants.clear()
+        else:
+            self._tenants.pop(tenant, None)
+
+    def _entries(self, tenant: str, create: bool) -> Optional["OrderedDict[str, _Entry]"]:
+        entries = self._tenants.get(tenant)
+        if entries is None:
+            if not create:
+                return None
+            entries = self._tenants[tenant] = OrderedDict()
+            while len(self._tenants) > self.max_tenants:
+                _, dropped = self._tenants.popitem(last=False)
+                self.stats["evicted"] += len(dropped)
+        self._tenants.move_to_end(tenant)
+        return entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["direct_hits"] + self.stats["adapt_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "hits": hits,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "tenants": len(self._tenants),
+            "entries": sum(len(entries) for entries in self._tenants.values()),
+            "direct_threshold": self.direct_threshold,
+            "adapt_threshold": self.adapt_threshold
+        }
+
+
+def normalize_project(project_data: Dict[str, Any]) -> str:
+    """Canonical text of a project's description, requirements and extracted
+    entities: lowercased, list items sorted, placeholders dropped"""
+    parts = []
+    for field in DESCRIPTION_FIELDS + ("description", "requirements"):
+        items = _items(project_data.get(field))
+        if items or field in DESCRIPTION_FIELDS:
+            parts.append(f"{field}: {', '.join(items)}")
+    entities = project_data.get("entities") or {}
+    for name in sorted(entities):
+        items = _items(entities[name])
+        if items:
+            parts.append(f"{name}: {', '.join(items)}")
+    return "\n".join(parts)
+
+
+def has_description(project_data: Dict[str, Any]) -> bool:
+    """Whether the project has description, requirements or entity text to key on"""
+    entities = project_data.get("entities") or {}
+    return any(_items(project_data.get(field)) for field in CONTENT_FIELDS) or any(
+        _items(value) for name, value in entities.items() if name not in ("domain", "complexity")
+    )
+
+
+def _items(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        items = [str(v) for v in value]
+    elif isinstance(value, str) and len(value) > 200:
+        # Free text (a description) rather than a comma-separated list
+        items = [value]
+    else:
+        items = str(value or "").split(",")
+    return sorted({" ".join(item.lower().split()) for item in items} - _PLACEHOLDERS)
+
+
+def rename_project(scope: Dict[str, Any], old_name: Optional[str], new_name: Optional[str]) -> Dict[str, Any]:
+    """Replace mentions of the source project's name in a reused scope"""
+    if not old_name or not new_name or old_name == new_name:
+        return scope
+    if isinstance(scope, dict):
+        return {key: rename_project(value, old_name, new_name) for key, value in scope.items()}
+    if isinstance(scope, list):
+        return [rename_project(value, old_name, new_name) for value in scope]
+    if isinstance(scope, str):
+        return scope.replace(old_name, new_name)
+    return scope
+
+
+def _same_partition(cached: Dict[str, Any], project_data: Dict[str, Any]) -> bool:
+    # Different domains or complexity levels need different scopes however close the text
+    return all(
+        str(cached.get(field) or "").strip().lower() == str(project_data.get(field) or "").strip().lower()
+        for field in ("domain", "complexity")
+    )
+
+
+def _tenant() -> Optional[str]:
+    # None without a caller - nothing to isolate by, so the cache is not used
+    caller = current_llm_caller()
+    if caller.company_id:
+        return f"company:{caller.company_id}"
+    if caller.user_id:
+        return f"user:{caller.user_id}"
+    return None
+
+
+def _model() -> str:
+    return embedding_service.space
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    if len(a) != len(b):
+        return -1.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else -1.0
+
+
+# Global instance
+semantic_scope_cache = SemanticScopeCache(
+    enabled=settings.SEMANTIC_CACHE_ENABLED,
+    direct_threshold=settings.SEMANTIC_CACHE_DIRECT_THRESHOLD,
+    adapt_threshold=settings.SEMANTIC_CACHE_ADAPT_THRESHOLD,
+    max_entries_per_tenant=settings.SEMANTIC_CACHE_MAX_ENTRIES_PER_TENANT,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS
+)
+metrics.callback(
+    "semantic_cache_lookups_total", "Semantic scope cache lookups by result", "counter",
+    lambda: {
+        ("direct_hit",): semantic_scope_cache.stats["direct_hits"],
+        ("adapt_hit",): semantic_scope_cache.stats["adapt_hits"],
+        ("miss",): semantic_scope_cache.stats["misses"],
+        ("unavailable",): semantic_scope_cache.stats["unavailable"],
+        ("undescribed",): semantic_scope_cache.stats["undescribed"],
+        ("no_tenant",): semantic_scope_cache.stats["no_tenant"]
+    },
+    ["result"]
+)
+metrics.callback(
+    "semantic_cache_hit_ratio", "Share of semantic scope cache lookups that reused a scope", "gauge",
+    lambda: {(): semantic_scope_cache.get_stats()["hit_ratio"]}
+)
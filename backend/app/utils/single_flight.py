@@ -0,0 +1,52 @@
+# backend/app/utils/single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from app.utils.metrics import metrics
+
+
+class SingleFlight:
+    """Coalesce concurrent identical requests onto one in-flight call.
+
+    The first caller for a key starts the work; every caller that arrives
+    while it is still running awaits the same future instead of issuing a
+    duplicate provider request.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() once per key at a time and share its result"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            print(f"🔗 Joined in-flight {self.name} request ({self.coalesced} duplicates saved)")
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shield so one caller disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "duplicates_saved": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+
+# Global instances
+llm_flight = SingleFlight("llm")
+embedding_flight = SingleFlight("embedding")
+metrics.callback(
+    "coalesced_requests_total", "Duplicate requests that joined an in-flight call", "counter",
+    lambda: {(f.name,): f.coalesced for f in (llm_flight, embedding_flight)},
+    ["name"]
+)
@@ -0,0 +1,170 @@
+# backend/app/utils/speculation.py
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, Any, Optional
+from app.config.config import settings
+from app.utils.llm_scheduler import set_llm_caller, PRIORITY_BATCH
+from app.utils.metrics import metrics
+from app.utils.scope_pipeline import run_comprehensive_scope
+
+
+def project_fingerprint(project_data: Dict[str, Any]) -> str:
+    """Hash of everything the scope pipeline reads - a match means the result is still valid"""
+    state = {**project_data, "_generation_mode": settings.SCOPE_GENERATION_MODE}
+    return hashlib.sha256(json.dumps(state, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class _Speculation:
+    def __init__(self, fingerprint: str, task: asyncio.Task):
+        self.fingerprint = fingerprint
+        self.task = task
+        self.started_at = time.monotonic()
+
+
+class ScopeSpeculator:
+    """Speculative scope generation after document upload.
+
+    Once extracted entities are saved, the full scope pipeline is started in
+    the background at batch priority, keyed on the project's fingerprint.
+    generate-comprehensive-scope then claims the result (or joins the run
+    still in flight) if the project has not changed since. Runs that are
+    superseded, go stale, expire or fail are counted as wasted.
+    """
+
+    def __init__(self, enabled: bool = False, ttl_seconds: float = 1800, max_entries: int = 100):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, _Speculation] = {}
+        self.stats = {
+            "started": 0,
+            "hits": 0,
+            "joined": 0,
+            "misses": 0,
+            "wasted_superseded": 0,
+            "wasted_stale": 0,
+            "wasted_expired": 0,
+            "wasted_failed": 0,
+            "wasted_seconds": 0.0
+        }
+
+    def start(self,
+              project_id: Any,
+              project_data: Dict[str, Any],
+              user_id: Any = None,
+              company_id: Any = None,
+              enabled: Optional[bool] = None) -> bool:
+        """Begin generating a scope for the project's current state; returns whether it started"""
+        if not (self.enabled if enabled is None else enabled):
+            return False
+        self._evict_expired()
+
+        key = str(project_id)
+        fingerprint = project_fingerprint(project_data)
+        existing = self._entries.get(key)
+        if existing and existing.fingerprint == fingerprint:
+            return False
+        if existing:
+            # Another upload changed the project - the earlier run is useless
+            self._discard(key, "wasted_superseded")
+
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k].started_at)
+            self._discard(oldest, "wasted_expired")
+
+        async def speculate():
+            # Speculative work must never delay a user's explicit requests
+            set_llm_caller(user_id, company_id, PRIORITY_BATCH)
+            return await run_comprehensive_scope(project_id, dict(project_data))
+
+        task = asyncio.create_task(speculate())
+        task.add_done_callback(_log_failure)
+        self._entries[key] = _Speculation(fingerprint, task)
+        self.stats["started"] += 1
+        print(f"🔮 Speculatively generating scope for project {key}")
+        return True
+
+    async def claim(self, project_id: Any, project_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Precomputed result for the project's current state, waiting for it if still running.
+
+        Returns None when there is no usable speculation; the caller then runs
+        the pipeline itself.
+        """
+        self._evict_expired()
+        key = str(project_id)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        if entry.fingerprint != project_fingerprint(project_data):
+            self._entries[key] = entry
+            self._discard(key, "wasted_stale")
+            self.stats["misses"] += 1
+            return None
+
+        if entry.task.done():
+            outcome = "hits"
+        else:
+            outcome = "joined"
+            print(f"🔮 Joining in-flight speculative scope for project {key}")
+
+        try:
+            # Shielded: a client disconnect must not kill the shared run
+            result = await asyncio.shield(entry.task)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats["wasted_failed"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.stats[outcome] += 1
+        print(f"⚡ Using speculative scope for project {key} ({outcome})")
+        return result
+
+    def _discard(self, key: str, reason: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        entry.task.cancel()
+        self.stats[reason] += 1
+        self.stats["wasted_seconds"] += time.monotonic() - entry.started_at
+        print(f"🗑️ Discarded speculative scope for project {key} ({reason.replace('wasted_', '')})")
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if now - e.started_at > self.ttl_seconds]:
+            self._discard(key, "wasted_expired")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and wasted speculation for monitoring"""
+        used = self.stats["hits"] + self.stats["joined"]
+        wasted = sum(v for k, v in self.stats.items() if k.startswith("wasted_") and k != "wasted_seconds")
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._entries),
+            "used": used,
+            "wasted": wasted,
+            "waste_ratio": round(wasted / (used + wasted), 3) if used + wasted else 0,
+            **{k: round(v, 1) if isinstance(v, float) else v for k, v in self.stats.items()}
+        }
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception():
+        print(f"❌ Speculative scope generation failed: {task.exception()}")
+
+
+# Global instance
+scope_speculator = ScopeSpeculator(
+    enabled=settings.SPECULATIVE_SCOPE_ENABLED,
+    ttl_seconds=settings.SPECULATIVE_SCOPE_TTL_SECONDS
+)
+metrics.callback(
+    "speculative_scope_total", "Speculative scope runs by outcome (hits, joined, wasted_*)", "counter",
+    lambda: {(k,): v for k, v in scope_speculator.stats.items() if k != "wasted_seconds" and k != "started"},
+    ["outcome"]
+)
@@ -0,0 +1,170 @@
+# backend/app/utils/workflow_compiler.py
+from collections import deque
+from typing import Dict, Any, List, Tuple
+
+# Longer activity names are shortened in node labels
+MAX_LABEL_LENGTH = 60
+
+
+def compile_workflow(activities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Compile scope activities into a Mermaid flowchart of their dependency DAG.
+
+    Nodes are activities, edges run from each dependency to its dependent
+    activity, and nodes are grouped into one subgraph per phase. Topological
+    layers come from Kahn's algorithm; activities left over are on or behind a
+    dependency cycle, which is reported and drawn with dotted edges. Runs in
+    O(V + E) with no LLM call.
+    """
+    names = [str(activity.get('name') or f"Activity {i + 1}") for i, activity in enumerate(activities)]
+    index: Dict[str, int] = {}
+    for i, name in enumerate(names):
+        # Duplicate names resolve to the first activity
+        index.setdefault(name.strip().lower(), i)
+
+    edges, unresolved = _resolve_edges(activities, index)
+    layers, cyclic = _topological_layers(len(activities), edges)
+    cycles = _find_cycles(cyclic, edges)
+    cycle_nodes = {node for cycle in cycles for node in cycle}
+
+    lines = ["flowchart LR"]
+    for phase_id, (phase, members) in enumerate(_group_by_phase(activities, layers).items()):
+        lines.append(f'    subgraph P{phase_id}["{_label(phase)}"]')
+        for node in members:
+            lines.append(f'        A{node}["{_label(names[node])}"]')
+        lines.append("    end")
+    for source, target in edges:
+        arrow = "-.->" if source in cycle_nodes and target in cycle_nodes else "-->"
+        lines.append(f"    A{source} {arrow} A{target}")
+    if cycle_nodes:
+        lines.append("    classDef cycle stroke:#d33,stroke-width:2px")
+        lines.append("    class " + ",".join(f"A{node}" for node in sorted(cycle_nodes)) + " cycle")
+
+    return {
+        'code': "\n".join(lines) + "\n",
+        'node_count': len(activities),
+        'edge_count': len(edges),
+        'layer_count': max(layers) + 1 if layers else 0,
+        'cycles': [[names[node] for node in cycle] for cycle in cycles],
+        'unresolved_dependencies': unresolved
+    }
+
+
+def _resolve_edges(activities: List[Dict[str, Any]], index: Dict[str, int]) -> Tuple[List[Tuple[int, int]], List[str]]:
+    edges = []
+    seen = set()
+    unresolved = []
+    for target, activity in enumerate(activities):
+        dependencies = activity.get('dependencies') or []
+        if isinstance(dependencies, str):
+            dependencies = [dependencies]
+        for dependency in dependencies:
+            source = index.get(str(dependency).strip().lower())
+            if source is None:
+                unresolved.append(str(dependency))
+                continue
+            if source == target or (source, target) in seen:
+                continue
+            seen.add((source, target))
+            edges.append((source, target))
+    return edges, unresolved
+
+
+def _topological_layers(node_count: int, edges: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+    """Kahn's algorithm; layer = longest dependency chain before the node.
+
+    Returns each node's layer and the nodes that could not be ordered
+    (on or downstream of a cycle) - those are placed after the last layer.
+    """
+    successors: List[List[int]] = [[] for _ in range(node_count)]
+    indegree = [0] * node_count
+    for source, target in edges:
+        successors[source].append(target)
+        indegree[target] += 1
+
+    layers = [0] * node_count
+    queue = deque(node for node in range(node_count) if indegree[node] == 0)
+    ordered = 0
+    while queue:
+        node = queue.popleft()
+        ordered += 1
+        for successor in successors[node]:
+            layers[successor] = max(layers[successor], layers[node] + 1)
+            indegree[successor] -= 1
+            if indegree[successor] == 0:
+                queue.append(successor)
+
+    cyclic = [node for node in range(node_count) if indegree[node] > 0]
+    if cyclic:
+        last = max((layers[node] for node in range(node_count) if indegree[node] == 0), default=-1)
+        for node in cyclic:
+            layers[node] = last + 1
+    return layers, cyclic
+
+
+def _find_cycles(nodes: List[int], edges: List[Tuple[int, int]]) -> List[List[int]]:
+    """Strongly connected components with more than one node (iterative Tarjan)"""
+    if not nodes:
+        return []
+    members = set(nodes)
+    successors: Dict[int, List[int]] = {node: [] for node in nodes}
+    for source, target in edges:
+        if source in members and target in members:
+            successors[source].append(target)
+
+    counter = 0
+    order: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack = set()
+    cycles = []
+
+    for root in nodes:
+        if root in order:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                order[node] = low[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack.add(node)
+            if child < len(successors[node]):
+                work.append((node, child + 1))
+                successor = successors[node][child]
+                if successor not in order:
+                    work.append((successor, 0))
+                elif successor in on_stack:
+                    low[node] = min(low[node], order[successor])
+                continue
+            if low[node] == order[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    cycles.append(sorted(component))
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+    return cycles
+
+
+def _group_by_phase(activities: List[Dict[str, Any]], layers: List[int]) -> Dict[str, List[int]]:
+    """Phases in order of their earliest activity, nodes within a phase by layer"""
+    phases: Dict[str, List[int]] = {}
+    for node, activity in enumerate(activities):
+        phases.setdefault(str(activity.get('phase') or 'Unphased'), []).append(node)
+    for members in phases.values():
+        members.sort(key=lambda node: layers[node])
+    return dict(sorted(phases.items(), key=lambda item: min(layers[node] for node in item[1])))
+
+
+def _label(text: str) -> str:
+    text = " ".join(str(text).split())
+    if len(text) > MAX_LABEL_LENGTH:
+        text = text[:MAX_LABEL_LENGTH - 1] + "…"
+    return text.replace('"', "#quot;")
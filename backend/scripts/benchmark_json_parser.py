@@ -0,0 +1,119 @@
+# backend/scripts/benchmark_json_parser.py
+"""
+Micro-benchmark for the shared LLM JSON parser on large scope payloads.
+
+Compares the old regex + find/rfind + json.loads approach against
+parse_llm_json and the incremental section parser, on clean, fenced,
+defective and truncated responses.
+
+Usage: python scripts/benchmark_json_parser.py [activities] [iterations]
+"""
+import json
+import os
+import re
+import sys
+import time
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.json_parser import parse_llm_json, IncrementalJSONParser
+
+
+def build_scope(activity_count: int) -> dict:
+    """Scope payload shaped like generate_scope_with_rag output"""
+    phases = ["Planning & Requirements", "Design & Architecture", "Development", "Testing & QA", "Deployment & Launch"]
+    activities = [
+        {
+            "name": f"Activity {i}",
+            "phase": phases[i % len(phases)],
+            "effort_days": 5 + i % 20,
+            "dependencies": [f"Activity {i - 1}"] if i else [],
+            "resources_needed": ["Backend Developer", "QA Engineer"]
+        }
+        for i in range(activity_count)
+    ]
+    resources = [
+        {"role": f"Role {i}", "count": 1 + i % 3, "effort_months": 4.5, "allocation_percentage": 100,
+         "monthly_rate": 8000 + i * 250, "total_cost": 36000 + i * 1000}
+        for i in range(max(10, activity_count // 10))
+    ]
+    return {
+        "overview": {
+            "project_summary": "Patient portal with scheduling, \"secure\" messaging and billing.",
+            "key_objectives": ["Objective 1", "Objective 2", "Objective 3"],
+            "success_metrics": ["Metric 1", "Metric 2"],
+            "deliverables": ["Deliverable 1", "Deliverable 2"]
+        },
+        "timeline": {
+            "total_duration_months": 6,
+            "total_duration_weeks": 24,
+            "phases": [{"phase_name": p, "duration_weeks": 4, "milestones": ["M1", "M2"]} for p in phases]
+        },
+        "activities": activities,
+        "resources": resources,
+        "risks": [{"risk": f"Risk {i}", "severity": "High", "mitigation": "Mitigation plan"} for i in range(20)],
+        "assumptions": [f"Assumption {i}" for i in range(10)]
+    }
+
+
+def legacy_parse(response_text: str):
+    """The approach previously copied across the engines"""
+    text = re.sub(r'```json\s*', '', response_text)
+    text = re.sub(r'```\s*', '', text).strip()
+    start = text.find('{')
+    end = text.rfind('}') + 1
+    if start != -1 and end > start:
+        return json.loads(text[start:end])
+    raise ValueError("No JSON found")
+
+
+def incremental_parse(response_text: str, chunk_size: int = 256):
+    parser = IncrementalJSONParser()
+    for i in range(0, len(response_text), chunk_size):
+        parser.feed(response_text[i:i + chunk_size])
+    if not parser.done:
+        parser.close()
+    return parser.sections
+
+
+def build_variants(scope: dict) -> dict:
+    pretty = json.dumps(scope, indent=2)
+    return {
+        "clean": pretty,
+        "fenced": f"```json\n{pretty}\n```\nLet me know if you need changes!",
+        "trailing_commas": pretty.replace("\n    }\n  ]", "\n    },\n  ]"),
+        "truncated_90pct": pretty[:int(len(pretty) * 0.9)],
+    }
+
+
+def run(parse, text: str, iterations: int):
+    try:
+        parse(text)
+    except Exception:
+        return None
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parse(text)
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    activity_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    variants = build_variants(build_scope(activity_count))
+    parsers = {"legacy": legacy_parse, "parse_llm_json": parse_llm_json, "incremental": incremental_parse}
+
+    print(f"Scope payload: {activity_count} activities, {len(variants['clean']) / 1024:.0f} KB, {iterations} iterations")
+    print(f"{'variant':<18}" + "".join(f"{name:>18}" for name in parsers))
+    for variant, text in variants.items():
+        row = f"{variant:<18}"
+        for parse in parsers.values():
+            ms = run(parse, text, iterations)
+            row += f"{'failed':>18}" if ms is None else f"{ms:>15.2f} ms"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep tests offline and free of on-disk caches
+os.environ.setdefault("LLM_PROVIDER_MODE", "replay")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "false")
+os.environ.setdefault("EMBEDDING_BACKEND", "local")
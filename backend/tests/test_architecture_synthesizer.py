@@ -0,0 +1,64 @@
+# backend/tests/test_architecture_synthesizer.py
+from app.utils.architecture_synthesizer import synthesize_architecture
+
+
+def test_react_native_is_a_mobile_app_only():
+    diagram = synthesize_architecture({'tech_stack': 'React Native, Node.js, PostgreSQL', 'domain': 'Retail'})
+    assert 'MOBILE["Mobile App (React Native)"]' in diagram['code']
+    assert 'WEB' not in diagram['code']
+    assert 'MOBILE --> GATEWAY' in diagram['code']
+    assert diagram['components'] == ['API Gateway', 'Backend API (Node.js)', 'Mobile App (React Native)', 'PostgreSQL', 'Users']
+    assert diagram['description'] == 'Retail system architecture'
+
+
+def test_react_and_react_native_together():
+    diagram = synthesize_architecture({'tech_stack': ['React', 'React Native', 'Django']})
+    assert 'Web App (React)' in diagram['components']
+    assert 'Mobile App (React Native)' in diagram['components']
+
+
+def test_longer_keywords_win_across_components():
+    diagram = synthesize_architecture({'tech_stack': 'Oracle ERP, SQL Server, Google Maps'})
+    components = diagram['components']
+    assert 'ERP (Oracle ERP)' in components
+    assert 'SQL Server' in components
+    assert 'Maps / Geolocation (Google Maps)' in components
+    # "oracle" and "sql" were claimed by the longer keywords, "go" is not in "google"
+    assert not any(label.startswith('Backend API (') for label in components)
+    assert 'Oracle' not in components
+
+
+def test_labels_name_the_technology_once():
+    diagram = synthesize_architecture({
+        'tech_stack': 'Vue, Python',
+        'use_cases': 'Email reminders, payment, SMS alerts',
+        'integration_requirements': ['SendGrid']
+    })
+    components = diagram['components']
+    assert 'Email Service (SendGrid)' in components
+    assert 'Payment Gateway' in components
+    assert 'SMS / Notifications' in components
+    assert 'Backend API (Python)' in components
+    assert not any('(Email)' in label or '(Payment)' in label for label in components)
+
+
+def test_features_do_not_add_technology_components():
+    diagram = synthesize_architecture({'tech_stack': 'Angular', 'use_cases': 'mobile friendly reports, HIPAA audit'})
+    assert 'MOBILE' not in diagram['code']
+    assert 'AUDIT' not in diagram['code']
+
+
+def test_compliance_adds_governance_components():
+    diagram = synthesize_architecture({'tech_stack': 'Angular', 'compliance': 'HIPAA'})
+    assert 'Audit Logging' in diagram['components']
+    assert 'PHI Encryption & Access Control' in diagram['components']
+    assert 'DB --> PHI' in diagram['code']
+
+
+def test_no_match_falls_back_to_the_llm():
+    assert synthesize_architecture({'tech_stack': 'COBOL', 'domain': 'Banking'}) is None
+    assert synthesize_architecture({}) is None
+
+
+def test_description_without_domain():
+    assert synthesize_architecture({'tech_stack': 'Flask'})['description'] == 'System architecture'
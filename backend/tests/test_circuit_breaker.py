@@ -0,0 +1,61 @@
+# backend/tests/test_circuit_breaker.py
+import asyncio
+
+import pytest
+
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN
+
+
+class ProviderError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+def fail_with(error):
+    async def call():
+        raise error
+    return call
+
+
+async def _calls(breaker, func, count):
+    for _ in range(count):
+        with pytest.raises(Exception):
+            await breaker.call(func)
+
+
+@pytest.mark.parametrize("error", [ValueError("bad schema"), ProviderError(400), ProviderError(401)])
+def test_caller_errors_do_not_open_the_circuit(error):
+    breaker = CircuitBreaker("test", min_calls=2)
+    asyncio.run(_calls(breaker, fail_with(error), 10))
+    assert breaker.state == CLOSED
+    assert breaker.stats["failures"] == 0
+
+
+@pytest.mark.parametrize("error", [ProviderError(503), ProviderError(429), ConnectionError("reset")])
+def test_transient_errors_open_the_circuit(error):
+    async def scenario():
+        breaker = CircuitBreaker("test", min_calls=2)
+        await _calls(breaker, fail_with(error), 2)
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(fail_with(error))
+        return breaker
+
+    breaker = asyncio.run(scenario())
+    assert breaker.state == OPEN
+    assert breaker.stats["failures"] == 2
+
+
+def test_timeouts_count_as_failures():
+    async def slow():
+        await asyncio.sleep(1)
+
+    breaker = CircuitBreaker("test", min_calls=2)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await breaker.call(slow, timeout=0.01)
+
+    asyncio.run(scenario())
+    assert breaker.state == OPEN
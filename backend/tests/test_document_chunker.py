@@ -0,0 +1,80 @@
+# backend/tests/test_document_chunker.py
+import random
+
+import pytest
+
+from app.utils.document_chunker import DocumentChunker
+from app.utils.prompt_registry import count_tokens
+
+WORDS = "portal patient secure api data cloud report scheduling billing integration".split()
+
+
+def paragraph(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+@pytest.mark.parametrize("max_tokens, overlap_tokens", [(20, 5), (60, 10), (350, 50)])
+def test_chunks_never_exceed_the_token_budget(max_tokens, overlap_tokens):
+    rng = random.Random(max_tokens)
+    chunker = DocumentChunker(max_tokens, overlap_tokens)
+    for _ in range(50):
+        pages = []
+        for _ in range(rng.randint(1, 4)):
+            lines = []
+            for _ in range(rng.randint(1, 12)):
+                roll = rng.random()
+                if roll < 0.2:
+                    lines.append(f"{rng.randint(1, 9)}.{rng.randint(1, 9)} {paragraph(rng, 3)[:-1].title()}")
+                elif roll < 0.25:
+                    lines.append("x" * rng.randint(1, 900))
+                else:
+                    lines.append(paragraph(rng, rng.randint(1, 80)))
+            pages.append("\n".join(lines))
+        for chunk in chunker.chunk(pages):
+            assert chunk.tokens == count_tokens(chunk.text)
+            assert chunk.tokens <= max_tokens
+
+
+def test_chunks_record_pages_and_section_headings():
+    rng = random.Random(1)
+    pages = [
+        "1. Introduction\n" + paragraph(rng, 40) + "\n2. Security Requirements\n" + paragraph(rng, 60),
+        paragraph(rng, 60) + "\n" + paragraph(rng, 60),
+    ]
+    chunks = DocumentChunker(max_tokens=80, overlap_tokens=10).chunk(pages)
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[0].heading == "1. Introduction"
+    assert chunks[0].page_start == 1
+    assert chunks[-1].page_end == 2
+    for chunk in chunks:
+        assert 1 <= chunk.page_start <= chunk.page_end <= 2
+        metadata = chunk.metadata()
+        assert metadata["page_start"] == chunk.page_start and metadata["heading"] == chunk.heading
+    continued = [chunk for chunk in chunks[1:] if chunk.heading == "2. Security Requirements"]
+    assert len(continued) >= 2
+    # Windows continuing a section repeat its heading
+    assert all(chunk.text.startswith("2. Security Requirements\n") for chunk in continued)
+
+
+def test_drops_running_headers_and_page_numbers():
+    rng = random.Random(2)
+    pages = [f"ACME Corp - Confidential\n{paragraph(rng, 30)}\nPage {n} of 4" for n in range(1, 5)]
+    chunks = DocumentChunker(max_tokens=350, overlap_tokens=50).chunk(pages)
+    text = "\n".join(chunk.text for chunk in chunks)
+    assert "Confidential" not in text
+    assert "of 4" not in text
+    assert chunks[0].page_start == 1 and chunks[-1].page_end == 4
+
+
+@pytest.mark.parametrize("pages", [
+    ["1. Introduction\n2. Scope\n3. Timeline"],
+    ["ACME Corp\nPage 1", "ACME Corp\nPage 2", "ACME Corp\nPage 3"],
+])
+def test_falls_back_to_raw_text_when_nothing_is_left(pages):
+    chunks = DocumentChunker(max_tokens=50, overlap_tokens=10).chunk(pages)
+    assert chunks
+    assert "ACME Corp" in chunks[0].text or "Introduction" in chunks[0].text
+
+
+def test_empty_document_has_no_chunks():
+    assert DocumentChunker().chunk(["", "  \n "]) == []
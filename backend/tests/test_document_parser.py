@@ -0,0 +1,46 @@
+# backend/tests/test_document_parser.py
+import asyncio
+
+from app.utils.document_parser import DocumentParser
+
+
+def test_documents_without_text_are_not_sent(monkeypatch):
+    parser = DocumentParser()
+    sent = []
+
+    async def extract_batch(batch, bypass_cache):
+        sent.extend(text for _, text in batch)
+        return {doc_id: {**parser._get_default_entities(), "domain": "Healthcare"} for doc_id, _ in batch}
+
+    monkeypatch.setattr(parser, "_extract_batch", extract_batch)
+    entity_sets = asyncio.run(parser.extract_entities_batch(["", "Patient portal RFP", "  \n", "Billing addendum"]))
+
+    assert sent == ["Patient portal RFP", "Billing addendum"]
+    assert [entities["domain"] for entities in entity_sets] == ["General", "Healthcare", "General", "Healthcare"]
+
+
+def test_single_document_with_text_uses_single_extraction(monkeypatch):
+    parser = DocumentParser()
+    calls = []
+
+    async def extract_entities(text, bypass_cache=False):
+        calls.append(text)
+        return {**parser._get_default_entities(), "domain": "Finance"}
+
+    monkeypatch.setattr(parser, "extract_entities", extract_entities)
+    entity_sets = asyncio.run(parser.extract_entities_batch([None, "Loan origination system"]))
+
+    assert calls == ["Loan origination system"]
+    assert entity_sets[0] == parser._get_default_entities()
+    assert entity_sets[1]["domain"] == "Finance"
+
+
+def test_no_text_makes_no_calls(monkeypatch):
+    parser = DocumentParser()
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("no extraction call expected")
+
+    monkeypatch.setattr(parser, "extract_entities", fail)
+    monkeypatch.setattr(parser, "_extract_batch", fail)
+    assert asyncio.run(parser.extract_entities_batch(["", ""])) == [parser._get_default_entities()] * 2
@@ -0,0 +1,77 @@
+# backend/tests/test_json_parser.py
+import json
+
+import pytest
+
+from app.utils.json_parser import parse_llm_json, repair_json, truncated_prefix, IncrementalJSONParser
+
+
+def test_parses_fenced_json_with_prose():
+    text = 'Here is the scope:\n```json\n{"overview": {"name": "Portal"}}\n```\nLet me know!'
+    assert parse_llm_json(text) == {"overview": {"name": "Portal"}}
+
+
+@pytest.mark.parametrize("text, expected, repair", [
+    ('{"a": [1, 2,]}', {"a": [1, 2]}, "trailing_comma"),
+    ('{"a": 1 "b": 2}', {"a": 1, "b": 2}, "missing_comma"),
+    ("{name: 'Portal'}", {"name": "Portal"}, "unquoted_key"),
+    ("{'name': 'Portal'}", {"name": "Portal"}, "single_quotes"),
+    ('{"done": True, "owner": None}', {"done": True, "owner": None}, "python_literal"),
+])
+def test_repairs_common_defects(text, expected, repair):
+    repaired, repairs = repair_json(text)
+    assert json.loads(repaired) == expected
+    assert repair in repairs
+    assert parse_llm_json(text) == expected
+
+
+def test_ignores_text_after_the_document():
+    assert parse_llm_json('{"a": 1} and {"b": 2}') == {"a": 1}
+
+
+def test_truncated_output_is_cut_back_to_last_complete_element():
+    text = '{"activities": [{"name": "Design"}, {"name": "Bui'
+    repaired, repairs = repair_json(text)
+    assert "truncated" in repairs
+    assert json.loads(repaired) == {"activities": [{"name": "Design"}]}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"a": 1, "b": {"c": {"d": "x', {"a": 1}),
+    ('{"a": [1, 2, [[', {"a": [1, 2]}),
+    ('[{"x":', []),
+    ('{"a": [], "b": "cut', {"a": []}),
+    ('{"rows": [{"name": "Build", "effort": 5, "notes": "cu', {"rows": [{"name": "Build", "effort": 5}]}),
+])
+def test_truncation_drops_containers_without_a_complete_element(text, expected):
+    repaired, _ = repair_json(text)
+    assert json.loads(repaired) == expected
+
+
+def test_truncated_prefix_leaves_brackets_open():
+    text = '{"a": [1, 2, 3], "b": {"c": "unfin'
+    prefix = truncated_prefix(text)
+    assert prefix == '{"a":[1,2,3],"b":{'
+    # A continuation appends to the prefix directly
+    assert json.loads(prefix + '"c": "done"}}') == {"a": [1, 2, 3], "b": {"c": "done"}}
+
+
+@pytest.mark.parametrize("text", ['{"a": 1}', "```json\n[1, 2]\n```", "no json here", ""])
+def test_truncated_prefix_is_none_for_complete_output(text):
+    assert truncated_prefix(text) is None
+
+
+@pytest.mark.parametrize("text", ["", "no json here"])
+def test_rejects_responses_without_json(text):
+    with pytest.raises(ValueError):
+        parse_llm_json(text)
+
+
+def test_incremental_parser_emits_members_across_chunks():
+    parser = IncrementalJSONParser()
+    emitted = []
+    for chunk in ['```json\n{"over', 'view": {"a": "x, }"}, "acti', 'vities": [1, 2]', '}\n```']:
+        emitted.extend(parser.feed(chunk))
+    assert emitted == [("overview", {"a": "x, }"}), ("activities", [1, 2])]
+    assert parser.done
+    assert parser.close() == []
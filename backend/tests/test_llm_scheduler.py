@@ -0,0 +1,117 @@
+# backend/tests/test_llm_scheduler.py
+import asyncio
+
+import pytest
+
+from app.utils.llm_scheduler import (
+    LLMScheduler, TokenBucket, QuotaExceededError, SchedulerOverloadedError,
+    set_llm_caller, PRIORITY_INTERACTIVE, PRIORITY_BATCH
+)
+
+
+def test_token_bucket_refills_at_its_per_minute_rate():
+    bucket = TokenBucket(tokens_per_minute=600)
+    start = bucket._updated
+    assert bucket.seconds_until(600, start) == 0
+    bucket.consume(600)
+    assert bucket.seconds_until(100, start) == pytest.approx(10)
+    # 10 tokens per second
+    assert bucket.seconds_until(100, start + 5) == pytest.approx(5)
+    assert bucket.seconds_until(100, start + 10) == 0
+    # Never refills past one minute's worth
+    assert bucket.seconds_until(600, start + 3600) == 0
+    assert bucket.tokens == 600
+
+
+def test_token_bucket_debt_delays_the_next_call():
+    bucket = TokenBucket(tokens_per_minute=600)
+    start = bucket._updated
+    bucket.consume(900)
+    assert bucket.seconds_until(100, start) == pytest.approx(40)
+
+
+async def _run(scheduler, calls):
+    """Run (user, priority, tokens) calls through the scheduler, return the users in admission order"""
+    order = []
+    gate = asyncio.Event()
+
+    async def call(user, priority, tokens):
+        set_llm_caller(user_id=user, priority=priority)
+        async with scheduler.slot("test", tokens):
+            order.append(user)
+            await gate.wait()
+
+    async def open_gate():
+        while len(order) < len(calls):
+            gate.set()
+            await asyncio.sleep(0)
+            gate.clear()
+            await asyncio.sleep(0)
+
+    # Hold the only slot until every call is queued
+    set_llm_caller(user_id="holder")
+    async with scheduler.slot("test", 1):
+        tasks = [asyncio.create_task(call(*spec)) for spec in calls]
+        await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_one_user_cannot_starve_another():
+    scheduler = LLMScheduler(max_concurrency=1, user_tokens_per_minute=10 ** 6, company_tokens_per_minute=10 ** 6)
+    calls = [("bulk", "standard", 1000)] * 10 + [("single", "standard", 1000)]
+    order = asyncio.run(_run(scheduler, calls))
+    # The single call queued last is served right after the bulk user's first call
+    assert order.index("single") == 1
+
+
+def test_interactive_calls_go_first():
+    scheduler = LLMScheduler(max_concurrency=1, user_tokens_per_minute=10 ** 6, company_tokens_per_minute=10 ** 6)
+    calls = [("batch", PRIORITY_BATCH, 100)] * 5 + [("chat", PRIORITY_INTERACTIVE, 100)]
+    order = asyncio.run(_run(scheduler, calls))
+    assert order[0] == "chat"
+
+
+def test_quota_timeout_is_a_quota_error():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=4, user_tokens_per_minute=1000, max_wait=0.05)
+        set_llm_caller(user_id="heavy")
+        async with scheduler.slot("test", 1000):
+            pass
+        with pytest.raises(QuotaExceededError):
+            async with scheduler.slot("test", 1000):
+                pass
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["quota_rejections"] == 1 and stats["overload_rejections"] == 0
+
+
+def test_busy_slots_timeout_is_an_overload_error():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_wait=0.05)
+        set_llm_caller(user_id="first")
+        async with scheduler.slot("test", 10):
+            set_llm_caller(user_id="second")
+            with pytest.raises(SchedulerOverloadedError):
+                async with scheduler.slot("test", 10):
+                    pass
+        return scheduler.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["overload_rejections"] == 1 and stats["quota_rejections"] == 0
+
+
+def test_idle_users_are_pruned():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=4)
+        for user in range(300):
+            set_llm_caller(user_id=f"user-{user}")
+            async with scheduler.slot("test", 1):
+                pass
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert len(scheduler._last_finish) < 300
+    assert len(scheduler._user_buckets) < 300
@@ -0,0 +1,111 @@
+# backend/tests/test_semantic_cache.py
+import asyncio
+import math
+
+import pytest
+
+from app.utils.llm_scheduler import set_llm_caller
+from app.utils.semantic_cache import SemanticScopeCache, normalize_project, has_description
+
+PROJECT = {
+    "name": "Clinic A portal",
+    "domain": "Healthcare",
+    "complexity": "medium",
+    "description": "Patient portal with appointment scheduling and secure messaging",
+    "tech_stack": "React, FastAPI",
+}
+SCOPE = {"overview": {"project_name": "Clinic A portal"}, "activities": [{"name": "Design"}]}
+
+
+def vector(similarity):
+    """Unit vector with the given cosine similarity to [1, 0]"""
+    return [similarity, math.sqrt(1 - similarity ** 2)]
+
+
+@pytest.fixture
+def cache():
+    set_llm_caller(user_id="user-1", company_id="company-1")
+    return SemanticScopeCache(enabled=True, direct_threshold=0.97, adapt_threshold=0.9)
+
+
+@pytest.mark.parametrize("similarity, mode", [(1.0, "direct"), (0.97, "direct"), (0.95, "adapt"), (0.9, "adapt")])
+def test_thresholds_pick_direct_or_adapt(cache, similarity, mode):
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    match = cache.lookup(PROJECT, vector(similarity))
+    assert match.mode == mode
+    assert match.scope == SCOPE
+    assert match.source_project["name"] == "Clinic A portal"
+
+
+def test_below_adapt_threshold_is_a_miss(cache):
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    assert cache.lookup(PROJECT, vector(0.89)) is None
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_returned_scope_is_a_copy(cache):
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    cache.lookup(PROJECT, [1.0, 0.0]).scope["activities"].clear()
+    assert cache.lookup(PROJECT, [1.0, 0.0]).scope == SCOPE
+
+
+def test_tenants_never_see_each_others_scopes(cache):
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    set_llm_caller(user_id="user-2", company_id="company-2")
+    assert cache.lookup(PROJECT, [1.0, 0.0]) is None
+    # Same company, different user - shared
+    set_llm_caller(user_id="user-3", company_id="company-1")
+    assert cache.lookup(PROJECT, [1.0, 0.0]) is not None
+    # Without a company, entries are per user
+    set_llm_caller(user_id="user-1")
+    assert cache.lookup(PROJECT, [1.0, 0.0]) is None
+
+
+def test_calls_without_a_caller_skip_the_cache(cache):
+    set_llm_caller()
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    assert cache.get_stats()["writes"] == 0
+    assert asyncio.run(cache.embed(PROJECT)) == []
+    assert cache.get_stats()["no_tenant"] == 1
+    # Nor do they see what identified callers stored
+    set_llm_caller(user_id="user-1", company_id="company-1")
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    set_llm_caller()
+    assert cache.lookup(PROJECT, [1.0, 0.0]) is None
+
+
+def test_other_domain_or_complexity_is_a_miss(cache):
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    assert cache.lookup({**PROJECT, "domain": "Finance"}, [1.0, 0.0]) is None
+    assert cache.lookup({**PROJECT, "complexity": "high"}, [1.0, 0.0]) is None
+
+
+def test_expired_entries_are_dropped(cache):
+    cache.ttl_seconds = 0
+    cache.store(PROJECT, SCOPE, [1.0, 0.0])
+    assert cache.lookup(PROJECT, [1.0, 0.0]) is None
+    assert cache.get_stats()["expired"] == 1
+
+
+def test_entries_are_bounded_per_tenant(cache):
+    cache.max_entries_per_tenant = 2
+    for name in ("A", "B", "C"):
+        cache.store({**PROJECT, "name": name}, SCOPE, [1.0, 0.0])
+    assert cache.get_stats()["entries"] == 2
+    assert cache.get_stats()["evicted"] == 1
+
+
+def test_projects_without_description_are_not_cached(cache):
+    undescribed = {"name": "X", "domain": "Healthcare", "complexity": "medium", "tech_stack": "Not specified"}
+    assert not has_description(undescribed)
+    cache.store(undescribed, SCOPE, [1.0, 0.0])
+    assert cache.get_stats()["writes"] == 0
+    assert cache.lookup(undescribed, [1.0, 0.0]) is None
+
+
+def test_normalized_text_ignores_name_order_and_case():
+    first = {**PROJECT, "tech_stack": "React, FastAPI", "entities": {"integrations": ["Stripe", "Twilio"]}}
+    second = {**PROJECT, "name": "Clinic B portal", "tech_stack": "fastapi,react",
+              "entities": {"integrations": ["twilio", "STRIPE"]}}
+    assert normalize_project(first) == normalize_project(second)
+    assert normalize_project(first) != normalize_project({**first, "description": "Billing system"})
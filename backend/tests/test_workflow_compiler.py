@@ -0,0 +1,76 @@
+# backend/tests/test_workflow_compiler.py
+from app.utils.workflow_compiler import compile_workflow
+
+
+def activity(name, phase="Development", dependencies=None):
+    return {"name": name, "phase": phase, "dependencies": dependencies or []}
+
+
+def test_compiles_layers_and_edges_of_a_dag():
+    workflow = compile_workflow([
+        activity("Requirements", "Planning"),
+        activity("Design", "Planning", ["Requirements"]),
+        activity("Backend", dependencies=["Design"]),
+        activity("Frontend", dependencies=["design"]),
+        activity("Testing", "QA", ["Backend", "Frontend"]),
+    ])
+    assert workflow["node_count"] == 5
+    assert workflow["edge_count"] == 5
+    assert workflow["layer_count"] == 4
+    assert workflow["cycles"] == []
+    assert workflow["unresolved_dependencies"] == []
+    code = workflow["code"]
+    assert code.startswith("flowchart LR\n")
+    assert "A0 --> A1" in code and "A3 --> A4" in code
+    assert '-.->' not in code
+    # Phases are ordered by their earliest activity
+    assert code.index('["Planning"]') < code.index('["Development"]') < code.index('["QA"]')
+
+
+def test_reports_each_cycle_and_draws_it_dotted():
+    workflow = compile_workflow([
+        activity("Setup"),
+        activity("A", dependencies=["Setup", "C"]),
+        activity("B", dependencies=["A"]),
+        activity("C", dependencies=["B"]),
+        activity("D", dependencies=["E"]),
+        activity("E", dependencies=["D"]),
+        activity("Downstream", dependencies=["C"]),
+    ])
+    assert sorted(workflow["cycles"]) == [["A", "B", "C"], ["D", "E"]]
+    code = workflow["code"]
+    assert "A1 -.-> A2" in code and "A4 -.-> A5" in code
+    # Edges into or out of a cycle stay solid
+    assert "A0 --> A1" in code and "A3 --> A6" in code
+    assert "class A1,A2,A3,A4,A5 cycle" in code
+
+
+def test_long_cycle_does_not_recurse():
+    count = 5000
+    activities = [activity(f"Step {i}", dependencies=[f"Step {(i - 1) % count}"]) for i in range(count)]
+    workflow = compile_workflow(activities)
+    assert len(workflow["cycles"]) == 1
+    assert len(workflow["cycles"][0]) == count
+
+
+def test_ignores_self_and_duplicate_dependencies_and_reports_unknown_ones():
+    workflow = compile_workflow([
+        activity("Design"),
+        activity("Build", dependencies=["Design", "Design", "Build", "Procurement"]),
+    ])
+    assert workflow["edge_count"] == 1
+    assert workflow["cycles"] == []
+    assert workflow["unresolved_dependencies"] == ["Procurement"]
+
+
+def test_labels_are_escaped_and_shortened():
+    workflow = compile_workflow([activity('Build the "admin" portal ' + "x" * 80)])
+    assert "#quot;admin#quot;" in workflow["code"]
+    assert "…" in workflow["code"]
+
+
+def test_empty_activity_list():
+    workflow = compile_workflow([])
+    assert workflow["node_count"] == 0
+    assert workflow["layer_count"] == 0
+    assert workflow["code"] == "flowchart LR\n"